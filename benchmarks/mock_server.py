@@ -0,0 +1,623 @@
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+# The number of resources of each type served by default
+DEFAULT_COUNTS = {
+    'products': 20,
+    'variants': 60,
+    'customers': 400,
+    'orders': 1000,
+    'subscriptions': 500,
+    'checkouts': 100,
+}
+
+# The to-one relationships that can be included, with the attribute holding the related ID
+RELATIONSHIPS = {
+    'variants': {'product': ('products', 'product_id')},
+    'orders': {'customer': ('customers', 'customer_id')},
+    'subscriptions': {
+        'customer': ('customers', 'customer_id'),
+        'order': ('orders', 'order_id'),
+        'product': ('products', 'product_id'),
+        'variant': ('variants', 'variant_id'),
+    },
+    'checkouts': {'variant': ('variants', 'variant_id')},
+}
+
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 100
+
+_PATH = re.compile(r'^/v1/([a-z-]+)(?:/([^/]+))?$')
+_EPOCH = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+
+def _timestamp(seconds: float) -> str:
+    return (_EPOCH + timedelta(seconds=seconds)).strftime('%Y-%m-%dT%H:%M:%S.000000Z')
+
+
+class Dataset:
+    """
+    Deterministic, realistically shaped attributes for every resource type the benchmarks use.
+    """
+
+    def __init__(self, counts: Optional[Dict[str, int]] = None, store_id: int = 1, seed: int = 0):
+        """
+        Initialize a new instance of Dataset.
+
+        Args:
+            counts (Dict[str, int], optional): The number of resources per type, see DEFAULT_COUNTS.
+            store_id (int, optional): The store every resource belongs to.
+            seed (int, optional): The seed of the generated values.
+        """
+        self.counts = dict(DEFAULT_COUNTS, **(counts or {}))
+        self.store_id = store_id
+        self._random = random.Random(seed)
+        self.resources: Dict[str, List[Dict]] = {}
+        for type in ('products', 'variants', 'customers', 'orders', 'subscriptions', 'checkouts'):
+            build = getattr(self, f'_{type}')
+            self.resources[type] = [build(id) for id in range(1, self.counts[type] + 1)]
+        self._by_id = {type: {str(attributes['id']): attributes for attributes in resources}
+                       for type, resources in self.resources.items()}
+
+    def get(self, type: str, id: str) -> Optional[Dict]:
+        """
+        Return the attributes of a resource, with its ID under 'id', or None if it doesn't exist.
+        """
+        return self._by_id.get(type, {}).get(id)
+
+    def add(self, type: str, attributes: Dict) -> Dict:
+        """
+        Add a resource, numbering it after the existing ones.
+        """
+        attributes = dict(attributes, id=len(self.resources[type]) + 1)
+        self.resources[type].append(attributes)
+        self._by_id[type][str(attributes['id'])] = attributes
+        return attributes
+
+    def _pick(self, type: str) -> int:
+        return self._random.randint(1, self.counts[type])
+
+    def _created(self, id: int, type: str) -> Tuple[float, str, str]:
+        # Spread the resources over two years, in ID order, with a later update for some
+        created = id * 2 * 365 * 86400 / self.counts[type]
+        updated = created + self._random.choice((0, 0, 3600, 86400 * self._random.randint(1, 90)))
+        return created, _timestamp(created), _timestamp(updated)
+
+    def _products(self, id: int) -> Dict:
+        _, created_at, updated_at = self._created(id, 'products')
+        price = self._random.choice((900, 1900, 4900, 9900))
+        return {
+            'id': id,
+            'store_id': self.store_id,
+            'name': f'Product {id}',
+            'slug': f'product-{id}',
+            'description': f'<p>Everything you need for project {id}.</p>',
+            'status': 'published',
+            'status_formatted': 'Published',
+            'thumb_url': f'https://app.lemonsqueezy.com/storage/media/{id}/thumb.png',
+            'large_thumb_url': f'https://app.lemonsqueezy.com/storage/media/{id}/large.png',
+            'price': price,
+            'price_formatted': f'${price / 100:.2f}',
+            'from_price': price,
+            'to_price': price * 10,
+            'pay_what_you_want': False,
+            'buy_now_url': f'https://example.lemonsqueezy.com/checkout/buy/{id:08x}',
+            'created_at': created_at,
+            'updated_at': updated_at,
+            'test_mode': False,
+        }
+
+    def _variants(self, id: int) -> Dict:
+        _, created_at, updated_at = self._created(id, 'variants')
+        subscription = id % 3 != 0
+        interval = self._random.choice(('month', 'year')) if subscription else None
+        return {
+            'id': id,
+            'product_id': (id - 1) % self.counts['products'] + 1,
+            'name': f'Variant {id}',
+            'slug': f'variant-{id:08x}',
+            'description': '',
+            'price': self._random.choice((500, 900, 1900, 4900, 9900)),
+            'is_subscription': subscription,
+            'interval': interval,
+            'interval_count': 1 if subscription else None,
+            'has_free_trial': subscription and id % 4 == 0,
+            'trial_interval': 'day',
+            'trial_interval_count': 14,
+            'pay_what_you_want': False,
+            'min_price': 0,
+            'suggested_price': 0,
+            'has_license_keys': id % 5 == 0,
+            'license_activation_limit': 5,
+            'is_license_limit_unlimited': False,
+            'license_length_value': 1,
+            'license_length_unit': 'years',
+            'is_license_length_unlimited': False,
+            'sort': id,
+            'status': 'published',
+            'status_formatted': 'Published',
+            'created_at': created_at,
+            'updated_at': updated_at,
+            'test_mode': False,
+        }
+
+    def _customers(self, id: int) -> Dict:
+        _, created_at, updated_at = self._created(id, 'customers')
+        return {
+            'id': id,
+            'store_id': self.store_id,
+            'name': f'Customer {id}',
+            'email': f'customer{id}@example.com',
+            'status': self._random.choice(('subscribed', 'unsubscribed', 'archived', 'requires_verification')),
+            'city': None,
+            'region': None,
+            'country': self._random.choice(('US', 'GB', 'DE', 'FR', 'NL', 'CA', 'AU')),
+            'total_revenue_currency': self._random.randint(0, 500000),
+            'mrr': self._random.randint(0, 10000),
+            'status_formatted': 'Subscribed',
+            'country_formatted': 'United States',
+            'total_revenue_currency_formatted': '$0.00',
+            'mrr_formatted': '$0.00',
+            'urls': {'customer_portal': f'https://example.lemonsqueezy.com/billing?expires=0&signature={id:064x}'},
+            'created_at': created_at,
+            'updated_at': updated_at,
+            'test_mode': False,
+        }
+
+    def _orders(self, id: int) -> Dict:
+        _, created_at, updated_at = self._created(id, 'orders')
+        customer_id = self._pick('customers')
+        variant_id = self._pick('variants')
+        currency = self._random.choice(('USD', 'USD', 'USD', 'EUR', 'GBP'))
+        rate = {'USD': '1.0000000000', 'EUR': '1.0869565217', 'GBP': '1.2658227848'}[currency]
+        subtotal = self._random.choice((500, 900, 1900, 4900, 9900))
+        discount = self._random.choice((0, 0, 0, subtotal // 10))
+        tax = (subtotal - discount) // 5
+        total = subtotal - discount + tax
+        status = self._random.choice(('paid',) * 17 + ('refunded', 'pending', 'failed'))
+        return {
+            'id': id,
+            'store_id': self.store_id,
+            'customer_id': customer_id,
+            'identifier': f'{id:08x}-0000-4000-8000-{id:012x}',
+            'order_number': 1000 + id,
+            'user_name': f'Customer {customer_id}',
+            'user_email': f'customer{customer_id}@example.com',
+            'currency': currency,
+            'currency_rate': rate,
+            'subtotal': subtotal,
+            'discount_total': discount,
+            'tax': tax,
+            'total': total,
+            'subtotal_usd': round(subtotal * float(rate)),
+            'discount_total_usd': round(discount * float(rate)),
+            'tax_usd': round(tax * float(rate)),
+            'total_usd': round(total * float(rate)),
+            'tax_name': 'VAT',
+            'tax_rate': '20.00',
+            'status': status,
+            'status_formatted': status.capitalize(),
+            'refunded': status == 'refunded',
+            'refunded_at': updated_at if status == 'refunded' else None,
+            'subtotal_formatted': f'${subtotal / 100:.2f}',
+            'discount_total_formatted': f'${discount / 100:.2f}',
+            'tax_formatted': f'${tax / 100:.2f}',
+            'total_formatted': f'${total / 100:.2f}',
+            'first_order_item': {
+                'id': id,
+                'order_id': id,
+                'product_id': (variant_id - 1) % self.counts['products'] + 1,
+                'variant_id': variant_id,
+                'product_name': f'Product {(variant_id - 1) % self.counts["products"] + 1}',
+                'variant_name': f'Variant {variant_id}',
+                'price': subtotal,
+                'created_at': created_at,
+                'updated_at': created_at,
+                'test_mode': False,
+            },
+            'urls': {'receipt': f'https://app.lemonsqueezy.com/my-orders/{id:08x}?signature={id:064x}'},
+            'created_at': created_at,
+            'updated_at': updated_at,
+            'test_mode': False,
+        }
+
+    def _subscriptions(self, id: int) -> Dict:
+        created, created_at, updated_at = self._created(id, 'subscriptions')
+        variant_id = self._pick('variants')
+        customer_id = self._pick('customers')
+        status = self._random.choice(('active',) * 6 + ('on_trial', 'paused', 'past_due', 'unpaid', 'cancelled',
+                                                         'expired'))
+        ended = status in ('cancelled', 'expired')
+        return {
+            'id': id,
+            'store_id': self.store_id,
+            'customer_id': customer_id,
+            'order_id': self._pick('orders'),
+            'order_item_id': id,
+            'product_id': (variant_id - 1) % self.counts['products'] + 1,
+            'variant_id': variant_id,
+            'product_name': f'Product {(variant_id - 1) % self.counts["products"] + 1}',
+            'variant_name': f'Variant {variant_id}',
+            'user_name': f'Customer {customer_id}',
+            'user_email': f'customer{customer_id}@example.com',
+            'status': status,
+            'status_formatted': status.replace('_', ' ').title(),
+            'card_brand': self._random.choice(('visa', 'mastercard', 'amex')),
+            'card_last_four': f'{self._random.randint(0, 9999):04d}',
+            'pause': {'mode': 'void', 'resumes_at': None} if status == 'paused' else None,
+            'cancelled': status == 'cancelled',
+            'trial_ends_at': _timestamp(created + 14 * 86400) if status == 'on_trial' else None,
+            'billing_anchor': self._random.randint(1, 28),
+            'first_subscription_item': {
+                'id': id,
+                'subscription_id': id,
+                'price_id': variant_id,
+                'quantity': 1,
+                'is_usage_based': False,
+                'created_at': created_at,
+                'updated_at': updated_at,
+            },
+            'urls': {
+                'update_payment_method': f'https://example.lemonsqueezy.com/subscription/{id}/payment-details',
+                'customer_portal': f'https://example.lemonsqueezy.com/billing/{id}?signature={id:064x}',
+            },
+            'renews_at': _timestamp(created + 30 * 86400),
+            'ends_at': _timestamp(created + 30 * 86400) if ended else None,
+            'created_at': created_at,
+            'updated_at': updated_at,
+            'test_mode': False,
+        }
+
+    def _checkouts(self, id: int) -> Dict:
+        _, created_at, updated_at = self._created(id, 'checkouts')
+        return self.checkout(id, self._pick('variants'), {}, created_at, updated_at)
+
+    def checkout(self, id: int, variant_id: int, attributes: Dict, created_at: str, updated_at: str) -> Dict:
+        """
+        Return the attributes of a checkout, filled in from those sent to create it.
+        """
+        return {
+            'id': id,
+            'store_id': self.store_id,
+            'variant_id': variant_id,
+            'custom_price': attributes.get('custom_price'),
+            'product_options': attributes.get('product_options') or {
+                'name': '', 'description': '', 'media': [], 'redirect_url': '', 'receipt_button_text': '',
+                'receipt_link_url': '', 'receipt_thank_you_note': '', 'enabled_variants': [],
+            },
+            'checkout_options': attributes.get('checkout_options') or {
+                'embed': False, 'media': True, 'logo': True, 'desc': True, 'discount': True, 'dark': False,
+                'subscription_preview': True, 'button_color': '#7047EB',
+            },
+            'checkout_data': attributes.get('checkout_data') or {
+                'email': '', 'name': '', 'billing_address': [], 'tax_number': '', 'discount_code': '',
+                'custom': [], 'variant_quantities': [],
+            },
+            'preview': attributes.get('preview') or False,
+            'expires_at': attributes.get('expires_at'),
+            'created_at': created_at,
+            'updated_at': updated_at,
+            'test_mode': False,
+            'url': f'https://example.lemonsqueezy.com/checkout/custom/{id:08x}-0000-4000-8000-{id:012x}',
+        }
+
+
+class MockServer:
+    """
+    In-process HTTP server answering the Lemon Squeezy JSON:API endpoints from a generated Dataset.
+
+    Lists are paginated like the API (`page[number]`, `page[size]`, `meta.page`
+    and `links.next`) and accept `filter[...]` on any attribute, `sort`,
+    `include` of the to-one relationships in RELATIONSHIPS and `fields[...]`.
+    Single resources are served from `/v1/{type}/{id}` and checkouts are
+    created with `POST /v1/checkouts`. Every request can be delayed by
+    `latency` (plus up to `jitter`) seconds, and a `rate_limited` or `errors`
+    fraction of them are answered with a 429 or a 503 instead; all of these can
+    be changed while the server runs. Encoded GET responses are reused, so the
+    server spends little of the process's time on repeated requests.
+    """
+
+    def __init__(self, dataset: Optional[Dataset] = None, host: str = '127.0.0.1', port: int = 0,
+                 latency: float = 0.0, jitter: float = 0.0, rate_limited: float = 0.0, errors: float = 0.0,
+                 retry_after: float = 0.0, seed: int = 0):
+        """
+        Initialize a new instance of MockServer.
+
+        Args:
+            dataset (Dataset, optional): The resources to serve, a default Dataset if not given.
+            host (str, optional): The address to listen on.
+            port (int, optional): The port to listen on, a free one by default.
+            latency (float, optional): Seconds every request is delayed by.
+            jitter (float, optional): Up to this many seconds added at random to the delay.
+            rate_limited (float, optional): The fraction of requests answered with 429 Too Many Requests.
+            errors (float, optional): The fraction of requests answered with 503 Service Unavailable.
+            retry_after (float, optional): The Retry-After header of the 429 responses, in seconds.
+            seed (int, optional): The seed deciding which requests fail.
+        """
+        self.dataset = dataset if dataset is not None else Dataset()
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limited = rate_limited
+        self.errors = errors
+        self.retry_after = retry_after
+        self.requests = 0
+        self.statuses: Counter = Counter()
+        self._random = random.Random(seed)
+        self._responses: Dict[str, Tuple[int, bytes]] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """
+        The base URL of the server, to pass as a client's `api_url`.
+        """
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'MockServer':
+        """
+        Serve in a background thread.
+
+        Returns:
+            MockServer: The server itself.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, name='lemon-squeezy-mock-server',
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stop serving and close the socket.
+        """
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> 'MockServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def update(self, type: str, id: str, attributes: Dict) -> Dict:
+        """
+        Change a resource, e.g. to set a new `updated_at`, as if it were edited in the dashboard.
+
+        Args:
+            type (str): The resource type, e.g. 'customers'.
+            id (str): The ID of the resource.
+            attributes (Dict): The attributes to change.
+
+        Returns:
+            Dict: The attributes of the resource.
+        """
+        with self._lock:
+            resource = self.dataset.get(type, str(id))
+            resource.update(attributes)
+            self._responses.clear()
+        return resource
+
+    def add(self, type: str, attributes: Dict) -> Dict:
+        """
+        Add a resource of a type, numbered after the existing ones.
+
+        Args:
+            type (str): The resource type, e.g. 'customers'.
+            attributes (Dict): The attributes of the resource.
+
+        Returns:
+            Dict: The attributes of the resource, with its ID.
+        """
+        with self._lock:
+            resource = self.dataset.add(type, attributes)
+            self._responses.clear()
+        return resource
+
+    def reset_stats(self) -> None:
+        """
+        Zero the request and status counters.
+        """
+        with self._lock:
+            self.requests = 0
+            self.statuses.clear()
+
+    def _fault(self) -> Tuple[float, Optional[int]]:
+        # The delay and injected status of the next request
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            draw = self._random.random()
+        if draw < self.rate_limited:
+            return delay, 429
+        if draw < self.rate_limited + self.errors:
+            return delay, 503
+        return delay, None
+
+    def respond(self, method: str, target: str, body: bytes) -> Tuple[int, bytes]:
+        """
+        Answer a request without the fault injection, e.g. to inspect a response.
+
+        Args:
+            method (str): The HTTP method.
+            target (str): The path and query string.
+            body (bytes): The request body.
+
+        Returns:
+            Tuple[int, bytes]: The status code and the encoded response.
+        """
+        if method == 'GET':
+            cached = self._responses.get(target)
+            if cached is not None:
+                return cached
+        url = urlsplit(target)
+        match = _PATH.match(url.path)
+        if match is None or match.group(1) not in self.dataset.resources:
+            return 404, _error(404, 'Not Found')
+        type, id = match.groups()
+        query = dict(parse_qsl(url.query))
+
+        if method == 'POST' and type == 'checkouts' and id is None:
+            with self._lock:
+                response = 201, self._create_checkout(body)
+                # A new checkout changes the checkout lists
+                self._responses.clear()
+            return response
+        if method != 'GET':
+            return 405, _error(405, 'Method Not Allowed')
+        if id is None:
+            response = 200, self._list(type, url.path, query)
+        else:
+            attributes = self.dataset.get(type, id)
+            if attributes is None:
+                return 404, _error(404, 'Not Found')
+            response = 200, self._document(type, [attributes], query, single=True)
+        if len(self._responses) >= 4096:
+            self._responses.clear()
+        self._responses[target] = response
+        return response
+
+    def _list(self, type: str, path: str, query: Dict[str, str]) -> bytes:
+        resources = self.dataset.resources[type]
+        filters = {name[7:-1]: value for name, value in query.items() if name.startswith('filter[')}
+        if filters:
+            resources = [attributes for attributes in resources
+                         if all(str(attributes.get(name)) == value for name, value in filters.items())]
+        sort = query.get('sort')
+        if sort:
+            name = sort.lstrip('-')
+            resources = sorted(resources, key=lambda attributes: (attributes.get(name) or '', attributes['id']),
+                               reverse=sort.startswith('-'))
+
+        size = min(int(query.get('page[size]', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        number = max(int(query.get('page[number]', 1)), 1)
+        last = max((len(resources) + size - 1) // size, 1)
+        page = resources[(number - 1) * size:number * size]
+
+        def link(page_number: int) -> str:
+            return f'{self.url}{path}?{urlencode(dict(query, **{"page[number]": page_number, "page[size]": size}))}'
+
+        links = {'first': link(1), 'last': link(last)}
+        if number < last:
+            links['next'] = link(number + 1)
+        if number > 1:
+            links['prev'] = link(number - 1)
+        meta = {'page': {
+            'currentPage': number,
+            'from': (number - 1) * size + 1 if page else None,
+            'lastPage': last,
+            'perPage': size,
+            'to': (number - 1) * size + len(page) if page else None,
+            'total': len(resources),
+        }}
+        return self._document(type, page, query, links=links, meta=meta)
+
+    def _document(self, type: str, resources: List[Dict], query: Dict[str, str], single: bool = False,
+                  links: Optional[Dict] = None, meta: Optional[Dict] = None) -> bytes:
+        include = [name for name in query.get('include', '').split(',') if name in RELATIONSHIPS.get(type, {})]
+        data = [self._resource(type, attributes, include, query) for attributes in resources]
+        document = {'jsonapi': {'version': '1.0'}}
+        if meta is not None:
+            document['meta'] = meta
+        document['links'] = links if links is not None else {'self': f'{self.url}/v1/{type}/{resources[0]["id"]}'}
+        document['data'] = data[0] if single else data
+        if include:
+            included = {}
+            for attributes in resources:
+                for name in include:
+                    related_type, attribute = RELATIONSHIPS[type][name]
+                    related = self.dataset.get(related_type, str(attributes.get(attribute)))
+                    if related is not None:
+                        included[related_type, related['id']] = self._resource(related_type, related, [], query)
+            document['included'] = list(included.values())
+        return json.dumps(document, separators=(',', ':')).encode('utf-8')
+
+    def _resource(self, type: str, attributes: Dict, include: List[str], query: Dict[str, str]) -> Dict:
+        url = f'{self.url}/v1/{type}/{attributes["id"]}'
+        fields = query.get(f'fields[{type}]')
+        shown = fields.split(',') if fields is not None else None
+        relationships = {}
+        for name, (related_type, attribute) in RELATIONSHIPS.get(type, {}).items():
+            if shown is not None and name not in shown:
+                continue
+            relationship = {'links': {'related': f'{url}/{name}', 'self': f'{url}/relationships/{name}'}}
+            if name in include:
+                relationship['data'] = {'type': related_type, 'id': str(attributes.get(attribute))}
+            relationships[name] = relationship
+        return {
+            'type': type,
+            'id': str(attributes['id']),
+            'attributes': {name: value for name, value in attributes.items()
+                           if name != 'id' and (shown is None or name in shown)},
+            'relationships': relationships,
+            'links': {'self': url},
+        }
+
+    def _create_checkout(self, body: bytes) -> bytes:
+        data = json.loads(body or b'{}').get('data') or {}
+        relationships = data.get('relationships') or {}
+        variant = (relationships.get('variant') or {}).get('data') or {}
+        now = _timestamp((datetime.now(timezone.utc) - _EPOCH).total_seconds())
+        checkout = self.dataset.checkout(len(self.dataset.resources['checkouts']) + 1, int(variant.get('id') or 1),
+                                         data.get('attributes') or {}, now, now)
+        checkout = self.dataset.add('checkouts', checkout)
+        return self._document('checkouts', [checkout], {}, single=True)
+
+    def _handler(self) -> type:
+        server = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            # Keep connections open, so the client's connection pool is exercised like against the API
+            protocol_version = 'HTTP/1.1'
+            # The headers and body are written separately, which Nagle's algorithm would hold back
+            disable_nagle_algorithm = True
+
+            def _handle(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                delay, status = server._fault()
+                if delay:
+                    time.sleep(delay)
+                headers = {}
+                if status == 429:
+                    content = _error(429, 'Too Many Requests')
+                    headers['Retry-After'] = str(server.retry_after)
+                elif status is not None:
+                    content = _error(status, 'Service Unavailable')
+                else:
+                    status, content = server.respond(self.command, self.path, body)
+                with server._lock:
+                    server.statuses[status] += 1
+
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/vnd.api+json')
+                self.send_header('Content-Length', str(len(content)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = do_PATCH = do_DELETE = _handle
+
+            def log_message(self, *args):
+                pass
+
+        return RequestHandler
+
+
+def _error(status: int, title: str) -> bytes:
+    return json.dumps({'jsonapi': {'version': '1.0'},
+                       'errors': [{'status': str(status), 'title': title}]}).encode('utf-8')
@@ -0,0 +1,330 @@
+"""
+Benchmark the client against the in-process mock server.
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --latency 0.05 --rate-limited 0.02 --errors 0.01
+    python -m benchmarks.run --compare results.json
+
+Run from the repository root. Every scenario reports requests per second,
+p50/p99 latency per call, client CPU time per page and memory retained per
+record, and the results can be written as JSON and compared against the
+results of an earlier release.
+"""
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+from lemon_squeezy import LemonSqueezy, LemonSqueezyError
+from lemon_squeezy.retry import RetryPolicy
+from .mock_server import Dataset, MockServer
+
+# Metrics where a higher value is better; for the others lower is better
+HIGHER_IS_BETTER = frozenset({'requests_per_second', 'calls_per_second'})
+COMPARED = ('requests_per_second', 'latency_p50_ms', 'latency_p99_ms', 'cpu_per_page_ms', 'memory_per_record_bytes')
+
+
+class Scenario:
+    """
+    A client call measured by the suite.
+    """
+
+    def __init__(self, name: str, call: Callable[[LemonSqueezy], Any], iterations: Optional[int] = None):
+        """
+        Initialize a new instance of Scenario.
+
+        Args:
+            name (str): The name of the scenario in the results.
+            call (Callable[[LemonSqueezy], Any]): Makes the call and returns its result.
+            iterations (int, optional): The number of calls measured, instead of the suite's default.
+        """
+        self.name = name
+        self.call = call
+        self.iterations = iterations
+
+
+def scenarios(dataset: Dataset, page_size: int = 100, concurrency: int = 1) -> List[Scenario]:
+    """
+    Build the default scenarios, cycling through the IDs of the dataset.
+
+    Args:
+        dataset (Dataset): The resources served by the mock server.
+        page_size (int, optional): The page size of the full scans.
+        concurrency (int, optional): The number of pages prefetched concurrently by the full scans.
+
+    Returns:
+        List[Scenario]: The scenarios.
+    """
+    def ids(type: str) -> Callable[[], int]:
+        counter = iter(range(sys.maxsize))
+        count = dataset.counts[type]
+        return lambda: next(counter) % count + 1
+
+    order_id, subscription_id, customer_id = ids('orders'), ids('subscriptions'), ids('customers')
+    product_id, variant_id, checkout_id = ids('products'), ids('variants'), ids('checkouts')
+    scan_iterations = 5
+    return [
+        Scenario('get_all_orders', lambda ls: ls.order.get_all_orders()),
+        Scenario('list_subscriptions', lambda ls: ls.subscription.list_subscriptions()),
+        Scenario('iter_orders', lambda ls: list(ls.order.iter_orders(page_size=page_size, concurrency=concurrency)),
+                 scan_iterations),
+        Scenario('iter_subscriptions',
+                 lambda ls: list(ls.subscription.iter_subscriptions(page_size=page_size, concurrency=concurrency)),
+                 scan_iterations),
+        Scenario('create_checkout', lambda ls: ls.checkout.create_checkout(
+            dataset.store_id, variant_id(), checkout_data={'email': 'customer@example.com', 'custom': {'ref': '1'}})),
+        Scenario('get_order', lambda ls: ls.order.get_order(order_id())),
+        Scenario('get_subscription', lambda ls: ls.subscription.get_subscription(subscription_id())),
+        Scenario('get_customer', lambda ls: ls.customer.get_customer(customer_id())),
+        Scenario('get_product', lambda ls: ls.product.get_product(product_id())),
+        Scenario('get_variant', lambda ls: ls.variants.get_variant(variant_id())),
+        Scenario('retrieve_checkout', lambda ls: ls.checkout.retrieve_checkout(checkout_id())),
+    ]
+
+
+def _records(result: Any) -> int:
+    if result is None:
+        return 0
+    if isinstance(result, list):
+        return len(result)
+    data = result.get('data') if isinstance(result, dict) else None
+    return len(data) if isinstance(data, list) else 1
+
+
+def _percentile(values: List[float], q: float) -> float:
+    # Nearest rank on sorted values
+    index = min(len(values) - 1, max(0, round(q * len(values) + 0.5) - 1))
+    return values[index]
+
+
+def measure(client: LemonSqueezy, server: MockServer, scenario: Scenario, iterations: int = 200,
+            warmup: int = 10, memory_iterations: int = 20) -> Dict[str, Any]:
+    """
+    Measure a scenario.
+
+    The calls are timed one after the other on this thread, so the CPU time
+    is the client's own: the mock server runs on other threads. Memory is
+    measured in a separate run under tracemalloc, as the growth of traced
+    memory while the results of `memory_iterations` calls are kept.
+
+    Args:
+        client (LemonSqueezy): The client pointed at the server.
+        server (MockServer): The mock server.
+        scenario (Scenario): The scenario to run.
+        iterations (int, optional): The number of calls timed, unless the scenario sets its own.
+        warmup (int, optional): The number of untimed calls made first.
+        memory_iterations (int, optional): The number of calls made under tracemalloc.
+
+    Returns:
+        Dict[str, Any]: The results.
+    """
+    iterations = scenario.iterations or iterations
+
+    def call() -> Any:
+        try:
+            return scenario.call(client)
+        except LemonSqueezyError:
+            return None
+
+    for _ in range(min(warmup, iterations)):
+        call()
+
+    gc.collect()
+    server.reset_stats()
+    latencies = []
+    records = 0
+    failed_calls = 0
+    cpu_started_at = time.thread_time()
+    started_at = time.perf_counter()
+    for _ in range(iterations):
+        call_started_at = time.perf_counter()
+        result = call()
+        latencies.append(time.perf_counter() - call_started_at)
+        if result is None:
+            failed_calls += 1
+        records += _records(result)
+    elapsed = time.perf_counter() - started_at
+    cpu = time.thread_time() - cpu_started_at
+    requests = server.requests
+    pages = sum(count for status, count in server.statuses.items() if status < 400)
+    failed_requests = requests - pages
+
+    memory_records = 0
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = [call() for _ in range(memory_iterations)]
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - before
+        memory_records = sum(_records(result) for result in kept)
+    finally:
+        tracemalloc.stop()
+        kept = None
+
+    latencies.sort()
+    return {
+        'calls': iterations,
+        'records': records,
+        'failed_calls': failed_calls,
+        'requests': requests,
+        'failed_requests': failed_requests,
+        'calls_per_second': iterations / elapsed,
+        'requests_per_second': requests / elapsed,
+        'latency_p50_ms': _percentile(latencies, 0.50) * 1000,
+        'latency_p99_ms': _percentile(latencies, 0.99) * 1000,
+        'latency_mean_ms': elapsed / iterations * 1000,
+        'cpu_per_page_ms': cpu / pages * 1000 if pages else None,
+        'cpu_per_record_us': cpu / records * 1e6 if records else None,
+        'memory_per_record_bytes': max(retained, 0) / memory_records if memory_records else None,
+    }
+
+
+def _revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Run the suite with the command line options.
+
+    Returns:
+        Dict[str, Any]: The results, keyed by scenario, with the environment and configuration.
+    """
+    dataset = Dataset({type: max(1, int(count * args.scale)) for type, count in Dataset().counts.items()})
+    results = {}
+    with MockServer(dataset, latency=args.latency, jitter=args.jitter, rate_limited=args.rate_limited,
+                    errors=args.errors, retry_after=args.retry_after) as server:
+        # Pacing would measure the rate limit instead of the client, and backoff the configured sleeps
+        client = LemonSqueezy(server.url, 'benchmark', rate_limit=None, models=args.models, codec=args.codec,
+                              retry_policy=RetryPolicy(max_retries=5, backoff_base=0.001, backoff_max=0.01))
+        try:
+            for scenario in scenarios(dataset, args.page_size, args.concurrency):
+                if args.only and scenario.name not in args.only:
+                    continue
+                results[scenario.name] = measure(client, server, scenario, args.iterations, args.warmup,
+                                                 args.memory_iterations)
+                _print_result(scenario.name, results[scenario.name])
+        finally:
+            client.session.close()
+
+    return {
+        'created_at': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'label': args.label,
+        'revision': _revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'codec': client.pipeline.codec.name,
+        'config': {
+            'iterations': args.iterations,
+            'warmup': args.warmup,
+            'scale': args.scale,
+            'page_size': args.page_size,
+            'concurrency': args.concurrency,
+            'models': args.models,
+            'latency': args.latency,
+            'jitter': args.jitter,
+            'rate_limited': args.rate_limited,
+            'errors': args.errors,
+            'retry_after': args.retry_after,
+        },
+        'results': results,
+    }
+
+
+def _print_result(name: str, result: Dict[str, Any]) -> None:
+    def number(value: Optional[float], format: str) -> str:
+        return '-' if value is None else format.format(value)
+
+    print(f'{name:<20} {result["requests_per_second"]:>9.0f} req/s'
+          f'  p50 {result["latency_p50_ms"]:>8.2f} ms  p99 {result["latency_p99_ms"]:>8.2f} ms'
+          f'  cpu/page {number(result["cpu_per_page_ms"], "{:>7.3f}")} ms'
+          f'  mem/record {number(result["memory_per_record_bytes"], "{:>7.0f}")} B', file=sys.stderr)
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.1) -> List[str]:
+    """
+    Compare two result files and list the regressions.
+
+    Args:
+        baseline (Dict[str, Any]): The earlier results.
+        current (Dict[str, Any]): The new results.
+        threshold (float, optional): The relative change counted as a regression, e.g. 0.1 for 10%.
+
+    Returns:
+        List[str]: A line per metric of a scenario that got worse by more than the threshold.
+    """
+    regressions = []
+    for name, result in current['results'].items():
+        previous = baseline['results'].get(name)
+        if previous is None:
+            continue
+        for metric in COMPARED:
+            old, new = previous.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            print(f'{name:<20} {metric:<24} {old:>12.3f} -> {new:>12.3f} {change:>+8.1%}', file=sys.stderr)
+            if worse > threshold:
+                regressions.append(f'{name} {metric}: {old:.3f} -> {new:.3f} ({change:+.1%})')
+    return regressions
+
+
+def main(argv=None) -> int:
+    """
+    Command line entry point, see the module docstring.
+    """
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run')
+    parser.add_argument('--output', help='Write the results as JSON to this file, or - for stdout.')
+    parser.add_argument('--compare', help='Compare the results against an earlier results file.')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='The relative change reported as a regression by --compare.')
+    parser.add_argument('--label', help='A name for this run stored in the results, e.g. the release.')
+    parser.add_argument('--only', nargs='+', metavar='SCENARIO', help='Only run these scenarios.')
+    parser.add_argument('--iterations', type=int, default=200, help='Calls timed per scenario.')
+    parser.add_argument('--warmup', type=int, default=10, help='Untimed calls made before timing.')
+    parser.add_argument('--memory-iterations', type=int, default=20, help='Calls made while tracing memory.')
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiplies the number of served resources.')
+    parser.add_argument('--page-size', type=int, default=100, help='The page size of the full scans.')
+    parser.add_argument('--concurrency', type=int, default=1, help='Pages prefetched by the full scans.')
+    parser.add_argument('--models', action='store_true', help='Decode resources into compact models.')
+    parser.add_argument('--codec', default='auto', choices=('auto', 'json', 'orjson', 'msgspec'))
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds every request is delayed by.')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Up to this many seconds of extra delay.')
+    parser.add_argument('--rate-limited', type=float, default=0.0, help='Fraction of requests answered with 429.')
+    parser.add_argument('--errors', type=float, default=0.0, help='Fraction of requests answered with 503.')
+    parser.add_argument('--retry-after', type=float, default=0.0, help='Retry-After of the 429 responses.')
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    if args.output == '-':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if baseline.get('config') != report['config']:
+            print('warning: the results were measured with different options', file=sys.stderr)
+        regressions = compare(baseline, report, args.threshold)
+        for regression in regressions:
+            print(f'regression: {regression}', file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
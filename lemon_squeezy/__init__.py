@@ -1,54 +1,91 @@
 import requests
-from typing import Dict
+from typing import Dict, Iterable, Optional, Tuple, Union
 from .variants import Variants
 from .checkout import Checkout
 from .subscription import Subscription
 from .customer import Customer
 from .product import Product
 from .order import Order
+from .async_client import AsyncLemonSqueezy
+from .codec import JSONCodec, MsgspecCodec, OrjsonCodec, get_codec
+from .document import BaseResource, Document, IdentityMap, ResourceObject, resolve_document
+from .exceptions import (APIError, AuthenticationError, LemonSqueezyError, NotFoundError, RateLimitError,
+                         ServerError, TransportError, ValidationError)
+from .pipeline import Middleware, Pipeline, Request, Response, credential_scope
+from .rate_limit import DEFAULT_RATE_LIMIT, DEFAULT_RATE_PERIOD, TokenBucket
+from .retry import RetryPolicy
+from .session import DEFAULT_POOL_MAXSIZE, DEFAULT_TIMEOUT, LemonSqueezySession
 
 class LemonSqueezy:
     """
     Main class for interacting with the API.
     """
     
-    def __init__(self, api_url: str, api_key: str):
+    def __init__(self, api_url: str, api_key: str, rate_limit: Optional[int] = DEFAULT_RATE_LIMIT,
+                 rate_period: float = DEFAULT_RATE_PERIOD,
+                 timeout: Optional[Union[float, Tuple[float, float]]] = DEFAULT_TIMEOUT,
+                 retry_policy: Optional[RetryPolicy] = None, pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 hedge_after: Optional[float] = None, middleware: Optional[Iterable[Middleware]] = None,
+                 models: bool = False, codec: Union[str, JSONCodec, None] = 'auto'):
         """
         Initialize a new instance of LemonSqueezy.
 
         Args:
             api_url (str): The URL of the API.
             api_key (str): The API key for authentication.
+            rate_limit (int, optional): The number of requests allowed per rate period, or None to disable pacing.
+            rate_period (float, optional): The length of the rate period in seconds.
+            timeout (float or Tuple[float, float], optional): The default (connect, read) timeout in seconds.
+            retry_policy (RetryPolicy, optional): The policy for retrying 5xx responses and connection errors.
+            pool_maxsize (int, optional): The maximum number of connections kept open to the API host.
+            hedge_after (float, optional): Seconds after which a slow GET is raced against a second request;
+                None disables hedging.
+            middleware (Iterable[Middleware], optional): Middleware to run on every request, outermost first.
+            models (bool, optional): Decode resources into compact models (see `lemon_squeezy.models`) instead of
+                plain dicts.
+            codec (str or JSONCodec, optional): The JSON codec: 'auto' for the fastest one installed, 'json',
+                'orjson', 'msgspec' or a JSONCodec instance.
         """
-        self.session = self._create_session(api_url, api_key)
+        self.rate_limiter = TokenBucket(rate_limit, rate_period) if rate_limit else None
+        self.timeout = timeout
+        self.retry_policy = retry_policy
+        self.pool_maxsize = pool_maxsize
+        self.hedge_after = hedge_after
+        self.session = self._create_session(api_key)
+        self.pipeline = Pipeline(self.session, api_url, middleware, codec, credential_scope(api_url, api_key))
 
-        # Pass the session instead of individual config parameters
-        self.variants = Variants(self.session)
-        self.checkout = Checkout(self.session)
-        self.subscription = Subscription(self.session)
-        self.customer = Customer(self.session)
-        self.product = Product(self.session)
-        self.order = Order(self.session)
+        # All resources send their requests through the shared pipeline
+        self.variants = Variants(self.pipeline, models)
+        self.checkout = Checkout(self.pipeline, models)
+        self.subscription = Subscription(self.pipeline, models)
+        self.customer = Customer(self.pipeline, models)
+        self.product = Product(self.pipeline, models)
+        self.order = Order(self.pipeline, models)
 
-    def _create_session(self, api_url: str, api_key: str) -> requests.Session:
+    def _create_session(self, api_key: str) -> requests.Session:
         """
         Create a new requests Session with the necessary headers and configs.
 
+        Every request sent through the session is paced by the client's rate limiter
+        and uses the client's timeout, retry and connection pool settings.
+
         Args:
-            api_url (str): The URL of the API.
             api_key (str): The API key for authentication.
 
         Returns:
             requests.Session: The created Session object.
         """
-        session = requests.Session()
+        session = LemonSqueezySession(
+            self.rate_limiter,
+            timeout=self.timeout,
+            retry_policy=self.retry_policy,
+            pool_maxsize=self.pool_maxsize,
+            hedge_after=self.hedge_after,
+        )
         session.headers.update({
             'Accept': 'application/vnd.api+json',
             'Content-Type': 'application/vnd.api+json',
             'Authorization': f'Bearer {api_key}'
         })
-        session.params.update({
-            'api_url': api_url,
-        })
 
         return session
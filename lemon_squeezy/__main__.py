@@ -0,0 +1,70 @@
+import argparse
+import os
+import sys
+from . import LemonSqueezy
+from .export import EXPORTS, FORMATS, ExportStats, export
+
+
+def _report(stats: ExportStats) -> None:
+    print(f'{stats.records} records, {stats.pages} pages, {stats.records_per_second:.0f} records/s',
+          file=sys.stderr)
+
+
+def main(argv=None) -> int:
+    """
+    Command line entry point, e.g. `python -m lemon_squeezy export orders orders.ndjson --store-id 1`.
+    """
+    parser = argparse.ArgumentParser(prog='python -m lemon_squeezy')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    parser_export = commands.add_parser('export', help='Export every resource of a type to a file.')
+    parser_export.add_argument('resource', choices=list(EXPORTS))
+    parser_export.add_argument('output', help='The output file, or directory for Parquet.')
+    parser_export.add_argument('--format', choices=FORMATS, default='ndjson')
+    parser_export.add_argument('--store-id', type=int, help='Only export resources of this store.')
+    parser_export.add_argument('--filter', action='append', default=[], metavar='NAME=VALUE',
+                               help='An additional list filter, e.g. status=active.')
+    parser_export.add_argument('--columns', help='Comma separated attributes to export.')
+    parser_export.add_argument('--page-size', type=int, default=100)
+    parser_export.add_argument('--concurrency', type=int, default=1)
+    parser_export.add_argument('--checkpoint', help='Checkpoint file to resume an interrupted export from.')
+    parser_export.add_argument('--checkpoint-every', type=int, default=10, help='Pages between checkpoints.')
+    parser_export.add_argument('--api-url', default=os.environ.get('LEMONSQUEEZY_API_URL',
+                                                                   'https://api.lemonsqueezy.com'))
+    parser_export.add_argument('--api-key', default=os.environ.get('LEMONSQUEEZY_API_KEY'),
+                               help='Defaults to the LEMONSQUEEZY_API_KEY environment variable.')
+    args = parser.parse_args(argv)
+
+    if not args.api_key:
+        parser.error('an API key is required, pass --api-key or set LEMONSQUEEZY_API_KEY')
+
+    filters = {}
+    for item in args.filter:
+        name, separator, value = item.partition('=')
+        if not separator or not name:
+            parser.error(f'invalid --filter {item!r}, expected NAME=VALUE')
+        filters[name] = value
+    if args.store_id:
+        filters['store_id'] = args.store_id
+
+    client = LemonSqueezy(args.api_url, args.api_key)
+    try:
+        stats = export(
+            client.pipeline, args.resource, args.output,
+            format=args.format,
+            filters=filters,
+            columns=args.columns.split(',') if args.columns else None,
+            page_size=args.page_size,
+            concurrency=args.concurrency,
+            checkpoint=args.checkpoint,
+            checkpoint_every=args.checkpoint_every,
+            on_progress=_report,
+        )
+    finally:
+        client.session.close()
+    _report(stats)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,529 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from .document import fields_params
+from .pagination import iter_resources
+from .pipeline import Pipeline
+
+try:
+    import numpy
+except ImportError:  # numpy is only needed for analytics
+    numpy = None
+
+# Rows converted to arrays at once while loading, bounding the memory held in Python objects
+CHUNK_SIZE = 65536
+
+# Statuses of orders that were paid, even if refunded later
+PAID_STATUSES = ('paid', 'partial_refund', 'refunded')
+
+# Billing periods per month, for each variant interval
+_PERIODS_PER_MONTH = {'day': 365 / 12, 'week': 52 / 12, 'month': 1.0, 'year': 1 / 12}
+
+Frame = Dict[str, Any]
+
+
+def _require_numpy() -> None:
+    if numpy is None:
+        raise ImportError('Analytics require the numpy package')
+
+
+class Categorical:
+    """
+    A column of repeated values stored as integer codes into the distinct values.
+    """
+
+    __slots__ = ('codes', 'categories')
+
+    def __init__(self, codes: Any, categories: List[Any]):
+        """
+        Initialize a new instance of Categorical.
+
+        Args:
+            codes (numpy.ndarray): The int32 index of every row's value in `categories`.
+            categories (List): The distinct values.
+        """
+        self.codes = codes
+        self.categories = categories
+
+    def mask(self, *values: Any) -> Any:
+        """
+        Select the rows holding any of the given values.
+
+        Args:
+            *values (Any): The values.
+
+        Returns:
+            numpy.ndarray: A boolean array, True for the matching rows.
+        """
+        index = {value: code for code, value in enumerate(self.categories)}
+        return numpy.isin(self.codes, [index[value] for value in values if value in index])
+
+    def values(self) -> Any:
+        """
+        Decode the column.
+
+        Returns:
+            numpy.ndarray: The value of every row, as an object array.
+        """
+        return self.labels()[self.codes]
+
+    def labels(self) -> Any:
+        labels = numpy.empty(len(self.categories), dtype=object)
+        labels[:] = self.categories
+        return labels
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __repr__(self) -> str:
+        return f'<Categorical {len(self.codes)} rows, {len(self.categories)} categories>'
+
+
+def _attribute(name: str) -> Callable[[Dict, Dict], Any]:
+    return lambda resource, attributes: attributes.get(name)
+
+
+def _first_item(name: str) -> Callable[[Dict, Dict], Any]:
+    return lambda resource, attributes: (attributes.get('first_order_item') or {}).get(name)
+
+
+def _id(resource: Dict, attributes: Dict) -> Any:
+    return int(resource['id'])
+
+
+def _convert(kind: str, values: List[Any]) -> Any:
+    if kind == 'int' or kind == 'category':
+        return numpy.array([0 if value is None else value for value in values],
+                           dtype=numpy.int32 if kind == 'category' else numpy.int64)
+    if kind == 'time':
+        # Seconds precision; 'NaT' for missing timestamps
+        return numpy.array([value[:19] if value else 'NaT' for value in values], dtype='datetime64[s]')
+    if kind == 'bool':
+        return numpy.array(values, dtype=bool)
+    return numpy.array(values, dtype=numpy.float64)
+
+
+class _ColumnBuilder:
+    # Collects rows in lists and turns them into arrays every CHUNK_SIZE rows
+
+    def __init__(self, spec: Tuple[Tuple[str, str, Callable[[Dict, Dict], Any]], ...]):
+        self.spec = spec
+        self.pending: Dict[str, List[Any]] = {name: [] for name, _, _ in spec}
+        self.chunks: Dict[str, List[Any]] = {name: [] for name, _, _ in spec}
+        self.categories: Dict[str, Dict[Any, int]] = {name: {} for name, kind, _ in spec if kind == 'category'}
+        self.size = 0
+
+    def add(self, resource: Dict) -> None:
+        attributes = resource.get('attributes') or {}
+        pending = self.pending
+        categories = self.categories
+        for name, kind, get in self.spec:
+            value = get(resource, attributes)
+            if kind == 'category':
+                index = categories[name]
+                code = index.get(value)
+                if code is None:
+                    code = index[value] = len(index)
+                value = code
+            pending[name].append(value)
+        self.size += 1
+        if self.size % CHUNK_SIZE == 0:
+            self._flush()
+
+    def _flush(self) -> None:
+        for name, kind, _ in self.spec:
+            if self.pending[name]:
+                self.chunks[name].append(_convert(kind, self.pending[name]))
+                self.pending[name] = []
+
+    def finish(self) -> Dict[str, Any]:
+        self._flush()
+        columns = {}
+        for name, kind, _ in self.spec:
+            chunks = self.chunks[name]
+            column = numpy.concatenate(chunks) if chunks else _convert(kind, [])
+            if kind == 'category':
+                column = Categorical(column, list(self.categories[name]))
+            columns[name] = column
+        return columns
+
+
+def month_numbers(times: Any) -> Any:
+    """
+    Convert timestamps to months since January 1970.
+
+    Casting to `datetime64[M]` is slow, so days are mapped to months through a
+    lookup table covering the range of the column.
+
+    Args:
+        times (numpy.ndarray): The datetime64 column.
+
+    Returns:
+        numpy.ndarray: The int64 month of every row; undefined where the timestamp is NaT.
+    """
+    days = times.astype('datetime64[D]').astype(numpy.int64)
+    valid = days[~numpy.isnat(times)]
+    if not len(valid):
+        return numpy.zeros(len(times), dtype=numpy.int64)
+    first, last = valid.min(), valid.max()
+    table = numpy.arange(first, last + 1).astype('datetime64[D]').astype('datetime64[M]').astype(numpy.int64)
+    return table[numpy.clip(days - first, 0, last - first)]
+
+
+def _month_key(months: Any) -> Tuple[Any, Any]:
+    # Codes counting from the first month, and the month of every code
+    first = months.min() if len(months) else 0
+    return months - first, numpy.arange(first, months.max() + 1 if len(months) else 0).astype('datetime64[M]')
+
+
+def _group_by(keys: List[Tuple[str, Any, Any]], mask: Any, sums: Dict[str, Any]) -> Frame:
+    """
+    Sum columns per distinct combination of keys.
+
+    Args:
+        keys (List[Tuple[str, numpy.ndarray, numpy.ndarray]]): The name, the integer codes and the label of
+            every code for each key.
+        mask (numpy.ndarray): The rows to include.
+        sums (Dict[str, numpy.ndarray]): The columns to sum, by output name.
+
+    Returns:
+        Frame: The key labels, the number of rows `count` and the sums of every group, as equally long arrays.
+    """
+    space = 1
+    for _, _, labels in keys:
+        space *= len(labels)
+    dense = space <= max(len(mask), 1 << 16)
+
+    combined = numpy.zeros(len(mask) if dense else int(mask.sum()), dtype=numpy.int64)
+    for _, codes, labels in keys:
+        combined = combined * len(labels) + (codes if dense else codes[mask])
+    if dense:
+        # Few possible groups: count every one, with the excluded rows in an extra last bin, instead of sorting
+        combined[~mask] = space
+        groups = numpy.flatnonzero(numpy.bincount(combined, minlength=space + 1)[:space])
+        index, rows = combined, slice(None)
+    else:
+        groups, index = numpy.unique(combined, return_inverse=True)
+        rows = mask
+
+    def total(weights=None):
+        totals = numpy.bincount(index, weights=weights, minlength=space + 1 if dense else len(groups))
+        return totals[groups] if dense else totals
+
+    frame = {}
+    remainder = groups
+    for name, _, labels in reversed(keys):
+        remainder, codes = numpy.divmod(remainder, len(labels))
+        frame[name] = labels[codes]
+    frame = dict(reversed(list(frame.items())))
+    frame['count'] = total()
+    for name, column in sums.items():
+        totals = total(column[rows])
+        frame[name] = totals.round().astype(numpy.int64) if column.dtype.kind in 'iu' else totals
+    return frame
+
+
+class Columns:
+    """
+    Base class of the column tables: one NumPy array or Categorical per field, one row per resource.
+    """
+
+    # The list endpoint, the resource type and the attributes requested as a sparse fieldset
+    path = ''
+    type = ''
+    fields: Tuple[str, ...] = ()
+    # (name, kind, getter) of every column; kind is 'int', 'float', 'bool', 'time' or 'category'
+    spec: Tuple[Tuple[str, str, Callable[[Dict, Dict], Any]], ...] = ()
+
+    def __init__(self, columns: Dict[str, Any]):
+        """
+        Initialize a new table from its columns.
+
+        Args:
+            columns (Dict[str, Any]): The arrays and Categoricals, keyed by name.
+        """
+        _require_numpy()
+        self.columns = columns
+        for name, column in columns.items():
+            setattr(self, name, column)
+        # Derived columns, computed on first use; tables are not modified after loading
+        self._derived: Dict[str, Any] = {}
+
+    def months(self, name: str) -> Any:
+        """
+        Return a timestamp column as months since January 1970, see `month_numbers`.
+
+        Args:
+            name (str): The name of the column, e.g. 'created_at'.
+
+        Returns:
+            numpy.ndarray: The int64 month of every row.
+        """
+        months = self._derived.get(name)
+        if months is None:
+            months = self._derived[name] = month_numbers(self.columns[name])
+        return months
+
+    @classmethod
+    def from_resources(cls, resources: Iterable[Dict]) -> 'Columns':
+        """
+        Build a table from resource objects, e.g. a stream from `iter_orders`.
+
+        Args:
+            resources (Iterable[Dict]): The resource objects.
+
+        Returns:
+            Columns: The table.
+        """
+        _require_numpy()
+        builder = _ColumnBuilder(cls.spec)
+        for resource in resources:
+            builder.add(resource)
+        return cls(builder.finish())
+
+    @classmethod
+    def load(cls, pipeline: Pipeline, store_id: Optional[int] = None, page_size: int = 100,
+             concurrency: int = 4) -> 'Columns':
+        """
+        Stream every resource of the type from the API into a table.
+
+        Only the attributes the table uses are requested, and pages are
+        fetched concurrently.
+
+        Args:
+            pipeline (Pipeline): The pipeline to send requests through, e.g. `LemonSqueezy(...).pipeline`.
+            store_id (int, optional): Only load the resources of this store.
+            page_size (int, optional): The number of resources per page.
+            concurrency (int, optional): The number of pages fetched concurrently.
+
+        Returns:
+            Columns: The table.
+        """
+        params = fields_params({cls.type: cls.fields})
+        if store_id is not None:
+            params['filter[store_id]'] = store_id
+        return cls.from_resources(iter_resources(pipeline, cls.path, params, page_size, concurrency))
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    def __repr__(self) -> str:
+        return f'<{type(self).__name__} {len(self)} rows>'
+
+
+class OrderColumns(Columns):
+    """
+    Orders as columns, for revenue and refund aggregations.
+
+    Amounts are integer cents, in the order's currency or, for the `_usd`
+    columns, in USD. The variant and product are those of the first order item.
+    """
+
+    path = '/v1/orders'
+    type = 'orders'
+    fields = ('customer_id', 'status', 'currency', 'total', 'total_usd', 'refunded_amount', 'refunded_amount_usd',
+              'first_order_item', 'created_at')
+    spec = (
+        ('id', 'int', _id),
+        ('customer_id', 'int', _attribute('customer_id')),
+        ('status', 'category', _attribute('status')),
+        ('currency', 'category', _attribute('currency')),
+        ('variant', 'category', _first_item('variant_id')),
+        ('product', 'category', _first_item('product_id')),
+        ('total', 'int', _attribute('total')),
+        ('total_usd', 'int', _attribute('total_usd')),
+        ('refunded_amount', 'int', _attribute('refunded_amount')),
+        ('refunded_amount_usd', 'int', _attribute('refunded_amount_usd')),
+        ('created_at', 'time', _attribute('created_at')),
+    )
+
+    def paid(self) -> Any:
+        """
+        Select the orders that were paid, including those refunded since.
+
+        Returns:
+            numpy.ndarray: A boolean array.
+        """
+        return self.status.mask(*PAID_STATUSES)
+
+    def _revenue(self, usd: bool) -> Dict[str, Any]:
+        gross = self.total_usd if usd else self.total
+        refunded = self.refunded_amount_usd if usd else self.refunded_amount
+        return {'gross': gross, 'refunded': refunded, 'net': gross - refunded}
+
+    def revenue_by_month(self, usd: bool = True) -> Frame:
+        """
+        Sum the revenue of the paid orders per month of purchase.
+
+        Args:
+            usd (bool, optional): Sum the USD amounts, otherwise the amounts in each order's currency.
+
+        Returns:
+            Frame: `month`, `count`, `gross`, `refunded` and `net` arrays, one entry per month with orders.
+        """
+        codes, labels = _month_key(self.months('created_at'))
+        return _group_by([('month', codes, labels)], self.paid(), self._revenue(usd))
+
+    def revenue_by_variant_currency(self) -> Frame:
+        """
+        Sum the revenue of the paid orders per variant and currency, in that currency.
+
+        Returns:
+            Frame: `variant`, `currency`, `count`, `gross`, `refunded` and `net` arrays.
+        """
+        keys = [('variant', self.variant.codes, self.variant.labels()),
+                ('currency', self.currency.codes, self.currency.labels())]
+        return _group_by(keys, self.paid(), self._revenue(False))
+
+
+class SubscriptionColumns(Columns):
+    """
+    Subscriptions as columns, for MRR, churn and retention.
+
+    A subscription counts from the end of its trial, or its creation, until
+    `ends_at`; one without `ends_at` is still running. Monthly figures are
+    taken at the end of each month.
+    """
+
+    path = '/v1/subscriptions'
+    type = 'subscriptions'
+    fields = ('customer_id', 'status', 'variant_id', 'product_id', 'created_at', 'trial_ends_at', 'renews_at',
+              'ends_at')
+    spec = (
+        ('id', 'int', _id),
+        ('customer_id', 'int', _attribute('customer_id')),
+        ('status', 'category', _attribute('status')),
+        ('variant', 'category', _attribute('variant_id')),
+        ('product', 'category', _attribute('product_id')),
+        ('created_at', 'time', _attribute('created_at')),
+        ('trial_ends_at', 'time', _attribute('trial_ends_at')),
+        ('renews_at', 'time', _attribute('renews_at')),
+        ('ends_at', 'time', _attribute('ends_at')),
+    )
+
+    def mrr(self, prices: Dict[str, float]) -> Any:
+        """
+        Return the monthly recurring revenue of every subscription.
+
+        Args:
+            prices (Dict[str, float]): The monthly price in cents per variant ID, see `monthly_prices`.
+
+        Returns:
+            numpy.ndarray: The MRR in cents, 0 for variants without a price.
+        """
+        per_variant = numpy.array([prices.get(str(variant), 0.0) for variant in self.variant.categories],
+                                  dtype=numpy.float64)
+        return per_variant[self.variant.codes] if len(per_variant) else numpy.zeros(len(self))
+
+    def _spans(self) -> Tuple[Any, Any]:
+        # The month every subscription starts counting and the month it ends in, computed once per table
+        spans = self._derived.get('spans')
+        if spans is None:
+            started = numpy.where(numpy.isnat(self.trial_ends_at), self.created_at,
+                                  numpy.maximum(self.created_at, self.trial_ends_at))
+            end = numpy.where(numpy.isnat(self.ends_at), numpy.iinfo(numpy.int64).max, self.months('ends_at'))
+            spans = self._derived['spans'] = (month_numbers(started), end)
+        return spans
+
+    def _months(self, until: Optional[str]) -> Tuple[Any, Any, Any]:
+        # The first and last month (exclusive) of every subscription, and the months reported
+        start, end = self._spans()
+        last = numpy.datetime64(until or 'now', 'M').astype(numpy.int64)
+        first = start.min(initial=last, where=start <= last)
+        return start, numpy.minimum(end, last + 1), numpy.arange(first, last + 1)
+
+    def mrr_by_month(self, prices: Dict[str, float], until: Optional[str] = None) -> Frame:
+        """
+        Compute the MRR and the number of running subscriptions at the end of every month.
+
+        Args:
+            prices (Dict[str, float]): The monthly price in cents per variant ID, see `monthly_prices`.
+            until (str, optional): The last month, e.g. '2024-06'; the current month by default.
+
+        Returns:
+            Frame: `month`, `active` and `mrr` arrays, one entry per month since the first subscription.
+        """
+        start, end, months = self._months(until)
+        first = months[0] if len(months) else 0
+        size = len(months) + 1
+        # Each subscription adds from its first month and is removed again from its end month
+        running = (start < end)
+        starts = numpy.clip(start[running] - first, 0, size - 1)
+        ends = numpy.clip(end[running] - first, 0, size - 1)
+        mrr = self.mrr(prices)[running]
+        active = numpy.cumsum(numpy.bincount(starts, minlength=size) - numpy.bincount(ends, minlength=size))
+        total = numpy.cumsum(numpy.bincount(starts, weights=mrr, minlength=size)
+                             - numpy.bincount(ends, weights=mrr, minlength=size))
+        return {'month': months.astype('datetime64[M]'), 'active': active[:-1], 'mrr': total[:-1]}
+
+    def churn_by_month(self, until: Optional[str] = None) -> Frame:
+        """
+        Compute the share of the subscriptions running at the start of every month that ended during it.
+
+        Args:
+            until (str, optional): The last month, e.g. '2024-06'; the current month by default.
+
+        Returns:
+            Frame: `month`, `active` (at the start of the month), `churned` and `rate` arrays.
+        """
+        start, end, months = self._months(until)
+        first = months[0] if len(months) else 0
+        size = len(months) + 1
+        running = (start < end)
+        starts = numpy.clip(start[running] - first, 0, size - 1)
+        ends = numpy.clip(end[running] - first, 0, size - 1)
+        ended = numpy.bincount(ends, minlength=size)
+        # Running at the end of the previous month
+        active = numpy.concatenate(([0], numpy.cumsum(numpy.bincount(starts, minlength=size) - ended)[:-2]))
+        # The last bin holds the subscriptions still running after `until`
+        churned = ended[:-1]
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            rate = numpy.where(active > 0, churned / numpy.maximum(active, 1), numpy.nan)
+        return {'month': months.astype('datetime64[M]'), 'active': active, 'churned': churned, 'rate': rate}
+
+    def cohort_retention(self, max_age: int = 12, until: Optional[str] = None) -> Frame:
+        """
+        Compute the share of every monthly cohort still subscribed after each number of months.
+
+        Args:
+            max_age (int, optional): The oldest age reported, in months.
+            until (str, optional): The last month, e.g. '2024-06'; the current month by default.
+
+        Returns:
+            Frame: `cohort` (the month subscriptions started), `size` and `retention`, a (cohorts, max_age + 1)
+                array of shares; ages past `until` are NaN.
+        """
+        start, end, months = self._months(until)
+        first = months[0] if len(months) else 0
+        begun = start < first + len(months)
+        cohorts = start[begun] - first
+        # Full months a subscription was running at the end of, capped at max_age + 1
+        lifetime = numpy.clip(end[begun] - start[begun], 0, max_age + 1)
+        counts = numpy.bincount(cohorts * (max_age + 2) + lifetime, minlength=len(months) * (max_age + 2))
+        counts = counts.reshape(len(months), max_age + 2)
+        size = counts.sum(axis=1)
+        # Retained at age k: running for more than k months
+        retained = size[:, None] - numpy.cumsum(counts, axis=1)[:, :max_age + 1]
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            retention = retained / size[:, None]
+        ages = numpy.arange(max_age + 1)
+        retention[numpy.arange(len(months))[:, None] + ages[None, :] >= len(months)] = numpy.nan
+        return {'cohort': months.astype('datetime64[M]'), 'size': size, 'retention': retention}
+
+
+def monthly_prices(variants: Iterable[Dict]) -> Dict[str, float]:
+    """
+    Build the monthly price of every subscription variant, for the MRR.
+
+    Args:
+        variants (Iterable[Dict]): Variant resource objects, e.g. from `iter_variants` or a Catalog.
+
+    Returns:
+        Dict[str, float]: The monthly price in cents per variant ID.
+    """
+    prices = {}
+    for variant in variants:
+        attributes = variant['attributes']
+        if not attributes.get('is_subscription'):
+            continue
+        periods = _PERIODS_PER_MONTH.get(attributes.get('interval'), 1.0) / (attributes.get('interval_count') or 1)
+        prices[str(variant['id'])] = (attributes.get('price') or 0) * periods
+    return prices
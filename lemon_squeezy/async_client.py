@@ -0,0 +1,380 @@
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional, Tuple, Union
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp is only needed for the async client
+    aiohttp = None
+
+from .bulk import BulkProgress, BulkReport, arun_bulk
+from .checkout import Checkout
+from .checkout_template import CheckoutTemplate
+from .codec import JSONCodec
+from .customer import Customer
+from .exceptions import TransportError
+from .order import Order
+from .pagination import aiter_resources
+from .pipeline import Middleware, Pipeline, Request, Response, credential_scope
+from .product import Product
+from .rate_limit import DEFAULT_RATE_LIMIT, DEFAULT_RATE_PERIOD, TokenBucket, parse_retry_after
+from .retry import RetryPolicy
+from .resource import Resource
+from .session import DEFAULT_TIMEOUT
+from .subscription import Subscription
+from .variants import Variants
+
+
+class AsyncLemonSqueezy:
+    """
+    Asyncio counterpart of LemonSqueezy.
+
+    All resources share a single aiohttp connection pool, so many calls can be
+    awaited concurrently (e.g. with asyncio.gather) from one event loop. The
+    resources have the same methods as the sync ones: calls return awaitables
+    and the iter_* methods return async iterators.
+    """
+
+    def __init__(self, api_url: str, api_key: str, limit: int = 100, limit_per_host: int = 0,
+                 keepalive_timeout: float = 15.0, rate_limit: Optional[int] = DEFAULT_RATE_LIMIT,
+                 rate_period: float = DEFAULT_RATE_PERIOD, max_rate_limit_retries: int = 5,
+                 timeout: Optional[Union[float, Tuple[float, float]]] = DEFAULT_TIMEOUT,
+                 retry_policy: Optional[RetryPolicy] = None, hedge_after: Optional[float] = None,
+                 middleware: Optional[Iterable[Middleware]] = None, models: bool = False,
+                 codec: Union[str, JSONCodec, None] = 'auto'):
+        """
+        Initialize a new instance of AsyncLemonSqueezy.
+
+        Args:
+            api_url (str): The URL of the API.
+            api_key (str): The API key for authentication.
+            limit (int, optional): Maximum number of open connections in the pool.
+            limit_per_host (int, optional): Maximum number of connections per host, 0 for no limit.
+            keepalive_timeout (float, optional): Seconds an idle connection is kept alive.
+            rate_limit (int, optional): The number of requests allowed per rate period, or None to disable pacing.
+            rate_period (float, optional): The length of the rate period in seconds.
+            max_rate_limit_retries (int, optional): How many times a 429 response is retried.
+            timeout (float or Tuple[float, float], optional): The (connect, read) timeout in seconds.
+            retry_policy (RetryPolicy, optional): The policy for retrying 5xx responses and connection errors.
+            hedge_after (float, optional): Seconds after which a slow GET is raced against a second request;
+                None disables hedging.
+            middleware (Iterable[Middleware], optional): Async middleware to run on every request, outermost first.
+            models (bool, optional): Decode resources into compact models instead of plain dicts.
+            codec (str or JSONCodec, optional): The JSON codec: 'auto' for the fastest one installed, 'json',
+                'orjson', 'msgspec' or a JSONCodec instance.
+        """
+        if aiohttp is None:
+            raise ImportError('AsyncLemonSqueezy requires the aiohttp package')
+
+        self.api_url = api_url.rstrip('/')
+        self.api_key = api_key
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.rate_limiter = TokenBucket(rate_limit, rate_period) if rate_limit else None
+        self.max_rate_limit_retries = max_rate_limit_retries
+        self.timeout = timeout
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.hedge_after = hedge_after
+        # Called with the method, URL and reason of every retry, see LemonSqueezySession.on_retry
+        self.on_retry: Optional[Callable[[str, str, str], None]] = None
+        self.session = None
+        self.pipeline = AsyncPipeline(self, self.api_url, middleware, codec, credential_scope(self.api_url, api_key))
+
+        self.variants = AsyncVariants(self.pipeline, models)
+        self.checkout = AsyncCheckout(self.pipeline, models)
+        self.subscription = AsyncSubscription(self.pipeline, models)
+        self.customer = AsyncCustomer(self.pipeline, models)
+        self.product = AsyncProduct(self.pipeline, models)
+        self.order = AsyncOrder(self.pipeline, models)
+
+    async def __aenter__(self) -> 'AsyncLemonSqueezy':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def _create_session(self) -> 'aiohttp.ClientSession':
+        """
+        Create a new aiohttp ClientSession with the necessary headers and pool limits.
+
+        The session has to be created from inside a running event loop, so this
+        is deferred until the first request.
+
+        Returns:
+            aiohttp.ClientSession: The created ClientSession object.
+        """
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        if isinstance(self.timeout, tuple):
+            timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout[0], sock_read=self.timeout[1])
+        else:
+            timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout)
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            headers={
+                'Accept': 'application/vnd.api+json',
+                'Content-Type': 'application/vnd.api+json',
+                'Authorization': f'Bearer {self.api_key}'
+            },
+        )
+
+    async def close(self) -> None:
+        """
+        Close the underlying connection pool.
+        """
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _send(self, method: str, url: str, **kwargs) -> 'aiohttp.ClientResponse':
+        """
+        Send a request once the rate limiter allows it, retrying 429 responses and transient failures.
+
+        Args:
+            method (str): The HTTP method.
+            url (str): The absolute URL.
+            **kwargs: Passed on to aiohttp.ClientSession.request.
+
+        Returns:
+            aiohttp.ClientResponse: The response of the last attempt, which the caller must release.
+        """
+        if self.session is None:
+            self.session = self._create_session()
+
+        rate_limited = 0
+        attempt = 0
+        while True:
+            try:
+                if self.hedge_after is not None and method.upper() == 'GET':
+                    response = await self._send_hedged(method, url, **kwargs)
+                else:
+                    response = await self._send_once(method, url, **kwargs)
+            except aiohttp.ClientConnectorError:
+                # The request never reached the server, so any method can be retried
+                if attempt >= self.retry_policy.max_retries:
+                    raise
+                await asyncio.sleep(self.retry_policy.backoff(attempt))
+                if self.on_retry is not None:
+                    self.on_retry(method, url, 'connect')
+                attempt += 1
+                continue
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if not self.retry_policy.can_retry(method, attempt):
+                    raise
+                await asyncio.sleep(self.retry_policy.backoff(attempt))
+                if self.on_retry is not None:
+                    self.on_retry(method, url, 'connection')
+                attempt += 1
+                continue
+
+            if response.status == 429 and rate_limited < self.max_rate_limit_retries:
+                response.release()
+                retry_after = parse_retry_after(response.headers)
+                if retry_after is None:
+                    retry_after = 2 ** rate_limited
+                if self.rate_limiter is not None:
+                    self.rate_limiter.pause(retry_after)
+                else:
+                    await asyncio.sleep(retry_after)
+                if self.on_retry is not None:
+                    self.on_retry(method, url, 'rate_limited')
+                rate_limited += 1
+                continue
+
+            if self.retry_policy.should_retry_status(method, response.status, attempt):
+                response.release()
+                retry_after = parse_retry_after(response.headers)
+                await asyncio.sleep(retry_after if retry_after is not None else self.retry_policy.backoff(attempt))
+                if self.on_retry is not None:
+                    self.on_retry(method, url, 'status')
+                attempt += 1
+                continue
+
+            return response
+
+    async def _send_once(self, method: str, url: str, **kwargs) -> 'aiohttp.ClientResponse':
+        if self.rate_limiter is not None:
+            delay = self.rate_limiter.reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        return await self._transmit(method, url, **kwargs)
+
+    async def _transmit(self, method: str, url: str, **kwargs) -> 'aiohttp.ClientResponse':
+        response = await self.session.request(method, url, **kwargs)
+        if self.rate_limiter is not None:
+            self.rate_limiter.sync(response.headers)
+        return response
+
+    async def _send_hedged(self, method: str, url: str, **kwargs) -> 'aiohttp.ClientResponse':
+        """
+        Send a request and, if it is still pending after `hedge_after`, race it against a second one.
+
+        As in LemonSqueezySession, the timer starts once the first request has
+        its token and the second request is only sent if a token is available
+        right away.
+
+        Returns:
+            aiohttp.ClientResponse: The first successful response; the other request is cancelled.
+        """
+        if self.rate_limiter is not None:
+            delay = self.rate_limiter.reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        primary = asyncio.ensure_future(self._transmit(method, url, **kwargs))
+        done, _ = await asyncio.wait({primary}, timeout=self.hedge_after)
+        if done:
+            return primary.result()
+        if self.rate_limiter is not None and not self.rate_limiter.try_acquire():
+            return await primary
+
+        pending = {primary, asyncio.ensure_future(self._transmit(method, url, **kwargs))}
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winner = None
+            for task in done:
+                if task.exception() is not None:
+                    error = task.exception()
+                elif winner is None:
+                    winner = task.result()
+                else:
+                    task.result().release()
+            if winner is not None:
+                for task in pending:
+                    task.cancel()
+                return winner
+        raise error
+
+
+class AsyncPipeline(Pipeline):
+    """
+    Pipeline whose middleware and transport are coroutines, sending requests on the client's connection pool.
+    """
+
+    def __init__(self, client: AsyncLemonSqueezy, base_url: str, middleware: Optional[Iterable[Middleware]] = None,
+                 codec: Union[str, JSONCodec, None] = None, scope: Optional[str] = None):
+        """
+        Initialize a new instance of AsyncPipeline.
+
+        Args:
+            client (AsyncLemonSqueezy): The client whose connection pool is used for making requests.
+            base_url (str): The URL of the API.
+            middleware (Iterable[Middleware], optional): The async middleware to run, outermost first.
+            codec (str or JSONCodec, optional): The JSON codec, see `get_codec`.
+            scope (str, optional): Identifies the API and credential of the requests, see `credential_scope`.
+        """
+        super().__init__(None, base_url, middleware, codec, scope)
+        self.client = client
+
+    async def request(self, request: Request) -> Any:
+        """
+        Run a request through the middleware chain and decode the response.
+
+        Args:
+            request (Request): The request.
+
+        Returns:
+            Any: The decoded JSON response, passed through the request's parse function if it has one.
+
+        Raises:
+            APIError: If the API answered with an error status code.
+            TransportError: If the request could not be completed.
+        """
+        return self.result(request, await self.send(request))
+
+    async def _transport(self, request: Request) -> Response:
+        body = self.encode(request)
+        if body is not None:
+            request.context['request_bytes'] = len(body)
+        try:
+            async with await self.client._send(
+                request.method,
+                self.url_for(request),
+                params=request.params or None,
+                data=body,
+                headers=request.headers or None,
+            ) as response:
+                content = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise TransportError(str(e)) from e
+        return Response(response.status, response.headers, content, str(response.url), self.codec)
+
+
+class AsyncResource(Resource):
+    """
+    Base class for the async resource classes, whose iterators are async iterators.
+    """
+
+    def _iter(self, path: str, params: Optional[Dict] = None, page_size: Optional[int] = None,
+              concurrency: int = 1, include: Optional[Iterable[str]] = None,
+              fields: Optional[Dict[str, Iterable[str]]] = None) -> AsyncIterator[Dict]:
+        params, parse = self._query(params, include, fields)
+        return aiter_resources(self.pipeline, path, params, page_size, concurrency, parse)
+
+
+class AsyncVariants(AsyncResource, Variants):
+    """
+    Async class for interacting with the 'variants' part of the API.
+    """
+
+
+class AsyncCheckout(AsyncResource, Checkout):
+    """
+    Async class for interacting with the 'checkout' part of the API.
+    """
+
+    async def create_checkouts(self, template: CheckoutTemplate, checkout_data: Iterable[Optional[Dict]],
+                               concurrency: int = 8, retry_policy: Optional[RetryPolicy] = None,
+                               on_progress: Optional[Callable[[BulkProgress], None]] = None) -> BulkReport:
+        """
+        Create many checkouts from a template as concurrent tasks, see Checkout.create_checkouts.
+        """
+        checkout_data = list(checkout_data)
+        return await arun_bulk(lambda index: self.create_checkout_from_template(template, checkout_data[index]),
+                               range(len(checkout_data)), concurrency, retry_policy, on_progress,
+                               collect_results=True)
+
+
+class AsyncSubscription(AsyncResource, Subscription):
+    """
+    Async class for interacting with the 'subscription' part of the API.
+    """
+
+    async def bulk_update_subscriptions(self, updates: Dict[Any, Dict], concurrency: int = 8,
+                                        retry_policy: Optional[RetryPolicy] = None,
+                                        on_progress: Optional[Callable[[BulkProgress], None]] = None) -> BulkReport:
+        """
+        Update many subscriptions as concurrent tasks, see Subscription.bulk_update_subscriptions.
+        """
+        return await arun_bulk(lambda id: self.update_subscription(id, self._update_payload(id, updates[id])),
+                               updates, concurrency, retry_policy, on_progress)
+
+    async def bulk_cancel_subscriptions(self, subscription_ids: Iterable[Any], concurrency: int = 8,
+                                        retry_policy: Optional[RetryPolicy] = None,
+                                        on_progress: Optional[Callable[[BulkProgress], None]] = None) -> BulkReport:
+        """
+        Cancel many subscriptions as concurrent tasks, see Subscription.bulk_cancel_subscriptions.
+        """
+        return await arun_bulk(self.delete_subscription, subscription_ids, concurrency, retry_policy, on_progress)
+
+
+class AsyncCustomer(AsyncResource, Customer):
+    """
+    Async class for interacting with the customer part of the API.
+    """
+
+
+class AsyncProduct(AsyncResource, Product):
+    """
+    Async class for interacting with the 'product' part of the API.
+    """
+
+
+class AsyncOrder(AsyncResource, Order):
+    """
+    Async class for interacting with the 'order' part of the API.
+    """
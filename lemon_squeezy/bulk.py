@@ -0,0 +1,202 @@
+import asyncio
+import itertools
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+from .exceptions import LemonSqueezyError, RateLimitError, ServerError, TransportError
+from .retry import RetryPolicy
+
+# Failures that may succeed when the operation is sent again
+RETRYABLE_ERRORS = (TransportError, RateLimitError, ServerError)
+
+
+class BulkFailure:
+    """
+    An operation of a bulk run that failed.
+    """
+
+    __slots__ = ('key', 'error', 'retryable')
+
+    def __init__(self, key: Any, error: Exception):
+        self.key = key
+        self.error = error
+        self.retryable = isinstance(error, RETRYABLE_ERRORS)
+
+    def __repr__(self) -> str:
+        return f'<BulkFailure {self.key}: {self.error!r}>'
+
+
+class BulkProgress:
+    """
+    A progress event, emitted after every finished operation.
+    """
+
+    __slots__ = ('done', 'total', 'succeeded', 'failed', 'key', 'error')
+
+    def __init__(self, done: int, total: int, succeeded: int, failed: int, key: Any,
+                 error: Optional[Exception] = None):
+        self.done = done
+        self.total = total
+        self.succeeded = succeeded
+        self.failed = failed
+        self.key = key
+        self.error = error
+
+    def __repr__(self) -> str:
+        return f'<BulkProgress {self.done}/{self.total} failed={self.failed}>'
+
+
+class BulkReport:
+    """
+    The outcome of a bulk run: the keys that succeeded and the failures.
+    """
+
+    def __init__(self, total: int, collect_results: bool = False):
+        self.total = total
+        self.succeeded: List[Any] = []
+        self.failed: List[BulkFailure] = []
+        # The return value of every successful operation, keyed by key, if collected
+        self.results: Optional[Dict[Any, Any]] = {} if collect_results else None
+        self.started_at = time.monotonic()
+        self.elapsed = 0.0
+
+    @property
+    def retryable(self) -> List[Any]:
+        """
+        The keys whose operations failed with an error that may go away, to pass to another run.
+        """
+        return [failure.key for failure in self.failed if failure.retryable]
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+    def _record(self, key: Any, error: Optional[Exception], result: Any = None) -> BulkProgress:
+        if error is None:
+            self.succeeded.append(key)
+            if self.results is not None:
+                self.results[key] = result
+        else:
+            self.failed.append(BulkFailure(key, error))
+        return BulkProgress(len(self.succeeded) + len(self.failed), self.total, len(self.succeeded),
+                            len(self.failed), key, error)
+
+    def __repr__(self) -> str:
+        return (f'<BulkReport succeeded={len(self.succeeded)} failed={len(self.failed)} '
+                f'retryable={len(self.retryable)} elapsed={self.elapsed:.1f}s>')
+
+
+def _call(operation: Callable[[Any], Any], key: Any, retry_policy: RetryPolicy) -> Any:
+    attempt = 0
+    while True:
+        try:
+            return operation(key)
+        except RETRYABLE_ERRORS:
+            if attempt >= retry_policy.max_retries:
+                raise
+            time.sleep(retry_policy.backoff(attempt))
+            attempt += 1
+
+
+def run_bulk(operation: Callable[[Any], Any], keys: Iterable[Any], concurrency: int = 8,
+             retry_policy: Optional[RetryPolicy] = None,
+             on_progress: Optional[Callable[[BulkProgress], None]] = None,
+             collect_results: bool = False) -> BulkReport:
+    """
+    Run an operation for every key on a thread pool, collecting failures instead of stopping.
+
+    At most `concurrency` operations are in flight. Operations failing with a
+    retryable error (see RETRYABLE_ERRORS) are sent again with backoff, so
+    operations must be safe to repeat. Progress events are emitted from the
+    calling thread.
+
+    Args:
+        operation (Callable[[Any], Any]): Performs the operation for one key.
+        keys (Iterable[Any]): The keys, e.g. subscription IDs.
+        concurrency (int, optional): The maximum number of operations in flight.
+        retry_policy (RetryPolicy, optional): How often and how long to back off before retrying a key.
+        on_progress (Callable[[BulkProgress], None], optional): Called after every finished operation.
+        collect_results (bool, optional): Keep the return value of every operation in `report.results`.
+
+    Returns:
+        BulkReport: The keys that succeeded and the failures.
+    """
+    keys = list(keys)
+    retry_policy = retry_policy if retry_policy is not None else RetryPolicy(max_retries=2)
+    report = BulkReport(len(keys), collect_results)
+    remaining = iter(keys)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(keys)))) as executor:
+        def submit(key):
+            future = executor.submit(_call, operation, key, retry_policy)
+            future.key = key
+            return future
+
+        pending = {submit(key) for key in _take(remaining, concurrency)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is not None and not isinstance(error, LemonSqueezyError):
+                    raise error
+                progress = report._record(future.key, error, None if error is not None else future.result())
+                for key in _take(remaining):
+                    pending.add(submit(key))
+                if on_progress is not None:
+                    on_progress(progress)
+
+    report.elapsed = time.monotonic() - report.started_at
+    return report
+
+
+async def arun_bulk(operation: Callable[[Any], Awaitable[Any]], keys: Iterable[Any], concurrency: int = 8,
+                    retry_policy: Optional[RetryPolicy] = None,
+                    on_progress: Optional[Callable[[BulkProgress], None]] = None,
+                    collect_results: bool = False) -> BulkReport:
+    """
+    Asynchronous counterpart of run_bulk, running the operations as concurrent tasks.
+
+    Args:
+        operation (Callable[[Any], Awaitable]): Performs the operation for one key.
+        keys (Iterable[Any]): The keys, e.g. subscription IDs.
+        concurrency (int, optional): The maximum number of operations in flight.
+        retry_policy (RetryPolicy, optional): How often and how long to back off before retrying a key.
+        on_progress (Callable[[BulkProgress], None], optional): Called after every finished operation.
+        collect_results (bool, optional): Keep the return value of every operation in `report.results`.
+
+    Returns:
+        BulkReport: The keys that succeeded and the failures.
+    """
+    keys = list(keys)
+    retry_policy = retry_policy if retry_policy is not None else RetryPolicy(max_retries=2)
+    report = BulkReport(len(keys), collect_results)
+    remaining = iter(keys)
+
+    async def call(key):
+        # Returns (error, result)
+        attempt = 0
+        while True:
+            try:
+                return None, await operation(key)
+            except RETRYABLE_ERRORS as e:
+                if attempt >= retry_policy.max_retries:
+                    return e, None
+                await asyncio.sleep(retry_policy.backoff(attempt))
+                attempt += 1
+            except LemonSqueezyError as e:
+                return e, None
+
+    async def worker():
+        # Every worker takes the next key once its previous operation is done
+        for key in remaining:
+            progress = report._record(key, *await call(key))
+            if on_progress is not None:
+                on_progress(progress)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, len(keys))))))
+    report.elapsed = time.monotonic() - report.started_at
+    return report
+
+
+def _take(iterator, count: int = 1) -> List[Any]:
+    return list(itertools.islice(iterator, count))
@@ -0,0 +1,292 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+from .pipeline import Request, Response
+
+# Headers kept with a cached body, enough to revalidate it and to rebuild the response
+_KEPT_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+DEFAULT_TTLS = {
+    'products': 300.0,
+    'variants': 300.0,
+    'customers': 60.0,
+}
+
+
+class CacheEntry:
+    """
+    A cached response body with its validators and expiry.
+    """
+
+    __slots__ = ('status_code', 'headers', 'content', 'url', 'resource', 'resource_id', 'expires_at')
+
+    def __init__(self, status_code: int, headers: Dict[str, str], content: bytes, url: Optional[str],
+                 resource: Optional[str], resource_id: Optional[str], expires_at: float):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.url = url
+        self.resource = resource
+        self.resource_id = resource_id
+        self.expires_at = expires_at
+
+    @property
+    def size(self) -> int:
+        return len(self.content)
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def to_response(self) -> Response:
+        return Response(self.status_code, dict(self.headers), self.content, self.url)
+
+
+class MemoryCache:
+    """
+    In-process LRU cache bounded by entry count and total body size.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 32 * 1024 * 1024):
+        """
+        Initialize a new instance of MemoryCache.
+
+        Args:
+            max_entries (int, optional): The maximum number of entries.
+            max_bytes (int, optional): The maximum total size of the cached bodies in bytes.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous.size
+            self._entries[key] = entry
+            self.size += entry.size
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= evicted.size
+
+    def delete_resource(self, resource: str, resource_id: Optional[str] = None) -> None:
+        with self._lock:
+            for key in [key for key, entry in self._entries.items()
+                        if entry.resource == resource and (resource_id is None or entry.resource_id == resource_id)]:
+                self.size -= self._entries.pop(key).size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """
+    LRU cache stored in a local SQLite file, so several worker processes on one host can share it.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100000, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Initialize a new instance of SQLiteCache.
+
+        Args:
+            path (str): The path of the database file.
+            max_entries (int, optional): The maximum number of entries.
+            max_bytes (int, optional): The maximum total size of the cached bodies in bytes.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                ' key TEXT PRIMARY KEY, status_code INTEGER, headers TEXT, content BLOB, url TEXT,'
+                ' resource TEXT, resource_id TEXT, expires_at REAL, used_at REAL, size INTEGER)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS responses_used_at ON responses (used_at)')
+            connection.execute('CREATE INDEX IF NOT EXISTS responses_resource ON responses (resource, resource_id)')
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread, since sqlite3 connections cannot be shared across threads
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30.0)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._connection() as connection:
+            row = connection.execute(
+                'SELECT status_code, headers, content, url, resource, resource_id, expires_at'
+                ' FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute('UPDATE responses SET used_at = ? WHERE key = ?', (time.time(), key))
+        status_code, headers, content, url, resource, resource_id, expires_at = row
+        return CacheEntry(status_code, json.loads(headers), bytes(content), url, resource, resource_id, expires_at)
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        if entry.size > self.max_bytes:
+            return
+        with self._connection() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, entry.status_code, json.dumps(entry.headers), entry.content, entry.url, entry.resource,
+                 entry.resource_id, entry.expires_at, time.time(), entry.size)
+            )
+            count, size = connection.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+            while count > self.max_entries or size > self.max_bytes:
+                key, evicted = connection.execute(
+                    'SELECT key, size FROM responses ORDER BY used_at LIMIT 1'
+                ).fetchone()
+                connection.execute('DELETE FROM responses WHERE key = ?', (key,))
+                count -= 1
+                size -= evicted
+
+    def delete_resource(self, resource: str, resource_id: Optional[str] = None) -> None:
+        with self._connection() as connection:
+            if resource_id is None:
+                connection.execute('DELETE FROM responses WHERE resource = ?', (resource,))
+            else:
+                connection.execute('DELETE FROM responses WHERE resource = ? AND resource_id = ?',
+                                   (resource, resource_id))
+
+    def clear(self) -> None:
+        with self._connection() as connection:
+            connection.execute('DELETE FROM responses')
+
+    def __len__(self) -> int:
+        return self._connection().execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+
+class CacheMiddleware:
+    """
+    Pipeline middleware caching single-resource GETs, such as get_product or get_variant.
+
+    Only resource types with a TTL are cached. Once an entry expires it is
+    revalidated with If-None-Match/If-Modified-Since when the API supplied an
+    ETag or Last-Modified header, so an unchanged resource costs a 304 instead
+    of a full body. Any PATCH or DELETE of a resource invalidates its entries.
+    Entries are keyed by the pipeline's scope as well as the request, so
+    clients of different API URLs or keys can share one backend without
+    seeing each other's responses.
+    """
+
+    def __init__(self, backend=None, ttls: Optional[Dict[str, float]] = None):
+        """
+        Initialize a new instance of CacheMiddleware.
+
+        Args:
+            backend (MemoryCache or SQLiteCache, optional): Where entries are stored, defaults to a MemoryCache.
+            ttls (Dict[str, float], optional): Seconds to cache each resource type for, keyed by type
+                (e.g. 'products'); defaults to DEFAULT_TTLS.
+        """
+        self.backend = backend if backend is not None else MemoryCache()
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+
+    def invalidate(self, resource: Optional[str] = None, resource_id: Optional[str] = None) -> None:
+        """
+        Drop cached entries.
+
+        Args:
+            resource (str, optional): The resource type to drop, or None to clear the whole cache.
+            resource_id (str, optional): The ID of the single resource to drop.
+        """
+        if resource is None:
+            self.backend.clear()
+        else:
+            self.backend.delete_resource(resource, None if resource_id is None else str(resource_id))
+
+    def _cache_key(self, request: Request) -> Optional[str]:
+        if request.resource_id is None or request.resource not in self.ttls:
+            return None
+        return json.dumps([request.context.get('scope'), *request.key])
+
+    def _lookup(self, request: Request):
+        # Returns the cache key, a response to serve directly, and the stale entry to revalidate
+        if request.method != 'GET':
+            if request.resource_id is not None and request.resource in self.ttls:
+                self.invalidate(request.resource, request.resource_id)
+            return None, None, None
+
+        key = self._cache_key(request)
+        if key is None:
+            return None, None, None
+
+        entry = self.backend.get(key)
+        if entry is None:
+            request.context['cache'] = 'miss'
+            return key, None, None
+        if entry.fresh:
+            request.context['cache'] = 'hit'
+            return key, entry.to_response(), None
+        request.context['cache'] = 'stale'
+
+        validators = {}
+        if entry.headers.get('ETag'):
+            validators['If-None-Match'] = entry.headers['ETag']
+        if entry.headers.get('Last-Modified'):
+            validators['If-Modified-Since'] = entry.headers['Last-Modified']
+        if validators:
+            request.headers = dict(request.headers, **validators)
+            return key, None, entry
+        return key, None, None
+
+    def _store(self, request: Request, key: str, response: Response, stale: Optional[CacheEntry]) -> Response:
+        expires_at = time.time() + self.ttls[request.resource]
+        if response.status_code == 304 and stale is not None:
+            request.context['cache'] = 'revalidated'
+            stale.expires_at = expires_at
+            self.backend.set(key, stale)
+            return stale.to_response()
+        if response.status_code == 200:
+            headers = {name: response.headers[name] for name in _KEPT_HEADERS if response.headers.get(name)}
+            self.backend.set(key, CacheEntry(200, headers, response.content, response.url, request.resource,
+                                             request.resource_id, expires_at))
+        return response
+
+    def __call__(self, request: Request, call_next: Callable) -> Response:
+        key, cached, stale = self._lookup(request)
+        if cached is not None:
+            return cached
+        response = call_next(request)
+        if key is None:
+            return response
+        return self._store(request, key, response, stale)
+
+
+class AsyncCacheMiddleware(CacheMiddleware):
+    """
+    CacheMiddleware for AsyncLemonSqueezy.
+    """
+
+    async def __call__(self, request: Request, call_next: Callable) -> Response:
+        key, cached, stale = self._lookup(request)
+        if cached is not None:
+            return cached
+        response = await call_next(request)
+        if key is None:
+            return response
+        return self._store(request, key, response, stale)
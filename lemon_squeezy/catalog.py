@@ -0,0 +1,216 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+ID = Union[int, str]
+
+
+class CatalogIndex:
+    """
+    An immutable snapshot of a store's products and variants with hash indexes.
+    """
+
+    def __init__(self, products: List[Any], variants: List[Any]):
+        """
+        Initialize a new instance of CatalogIndex.
+
+        Args:
+            products (List): The product resource objects of the store.
+            variants (List): The variant resource objects of those products.
+        """
+        self.products_by_id: Dict[str, Any] = {}
+        self.products_by_slug: Dict[str, Any] = {}
+        self.variants_by_id: Dict[str, Any] = {}
+        # Tuples, so the lists handed out by Catalog can't be changed by callers
+        self.variants_by_product: Dict[str, Tuple[Any, ...]] = {}
+        self.variants_by_price: Dict[int, Tuple[Any, ...]] = {}
+
+        by_product: Dict[str, List[Any]] = {}
+        for product in products:
+            self.products_by_id[product['id']] = product
+            slug = product['attributes'].get('slug')
+            if slug:
+                self.products_by_slug[slug] = product
+            by_product[product['id']] = []
+
+        by_price: Dict[int, List[Any]] = {}
+        for variant in variants:
+            attributes = variant['attributes']
+            product_id = str(attributes.get('product_id'))
+            if product_id not in by_product:
+                continue
+            self.variants_by_id[variant['id']] = variant
+            by_product[product_id].append(variant)
+            by_price.setdefault(attributes.get('price'), []).append(variant)
+
+        self.variants_by_product = {product_id: tuple(items) for product_id, items in by_product.items()}
+        self.variants_by_price = {price: tuple(items) for price, items in by_price.items()}
+        self.loaded_at = time.time()
+
+
+class Catalog:
+    """
+    In-memory catalog of a store's products and variants.
+
+    Everything is loaded once, the products with a paginated scan of the
+    store and the variants with a scan per product, since variants can only
+    be filtered by product. Resolving a slug, price or variant before a
+    checkout is then a dict lookup instead of API calls.
+    Refreshes build a new CatalogIndex and swap it in with a single reference
+    assignment, so readers never block and always see a consistent snapshot.
+    """
+
+    def __init__(self, client, store_id: ID, refresh_interval: Optional[float] = None, page_size: int = 100,
+                 concurrency: int = 8):
+        """
+        Initialize a new instance of Catalog.
+
+        Args:
+            client (LemonSqueezy): The client to load the catalog with.
+            store_id (int or str): The ID of the store.
+            refresh_interval (float, optional): Seconds between background refreshes; None to only
+                refresh on demand.
+            page_size (int, optional): The number of resources fetched per page.
+            concurrency (int, optional): The number of products whose variants are fetched at once.
+        """
+        self.client = client
+        self.store_id = store_id
+        self.refresh_interval = refresh_interval
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.last_error: Optional[Exception] = None
+        self._index: Optional[CatalogIndex] = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def index(self) -> CatalogIndex:
+        """
+        The current snapshot, loaded on first use.
+        """
+        index = self._index
+        if index is None:
+            index = self.refresh()
+        return index
+
+    def refresh(self) -> CatalogIndex:
+        """
+        Load the products and variants again and swap in the new snapshot.
+
+        Returns:
+            CatalogIndex: The new snapshot.
+        """
+        with self._lock:
+            products = list(self.client.product.iter_products(self.store_id, page_size=self.page_size))
+            variants = []
+            if products:
+                with ThreadPoolExecutor(max_workers=min(self.concurrency, len(products))) as executor:
+                    for product_variants in executor.map(self._variants, products):
+                        variants.extend(product_variants)
+            index = CatalogIndex(products, variants)
+            self._index = index
+            return index
+
+    def _variants(self, product: Any) -> List[Any]:
+        return list(self.client.variants.iter_variants(product['id'], page_size=self.page_size))
+
+    def start(self) -> 'Catalog':
+        """
+        Load the catalog and keep refreshing it in a background thread every `refresh_interval` seconds.
+
+        A failed refresh keeps the previous snapshot and is recorded in `last_error`.
+
+        Returns:
+            Catalog: The catalog itself.
+        """
+        self.index
+        if self.refresh_interval and self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='lemon-squeezy-catalog', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stop the background refresh.
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.refresh_interval):
+            try:
+                self.refresh()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+
+    def __enter__(self) -> 'Catalog':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def get_product(self, product_id: ID) -> Optional[Any]:
+        """
+        Look up a product by ID.
+
+        Args:
+            product_id (int or str): The ID of the product.
+
+        Returns:
+            Dict: The product resource object, or None if the store has no such product.
+        """
+        return self.index.products_by_id.get(str(product_id))
+
+    def get_product_by_slug(self, slug: str) -> Optional[Any]:
+        """
+        Look up a product by slug.
+
+        Args:
+            slug (str): The slug of the product.
+
+        Returns:
+            Dict: The product resource object, or None if the store has no such product.
+        """
+        return self.index.products_by_slug.get(slug)
+
+    def get_variant(self, variant_id: ID) -> Optional[Any]:
+        """
+        Look up a variant by ID.
+
+        Args:
+            variant_id (int or str): The ID of the variant.
+
+        Returns:
+            Dict: The variant resource object, or None if the store has no such variant.
+        """
+        return self.index.variants_by_id.get(str(variant_id))
+
+    def get_variants(self, product_id: ID) -> Tuple[Any, ...]:
+        """
+        Look up the variants of a product.
+
+        Args:
+            product_id (int or str): The ID of the product.
+
+        Returns:
+            Tuple: The variant resource objects, empty if the store has no such product.
+        """
+        return self.index.variants_by_product.get(str(product_id), ())
+
+    def find_variants_by_price(self, price: int) -> Tuple[Any, ...]:
+        """
+        Look up the variants with a given price.
+
+        Args:
+            price (int): The price in cents.
+
+        Returns:
+            Tuple: The variant resource objects.
+        """
+        return self.index.variants_by_price.get(price, ())
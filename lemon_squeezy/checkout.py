@@ -1,20 +1,14 @@
-import requests
-from typing import Dict, Optional
+from typing import Callable, Dict, Iterable, Iterator, Optional
+from .bulk import BulkProgress, BulkReport, run_bulk
+from .checkout_template import CheckoutTemplate
+from .resource import Resource
+from .retry import RetryPolicy
 
-class Checkout:
+class Checkout(Resource):
     """
     Class for interacting with the 'checkout' part of the API.
     """
 
-    def __init__(self, session: requests.Session):
-        """
-        Initialize a new instance of Checkout.
-
-        Args:
-            session (requests.Session): The requests Session to use for making requests.
-        """
-        self.session = session
-
     def build_product_options(self, name=None, description=None, media=None, redirect_url=None, receipt_button_text=None, receipt_link_url=None, receipt_thank_you_note=None, enabled_variants=None):
         product_options = {}
         if name: 
@@ -94,12 +88,12 @@ class Checkout:
             checkout_data['custom'] = custom
         return checkout_data
 
-    def create_checkout(self, store_id: int, variant_id: int, custom_price: Optional[float] = None, 
-                        product_options: Optional[Dict] = None, checkout_options: Optional[Dict] = None,
-                        checkout_data: Optional[Dict] = None, preview: Optional[bool] = None, 
-                        expires_at: Optional[str] = None) -> Optional[Dict]:
+    def build_checkout_payload(self, store_id: int, variant_id: int, custom_price: Optional[float] = None,
+                               product_options: Optional[Dict] = None, checkout_options: Optional[Dict] = None,
+                               checkout_data: Optional[Dict] = None, preview: Optional[bool] = None,
+                               expires_at: Optional[str] = None) -> Dict:
         """
-        Create a new checkout.
+        Build the JSON:API document used to create a checkout.
 
         Args:
             store_id (int): The ID of the store.
@@ -112,9 +106,8 @@ class Checkout:
             expires_at (str, optional): When the checkout expires.
 
         Returns:
-            Dict: The JSON response from the API.
+            Dict: The built payload.
         """
-        url = f"{self.session.params['api_url']}/v1/checkouts"
         payload = {
             'data': {
                 'type': 'checkouts',
@@ -150,56 +143,133 @@ class Checkout:
             if expires_at:
                 payload['data']['attributes']['expires_at'] = expires_at
 
-        try:
-            response = self.session.post(url, json=payload)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f'Error creating checkout: {e}')
-            return None
+        return payload
 
-    def list_checkouts(self, store_id: Optional[int] = None, variant_id: Optional[int] = None) -> Optional[Dict]:
+    def create_checkout(self, store_id: int, variant_id: int, custom_price: Optional[float] = None, 
+                        product_options: Optional[Dict] = None, checkout_options: Optional[Dict] = None,
+                        checkout_data: Optional[Dict] = None, preview: Optional[bool] = None, 
+                        expires_at: Optional[str] = None) -> Dict:
         """
-        List all checkouts, optionally filtered by store ID and variant ID.
+        Create a new checkout.
 
         Args:
-            store_id (int, optional): The ID of the store.
-            variant_id (int, optional): The ID of the variant.
+            store_id (int): The ID of the store.
+            variant_id (int): The ID of the variant.
+            custom_price (float, optional): The custom price.
+            product_options (Dict, optional): The product options.
+            checkout_options (Dict, optional): The checkout options.
+            checkout_data (Dict, optional): The checkout data.
+            preview (bool, optional): Whether this is a preview.
+            expires_at (str, optional): When the checkout expires.
 
         Returns:
             Dict: The JSON response from the API.
         """
-        url = f"{self.session.params['api_url']}/v1/checkouts"
+        payload = self.build_checkout_payload(store_id, variant_id, custom_price, product_options,
+                                              checkout_options, checkout_data, preview, expires_at)
+        return self._request('POST', '/v1/checkouts', json=payload)
+
+    def create_checkout_from_template(self, template: CheckoutTemplate, checkout_data: Optional[Dict] = None) -> Dict:
+        """
+        Create a new checkout from a precompiled template.
+
+        Args:
+            template (CheckoutTemplate): The template with the store, variant and options.
+            checkout_data (Dict, optional): The buyer's checkout data, see build_checkout_data.
+
+        Returns:
+            Dict: The JSON response from the API.
+        """
+        return self._request('POST', '/v1/checkouts', json=template.body(self.pipeline.codec, checkout_data))
+
+    def create_checkouts(self, template: CheckoutTemplate, checkout_data: Iterable[Optional[Dict]],
+                         concurrency: int = 8, retry_policy: Optional[RetryPolicy] = None,
+                         on_progress: Optional[Callable[[BulkProgress], None]] = None) -> BulkReport:
+        """
+        Create many checkouts from a template concurrently, one per checkout data.
+
+        Checkouts whose creation failed with a retryable error are created
+        again, which may leave an unused duplicate checkout behind.
+
+        Args:
+            template (CheckoutTemplate): The template with the store, variant and options.
+            checkout_data (Iterable[Dict]): The checkout data of every buyer; None for an anonymous checkout.
+            concurrency (int, optional): The maximum number of requests in flight.
+            retry_policy (RetryPolicy, optional): How often to retry a creation after a retryable error.
+            on_progress (Callable[[BulkProgress], None], optional): Called after every finished creation.
+
+        Returns:
+            BulkReport: The report keyed by the position in `checkout_data`; `report.results` holds the
+                JSON responses of the created checkouts.
+        """
+        checkout_data = list(checkout_data)
+        return run_bulk(lambda index: self.create_checkout_from_template(template, checkout_data[index]),
+                        range(len(checkout_data)), concurrency, retry_policy, on_progress, collect_results=True)
+
+    def _filters(self, store_id: Optional[int], variant_id: Optional[int]) -> Dict:
         params = {}
         if store_id is not None:
             params['filter[store_id]'] = store_id
         if variant_id is not None:
             params['filter[variant_id]'] = variant_id
+        return params
 
-        try:
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f'Error listing checkouts: {e}')
-            return None
+    def list_checkouts(self, store_id: Optional[int] = None, variant_id: Optional[int] = None,
+                       include: Optional[Iterable[str]] = None,
+                       fields: Optional[Dict[str, Iterable[str]]] = None) -> Dict:
+        """
+        List all checkouts, optionally filtered by store ID and variant ID.
 
-    def retrieve_checkout(self, checkout_id: int) -> Optional[Dict]:
+        Args:
+            store_id (int, optional): The ID of the store.
+            variant_id (int, optional): The ID of the variant.
+            include (Iterable[str], optional): Related resources to include; the response is then
+                resolved into a Document.
+            fields (Dict[str, Iterable[str]], optional): The attributes and relationships to return per
+                resource type (`fields[type]`); anything else is also dropped after decoding.
+
+        Returns:
+            Dict: The JSON response from the API.
+        """
+        return self._request('GET', '/v1/checkouts', self._filters(store_id, variant_id),
+                             include=include, fields=fields)
+
+    def retrieve_checkout(self, checkout_id: int, include: Optional[Iterable[str]] = None,
+                          fields: Optional[Dict[str, Iterable[str]]] = None) -> Dict:
         """
         Retrieve a specific checkout.
 
         Args:
             checkout_id (int): The ID of the checkout.
+            include (Iterable[str], optional): Related resources to include; the response is then
+                resolved into a Document.
+            fields (Dict[str, Iterable[str]], optional): The attributes and relationships to return per
+                resource type (`fields[type]`); anything else is also dropped after decoding.
 
         Returns:
             Dict: The JSON response from the API.
         """
-        url = f"{self.session.params['api_url']}/v1/checkouts/{checkout_id}"
+        return self._request('GET', f'/v1/checkouts/{checkout_id}', include=include, fields=fields)
 
-        try:
-            response = self.session.get(url)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f'Error retrieving checkout: {e}')
-            return None
+    def iter_checkouts(self, store_id: Optional[int] = None, variant_id: Optional[int] = None,
+                       page_size: Optional[int] = None, concurrency: int = 1,
+                       include: Optional[Iterable[str]] = None,
+                       fields: Optional[Dict[str, Iterable[str]]] = None) -> Iterator[Dict]:
+        """
+        Iterate over all checkouts across every page, optionally filtered by store ID and variant ID.
+
+        Args:
+            store_id (int, optional): The ID of the store.
+            variant_id (int, optional): The ID of the variant.
+            page_size (int, optional): The number of checkouts fetched per page.
+            concurrency (int, optional): The number of pages prefetched concurrently.
+            include (Iterable[str], optional): Related resources to include; resources are then
+                yielded as linked ResourceObjects.
+            fields (Dict[str, Iterable[str]], optional): The attributes and relationships to return per
+                resource type (`fields[type]`); anything else is also dropped after decoding.
+
+        Yields:
+            Dict: Each checkout resource object.
+        """
+        return self._iter('/v1/checkouts', self._filters(store_id, variant_id), page_size, concurrency,
+                          include=include, fields=fields)
@@ -0,0 +1,251 @@
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+from .codec import JSONCodec
+
+_MARKERS = {
+    'checkout_data': '__lemon_squeezy_checkout_data__',
+    'expires_at': '__lemon_squeezy_expires_at__',
+}
+_SPLIT = re.compile(b'("(?:' + b'|'.join(marker.encode() for marker in _MARKERS.values()) + b')")')
+_NAMES = {f'"{marker}"'.encode(): name for name, marker in _MARKERS.items()}
+
+
+class CheckoutTemplate:
+    """
+    A precompiled checkout: store, variant and options fixed, only the buyer's checkout data varies.
+
+    The request body is encoded once per codec and split around the varying
+    values, so creating a checkout only encodes the buyer's `checkout_data`
+    (and `expires_at` with a `ttl`) and joins a few byte strings.
+    """
+
+    def __init__(self, store_id: int, variant_id: int, custom_price: Optional[float] = None,
+                 product_options: Optional[Dict] = None, checkout_options: Optional[Dict] = None,
+                 preview: Optional[bool] = None, expires_at: Optional[str] = None, ttl: Optional[float] = None):
+        """
+        Initialize a new instance of CheckoutTemplate.
+
+        Args:
+            store_id (int): The ID of the store.
+            variant_id (int): The ID of the variant.
+            custom_price (float, optional): The custom price.
+            product_options (Dict, optional): The product options, see Checkout.build_product_options.
+            checkout_options (Dict, optional): The checkout options, see Checkout.build_checkout_options.
+            preview (bool, optional): Whether this is a preview.
+            expires_at (str, optional): When every checkout of the template expires.
+            ttl (float, optional): Seconds after its creation each checkout expires; overrides `expires_at`.
+        """
+        self.store_id = store_id
+        self.variant_id = variant_id
+        self.ttl = ttl
+        self.attributes = {}
+        if custom_price:
+            self.attributes['custom_price'] = custom_price
+        if product_options:
+            self.attributes['product_options'] = product_options
+        if checkout_options:
+            self.attributes['checkout_options'] = checkout_options
+        if preview is not None:
+            self.attributes['preview'] = preview
+        if expires_at and ttl is None:
+            self.attributes['expires_at'] = expires_at
+        self._compiled: Dict[Tuple[type, bool], List[Any]] = {}
+
+    def payload(self, checkout_data: Optional[Dict] = None) -> Dict:
+        """
+        Build the JSON:API document for one checkout, as Checkout.build_checkout_payload would.
+
+        Args:
+            checkout_data (Dict, optional): The buyer's checkout data, see Checkout.build_checkout_data.
+
+        Returns:
+            Dict: The payload.
+        """
+        attributes = dict(self.attributes)
+        if checkout_data:
+            attributes['checkout_data'] = checkout_data
+        if self.ttl is not None:
+            attributes['expires_at'] = self._expires_at()
+        return self._document(attributes)
+
+    def _document(self, attributes: Dict) -> Dict:
+        data = {
+            'type': 'checkouts',
+            'relationships': {
+                'store': {'data': {'type': 'stores', 'id': self.store_id}},
+                'variant': {'data': {'type': 'variants', 'id': self.variant_id}},
+            },
+        }
+        if attributes:
+            data['attributes'] = attributes
+        return {'data': data}
+
+    def _expires_at(self) -> str:
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl)
+        return expires_at.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+    def _segments(self, codec: JSONCodec, checkout_data: bool) -> List[Any]:
+        # The encoded body split into literal bytes and the names of the values filled in per checkout,
+        # compiled with and without checkout data since payload() leaves empty checkout data out
+        segments = self._compiled.get((type(codec), checkout_data))
+        if segments is None:
+            attributes = dict(self.attributes)
+            if checkout_data:
+                attributes['checkout_data'] = _MARKERS['checkout_data']
+            if self.ttl is not None:
+                attributes['expires_at'] = _MARKERS['expires_at']
+            parts = _SPLIT.split(codec.encode(self._document(attributes)))
+            segments = self._compiled[type(codec), checkout_data] = [_NAMES.get(part, part) for part in parts]
+        return segments
+
+    def body(self, codec: JSONCodec, checkout_data: Optional[Dict] = None) -> bytes:
+        """
+        Encode the request body for one checkout, the same document as `payload` builds.
+
+        Args:
+            codec (JSONCodec): The codec of the pipeline the request is sent on.
+            checkout_data (Dict, optional): The buyer's checkout data.
+
+        Returns:
+            bytes: The encoded payload.
+        """
+        values = {'checkout_data': checkout_data}
+        if self.ttl is not None:
+            values['expires_at'] = self._expires_at()
+        return b''.join(codec.encode(values[segment]) if segment in values else segment
+                        for segment in self._segments(codec, bool(checkout_data)))
+
+    def __repr__(self) -> str:
+        return f'<CheckoutTemplate store={self.store_id} variant={self.variant_id}>'
+
+
+class CheckoutPool:
+    """
+    Pre-created checkouts for anonymous buyers, kept ready per template.
+
+    A background thread tops every template up to `size` checkouts, so
+    `acquire` usually returns at once instead of waiting on a POST. Checkouts
+    that expire within `min_ttl` seconds are discarded. The pool uses the sync
+    client only.
+    """
+
+    def __init__(self, checkout, templates: Iterable[CheckoutTemplate], size: int = 10, min_ttl: float = 300.0,
+                 concurrency: int = 4):
+        """
+        Initialize a new instance of CheckoutPool.
+
+        Args:
+            checkout (Checkout): The checkout resource of a client, e.g. `LemonSqueezy(...).checkout`.
+            templates (Iterable[CheckoutTemplate]): The templates to keep checkouts ready for.
+            size (int, optional): The number of checkouts kept per template.
+            min_ttl (float, optional): Checkouts expiring sooner than this many seconds are not handed out.
+            concurrency (int, optional): The number of checkouts created at once while refilling.
+        """
+        self.checkout = checkout
+        self.templates = list(templates)
+        self.size = size
+        self.min_ttl = min_ttl
+        self.concurrency = concurrency
+        self.last_error: Optional[Exception] = None
+        self._ready: Dict[CheckoutTemplate, Deque[Tuple[float, Any]]] = {
+            template: deque() for template in self.templates
+        }
+        # Guards the ready checkouts, taken by acquire while refill drops the expiring ones
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _expires(self, checkout: Any) -> float:
+        # The expiry of a created checkout as a time.time() timestamp, infinity if it never expires
+        expires_at = checkout['data']['attributes'].get('expires_at')
+        if not expires_at:
+            return float('inf')
+        return datetime.fromisoformat(expires_at.replace('Z', '+00:00')).timestamp()
+
+    def refill(self) -> None:
+        """
+        Drop expiring checkouts and create new ones until every template has `size` ready.
+        """
+        for template, ready in self._ready.items():
+            with self._lock:
+                while ready and ready[0][0] - time.time() < self.min_ttl:
+                    ready.popleft()
+                missing = self.size - len(ready)
+            if missing <= 0:
+                continue
+            report = self.checkout.create_checkouts(template, [None] * missing, concurrency=self.concurrency)
+            with self._lock:
+                for checkout in report.results.values():
+                    ready.append((self._expires(checkout), checkout))
+            if report.failed:
+                self.last_error = report.failed[-1].error
+
+    def acquire(self, template: CheckoutTemplate) -> Any:
+        """
+        Take a ready checkout of a template, creating one if none is left.
+
+        Args:
+            template (CheckoutTemplate): One of the pool's templates.
+
+        Returns:
+            Dict: The JSON response of the checkout creation; its URL is in `['data']['attributes']['url']`.
+        """
+        ready = self._ready[template]
+        with self._lock:
+            while ready:
+                expires, checkout = ready.popleft()
+                if expires - time.time() >= self.min_ttl:
+                    self._wakeup.set()
+                    return checkout
+        self._wakeup.set()
+        return self.checkout.create_checkout_from_template(template)
+
+    def start(self, interval: float = 60.0) -> 'CheckoutPool':
+        """
+        Fill the pool in a background thread, which runs after every `acquire` and at least every `interval` seconds.
+
+        Args:
+            interval (float, optional): Seconds between refills when no checkout is taken.
+
+        Returns:
+            CheckoutPool: The pool itself.
+        """
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, args=(interval,), name='lemon-squeezy-checkout-pool',
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stop the background refill.
+        """
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, interval: float) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.clear()
+            try:
+                self.refill()
+            except Exception as e:
+                self.last_error = e
+            self._wakeup.wait(interval)
+
+    def __enter__(self) -> 'CheckoutPool':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def __len__(self) -> int:
+        return sum(len(ready) for ready in self._ready.values())
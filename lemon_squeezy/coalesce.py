@@ -0,0 +1,83 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Tuple
+from .pipeline import Request, Response
+
+
+def _flight_key(request: Request) -> Tuple:
+    # The scope keeps apart clients with different API keys, e.g. tenants of a LemonSqueezyPool
+    return (request.context.get('scope'),) + request.key + (tuple(sorted(request.headers.items())),)
+
+
+class CoalesceMiddleware:
+    """
+    Pipeline middleware making concurrent identical GETs share one upstream request.
+
+    The first caller sends the request; callers arriving while it is in
+    flight wait for it and receive the same Response, so the body is also
+    decoded only once. The decoded JSON is therefore shared between those
+    callers and should be treated as read-only.
+    """
+
+    def __init__(self):
+        """
+        Initialize a new instance of CoalesceMiddleware.
+        """
+        self._flights: Dict[Tuple, Future] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, request: Request, call_next: Callable) -> Response:
+        if request.method != 'GET':
+            return call_next(request)
+
+        key = _flight_key(request)
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Future()
+
+        if not leader:
+            request.context['coalesced'] = True
+            return flight.result()
+
+        try:
+            response = call_next(request)
+        except Exception as e:
+            flight.set_exception(e)
+            raise
+        else:
+            flight.set_result(response)
+            return response
+        finally:
+            with self._lock:
+                del self._flights[key]
+
+
+class AsyncCoalesceMiddleware:
+    """
+    CoalesceMiddleware for AsyncLemonSqueezy.
+
+    The shared request runs as its own task, so cancelling one waiting caller
+    does not cancel it for the others.
+    """
+
+    def __init__(self):
+        """
+        Initialize a new instance of AsyncCoalesceMiddleware.
+        """
+        self._flights: Dict[Tuple, asyncio.Future] = {}
+
+    async def __call__(self, request: Request, call_next: Callable) -> Response:
+        if request.method != 'GET':
+            return await call_next(request)
+
+        key = _flight_key(request)
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = asyncio.ensure_future(call_next(request))
+            flight.add_done_callback(lambda _: self._flights.pop(key, None))
+        else:
+            request.context['coalesced'] = True
+        return await asyncio.shield(flight)
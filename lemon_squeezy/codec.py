@@ -0,0 +1,133 @@
+import json
+from typing import Any, Dict, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # orjson is optional
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # msgspec is optional
+    msgspec = None
+
+
+class JSONCodec:
+    """
+    Encodes request bodies and decodes response bodies, using the standard library.
+
+    Codecs work on bytes: request bodies are sent as the encoded bytes and
+    responses are decoded straight from the raw body.
+    """
+
+    name = 'json'
+
+    def encode(self, obj: Any) -> bytes:
+        """
+        Encode a value as a JSON request body.
+
+        Args:
+            obj (Any): The value to encode.
+
+        Returns:
+            bytes: The UTF-8 encoded JSON.
+        """
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    def decode(self, content: bytes, resource: Optional[str] = None) -> Any:
+        """
+        Decode a JSON response body.
+
+        Args:
+            content (bytes): The raw response body.
+            resource (str, optional): The resource type of the request, used by codecs that decode into types.
+
+        Returns:
+            Any: The decoded value.
+        """
+        return json.loads(content)
+
+    def __repr__(self) -> str:
+        return f'<{type(self).__name__}>'
+
+
+class OrjsonCodec(JSONCodec):
+    """
+    Codec backed by orjson.
+    """
+
+    name = 'orjson'
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError('OrjsonCodec requires the orjson package')
+
+    def encode(self, obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    def decode(self, content: bytes, resource: Optional[str] = None) -> Any:
+        return orjson.loads(content)
+
+
+class MsgspecCodec(JSONCodec):
+    """
+    Codec backed by msgspec, optionally decoding documents into typed structs.
+    """
+
+    name = 'msgspec'
+
+    def __init__(self, types: Optional[Dict[str, Any]] = None):
+        """
+        Initialize a new instance of MsgspecCodec.
+
+        Args:
+            types (Dict[str, Any], optional): The type to decode documents into, keyed by resource type
+                (e.g. {'orders': OrdersDocument}); other responses are decoded into plain dicts and lists.
+                Typed documents are returned as is, so they can't be combined with `include`, `fields`
+                or `models`.
+        """
+        if msgspec is None:
+            raise ImportError('MsgspecCodec requires the msgspec package')
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+        self._decoders = {resource: msgspec.json.Decoder(type) for resource, type in (types or {}).items()}
+
+    def encode(self, obj: Any) -> bytes:
+        return self._encoder.encode(obj)
+
+    def decode(self, content: bytes, resource: Optional[str] = None) -> Any:
+        return self._decoders.get(resource, self._decoder).decode(content)
+
+
+CODECS = {
+    'json': JSONCodec,
+    'orjson': OrjsonCodec,
+    'msgspec': MsgspecCodec,
+}
+
+
+def get_codec(codec: Union[str, JSONCodec, None] = 'auto') -> JSONCodec:
+    """
+    Resolve the codec to use.
+
+    Args:
+        codec (str or JSONCodec, optional): A codec instance, the name of one ('json', 'orjson', 'msgspec'),
+            or 'auto' (or None) for the fastest one installed.
+
+    Returns:
+        JSONCodec: The codec.
+    """
+    if isinstance(codec, JSONCodec):
+        return codec
+    if codec is None or codec == 'auto':
+        if orjson is not None:
+            return OrjsonCodec()
+        if msgspec is not None:
+            return MsgspecCodec()
+        return JSONCodec()
+    if codec not in CODECS:
+        raise ValueError(f'Unknown codec {codec!r}, expected one of {", ".join(CODECS)}')
+    return CODECS[codec]()
+
+
+DEFAULT_CODEC = JSONCodec()
@@ -1,64 +1,73 @@
-from typing import Dict, Optional
-import requests
+from typing import Dict, Iterable, Iterator, Optional
+from .resource import Resource
 
-class Customer:
+class Customer(Resource):
     """
     Class for interacting with the customer part of the API.
     """
 
-    def __init__(self, session: requests.Session):
-        """
-        Initialize a new instance of Customer.
-
-        Args:
-            session (requests.Session): The requests Session to use for making requests.
-        """
-        self.session = session
-
-    def get_customer(self, customer_id: str) -> Optional[Dict]:
+    def get_customer(self, customer_id: str, include: Optional[Iterable[str]] = None,
+                     fields: Optional[Dict[str, Iterable[str]]] = None) -> Dict:
         """
         Get information about a single customer.
 
         Args:
             customer_id (str): The ID of the customer.
+            include (Iterable[str], optional): Related resources to include; the response is then
+                resolved into a Document.
+            fields (Dict[str, Iterable[str]], optional): The attributes and relationships to return per
+                resource type (`fields[type]`); anything else is also dropped after decoding.
 
         Returns:
-            Dict: The JSON response from the API, or None if the request failed.
+            Dict: The JSON response from the API.
         """
-        url = f"{self.session.params['api_url']}/v1/customers/{customer_id}"
+        return self._request('GET', f'/v1/customers/{customer_id}', include=include, fields=fields)
 
-        try:
-            response = self.session.get(url)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.HTTPError as e:
-            print(f"Error getting customer: {e}")
-            return None
+    def _filters(self, store_id: str, email: str) -> Dict:
+        params = {}
+        if store_id:
+            params['filter[store_id]'] = store_id
+        if email:
+            params['filter[email]'] = email
+        return params
 
-    def get_all_customers(self, store_id: str = None, email: str = None) -> Optional[Dict]:
+    def get_all_customers(self, store_id: str = None, email: str = None,
+                          include: Optional[Iterable[str]] = None,
+                          fields: Optional[Dict[str, Iterable[str]]] = None) -> Dict:
         """
         Get information about all customers, with optional filters.
 
         Args:
             store_id (str, optional): If provided, only return customers from this store.
             email (str, optional): If provided, only return customers with this email.
+            include (Iterable[str], optional): Related resources to include; the response is then
+                resolved into a Document.
+            fields (Dict[str, Iterable[str]], optional): The attributes and relationships to return per
+                resource type (`fields[type]`); anything else is also dropped after decoding.
 
         Returns:
-            Dict: The JSON response from the API, or None if the request failed.
+            Dict: The JSON response from the API.
         """
-        url = f"{self.session.params['api_url']}/v1/customers"
-        filters = []
-        if store_id:
-            filters.append(f"filter[store_id]={store_id}")
-        if email:
-            filters.append(f"filter[email]={email}")
-        if filters:
-            url += "?" + "&".join(filters)
+        return self._request('GET', '/v1/customers', self._filters(store_id, email), include=include, fields=fields)
+
+    def iter_customers(self, store_id: str = None, email: str = None, page_size: int = None,
+                       concurrency: int = 1, include: Optional[Iterable[str]] = None,
+                       fields: Optional[Dict[str, Iterable[str]]] = None) -> Iterator[Dict]:
+        """
+        Iterate over all customers across every page, with optional filters.
+
+        Args:
+            store_id (str, optional): If provided, only return customers from this store.
+            email (str, optional): If provided, only return customers with this email.
+            page_size (int, optional): The number of customers fetched per page.
+            concurrency (int, optional): The number of pages prefetched concurrently.
+            include (Iterable[str], optional): Related resources to include; resources are then
+                yielded as linked ResourceObjects.
+            fields (Dict[str, Iterable[str]], optional): The attributes and relationships to return per
+                resource type (`fields[type]`); anything else is also dropped after decoding.
 
-        try:
-            response = self.session.get(url)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.HTTPError as e:
-            print(f"Error getting customers: {e}")
-            return None
+        Yields:
+            Dict: Each customer resource object.
+        """
+        return self._iter('/v1/customers', self._filters(store_id, email), page_size, concurrency,
+                          include=include, fields=fields)
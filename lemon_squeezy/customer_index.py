@@ -0,0 +1,173 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Union
+from .pagination import iter_changed_pages, iter_resources
+from .pipeline import Pipeline, Request
+
+
+def normalize_email(email: str) -> str:
+    """
+    Normalize an email address for lookups.
+
+    Args:
+        email (str): The email address.
+
+    Returns:
+        str: The trimmed, lowercased address.
+    """
+    return email.strip().lower()
+
+
+class CustomerIndex:
+    """
+    Local email -> customer index for resolving many customers at once.
+
+    The index is built from one paginated scan of the customers and kept
+    fresh with incremental refreshes that only fetch customers updated since
+    the last one. Emails missing from the index are looked up concurrently
+    and added to it.
+    """
+
+    def __init__(self, pipeline: Pipeline, store_id: Optional[Union[int, str]] = None, page_size: int = 100,
+                 concurrency: int = 8):
+        """
+        Initialize a new instance of CustomerIndex.
+
+        Args:
+            pipeline (Pipeline): The pipeline to send requests through, e.g. `LemonSqueezy(...).pipeline`.
+            store_id (int or str, optional): Only index customers of this store.
+            page_size (int, optional): The number of customers fetched per page.
+            concurrency (int, optional): The number of pages, or missed emails, fetched at once.
+        """
+        self.pipeline = pipeline
+        self.store_id = store_id
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.updated_at: Optional[str] = None
+        self._customers: Dict[str, Dict] = {}
+        # The indexed email of every customer ID, to drop the old address when it changes
+        self._emails: Dict[str, str] = {}
+        self._loaded = False
+        # Held by load and refresh for the whole scan, and by add, which they call
+        self._lock = threading.RLock()
+
+    def _filters(self, email: Optional[str] = None) -> Dict:
+        params = {}
+        if self.store_id:
+            params['filter[store_id]'] = self.store_id
+        if email:
+            params['filter[email]'] = email
+        return params
+
+    def add(self, customer: Dict) -> None:
+        """
+        Add or replace a customer in the index.
+
+        Safe to call from several threads, e.g. while misses are fetched concurrently.
+
+        Args:
+            customer (Dict): The customer resource object.
+        """
+        attributes = customer.get('attributes') or {}
+        email = attributes.get('email')
+        if not email:
+            return
+        key = normalize_email(email)
+        updated_at = attributes.get('updated_at') or ''
+        with self._lock:
+            previous_key = self._emails.get(customer.get('id'))
+            previous = self._customers.get(previous_key) if previous_key is not None else None
+            if previous is not None and updated_at < (previous['attributes'].get('updated_at') or ''):
+                return
+            # A changed email leaves the old address pointing at nobody, unless another customer took it since
+            if previous is not None and previous_key != key and previous.get('id') == customer.get('id'):
+                del self._customers[previous_key]
+            current = self._customers.get(key)
+            if current is None or updated_at >= (current['attributes'].get('updated_at') or ''):
+                self._customers[key] = customer
+                self._emails[customer.get('id')] = key
+
+    def _scanned(self, customer: Dict) -> None:
+        # Only scans move the high-water mark: a customer fetched on its own says nothing about the others
+        self.add(customer)
+        updated_at = (customer.get('attributes') or {}).get('updated_at') or ''
+        if self.updated_at is None or updated_at > self.updated_at:
+            self.updated_at = updated_at
+
+    def load(self) -> None:
+        """
+        Build the index from a full scan of the customers.
+        """
+        with self._lock:
+            for customer in iter_resources(self.pipeline, '/v1/customers', self._filters(), self.page_size,
+                                           self.concurrency):
+                self._scanned(customer)
+            self._loaded = True
+
+    def refresh(self) -> None:
+        """
+        Fetch the customers updated since the last load or refresh into the index.
+        """
+        if not self._loaded:
+            return self.load()
+        with self._lock:
+            for page in iter_changed_pages(self.pipeline, '/v1/customers', self._filters(), self.updated_at,
+                                           self.page_size):
+                for customer in page.get('data') or []:
+                    self._scanned(customer)
+
+    def get(self, email: str) -> Optional[Dict]:
+        """
+        Look up a customer in the index, without any API call.
+
+        Args:
+            email (str): The email address, in any case.
+
+        Returns:
+            Dict: The customer resource object, or None if it is not indexed.
+        """
+        return self._customers.get(normalize_email(email))
+
+    def _fetch(self, email: str) -> Optional[Dict]:
+        page = self.pipeline.request(Request('GET', '/v1/customers', self._filters(email)))
+        customers = page.get('data') or []
+        for customer in customers:
+            self.add(customer)
+        return self.get(email)
+
+    def resolve_customers(self, emails: Iterable[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Resolve many email addresses to customers.
+
+        Duplicates (ignoring case and surrounding spaces) are looked up once.
+        Hits are served from the index, loading it first if needed; only the
+        misses are requested from the API, concurrently.
+
+        Args:
+            emails (Iterable[str]): The email addresses.
+
+        Returns:
+            Dict[str, Dict]: The customer resource object for every given email, or None if there is no such customer.
+        """
+        if not self._loaded:
+            self.load()
+
+        emails = list(emails)
+        unique = {}
+        for email in emails:
+            unique.setdefault(normalize_email(email), email)
+
+        found = {key: self._customers.get(key) for key in unique}
+        misses = [unique[key] for key, customer in found.items() if customer is None]
+        if misses:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(misses))) as executor:
+                for email, customer in zip(misses, executor.map(self._fetch, misses)):
+                    found[normalize_email(email)] = customer
+
+        return {email: found[normalize_email(email)] for email in emails}
+
+    def __len__(self) -> int:
+        return len(self._customers)
+
+    def __contains__(self, email: str) -> bool:
+        return normalize_email(email) in self._customers
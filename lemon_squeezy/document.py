@@ -0,0 +1,292 @@
+import itertools
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+_FIELDS = ('type', 'id', 'attributes', 'relationships', 'links', 'meta')
+
+
+class BaseResource:
+    """
+    The dict-style access and lazily created `related` map shared by ResourceObject and the compact models.
+    """
+
+    __slots__ = ()
+
+    @property
+    def loaded(self) -> bool:
+        """
+        Whether the attributes of the resource were returned, rather than only its type and ID.
+        """
+        return self.attributes is not None
+
+    @property
+    def related(self) -> Dict[str, Union['BaseResource', List['BaseResource'], None]]:
+        """
+        The related resources per relationship name, created on first use since most resources have none.
+        """
+        related = self._related
+        if related is None:
+            related = self._related = {}
+        return related
+
+    @related.setter
+    def related(self, related: Dict[str, Union['BaseResource', List['BaseResource'], None]]) -> None:
+        self._related = related
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in _FIELDS:
+            raise KeyError(key)
+        value = getattr(self, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return key in _FIELDS and getattr(self, key) is not None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self) -> Iterator[str]:
+        return (key for key in _FIELDS if getattr(self, key) is not None)
+
+    def to_dict(self) -> Dict:
+        """
+        Return the raw resource object.
+
+        Returns:
+            Dict: The resource object as returned by the API.
+        """
+        return {key: getattr(self, key) for key in self.keys()}
+
+    def __repr__(self) -> str:
+        return f'<{type(self).__name__} {self.type}:{self.id}>'
+
+
+class ResourceObject(BaseResource):
+    """
+    A JSON:API resource object linked into an object graph.
+
+    `related` maps each relationship whose linkage was returned (e.g. through
+    `include`) to the related ResourceObject, or a list of them. The raw
+    members stay reachable with dict-style access, e.g. `order['attributes']`.
+    """
+
+    __slots__ = _FIELDS + ('_related',)
+
+    def __init__(self, type: str, id: str, attributes: Optional[Dict] = None,
+                 relationships: Optional[Dict] = None, links: Optional[Dict] = None, meta: Optional[Dict] = None):
+        self.type = type
+        self.id = id
+        self.attributes = attributes
+        self.relationships = relationships
+        self.links = links
+        self.meta = meta
+        self._related = None
+
+    def update(self, payload: Dict) -> None:
+        """
+        Fill in the members of the resource from a raw resource object.
+
+        Args:
+            payload (Dict): The raw resource object.
+        """
+        self.attributes = payload.get('attributes')
+        self.relationships = payload.get('relationships')
+        self.links = payload.get('links')
+        self.meta = payload.get('meta')
+
+
+class IdentityMap:
+    """
+    Keeps exactly one ResourceObject per (type, id) while documents are resolved.
+    """
+
+    def __init__(self, factory=ResourceObject):
+        """
+        Initialize a new instance of IdentityMap.
+
+        Args:
+            factory (Callable, optional): Builds an empty ResourceObject from a type and an ID.
+        """
+        self.factory = factory
+        self._objects: Dict[Tuple[str, str], ResourceObject] = {}
+
+    def get(self, type: str, id: str) -> ResourceObject:
+        """
+        Return the object for a type and ID, creating an unloaded one if it is not known yet.
+
+        Args:
+            type (str): The resource type.
+            id (str): The resource ID.
+
+        Returns:
+            ResourceObject: The shared object.
+        """
+        key = (type, str(id))
+        obj = self._objects.get(key)
+        if obj is None:
+            obj = self._objects[key] = self.factory(type, str(id))
+        return obj
+
+    def add(self, payload: Dict) -> ResourceObject:
+        """
+        Register a raw resource object, filling in the shared object for its type and ID.
+
+        Args:
+            payload (Dict): The raw resource object.
+
+        Returns:
+            ResourceObject: The shared object.
+        """
+        obj = self.get(payload['type'], payload['id'])
+        obj.update(payload)
+        return obj
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return key in self._objects
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    def __iter__(self) -> Iterator[ResourceObject]:
+        return iter(self._objects.values())
+
+
+class Document(dict):
+    """
+    A JSON:API document whose primary data and `included` resources are resolved into an object graph.
+
+    The document is still the raw JSON dict, so existing code keeps working;
+    `primary` holds the resolved primary data.
+    """
+
+    def __init__(self, payload: Dict, identity_map: Optional[IdentityMap] = None):
+        """
+        Initialize a new instance of Document.
+
+        Args:
+            payload (Dict): The raw JSON:API document.
+            identity_map (IdentityMap, optional): The identity map to resolve into, to share objects
+                between documents.
+        """
+        super().__init__(payload)
+        self.identity_map = identity_map if identity_map is not None else IdentityMap()
+
+        data = payload.get('data')
+        included = [self.identity_map.add(resource) for resource in payload.get('included') or []]
+        if isinstance(data, list):
+            self.primary = [self.identity_map.add(resource) for resource in data]
+            objects = self.primary + included
+        elif data is not None:
+            self.primary = self.identity_map.add(data)
+            objects = [self.primary] + included
+        else:
+            self.primary = None
+            objects = included
+
+        for obj in objects:
+            _link(obj, self.identity_map)
+
+    def find(self, type: str, id: str) -> Optional[ResourceObject]:
+        """
+        Look up a resource of the document by type and ID.
+
+        Args:
+            type (str): The resource type.
+            id (str): The resource ID.
+
+        Returns:
+            ResourceObject: The resource, or None if the document does not contain it.
+        """
+        if (type, str(id)) not in self.identity_map:
+            return None
+        return self.identity_map.get(type, id)
+
+
+def _link(obj: ResourceObject, identity_map: IdentityMap) -> None:
+    for name, relationship in (obj.relationships or {}).items():
+        if not isinstance(relationship, dict) or 'data' not in relationship:
+            continue
+        linkage = relationship['data']
+        if linkage is None:
+            obj.related[name] = None
+        elif isinstance(linkage, list):
+            obj.related[name] = [identity_map.get(item['type'], item['id']) for item in linkage]
+        else:
+            obj.related[name] = identity_map.get(linkage['type'], linkage['id'])
+
+
+def resolve_document(payload: Dict) -> Document:
+    """
+    Resolve a JSON:API document into an identity-mapped object graph.
+
+    Args:
+        payload (Dict): The raw JSON:API document.
+
+    Returns:
+        Document: The resolved document.
+    """
+    return Document(payload)
+
+
+def include_param(include: Union[str, Iterable[str]]) -> str:
+    """
+    Build the value of the `include` query parameter.
+
+    Args:
+        include (str or Iterable[str]): The relationship paths to include.
+
+    Returns:
+        str: The comma separated relationship paths.
+    """
+    if isinstance(include, str):
+        return include
+    return ','.join(include)
+
+
+def fields_params(fields: Dict[str, Union[str, Iterable[str]]]) -> Dict[str, str]:
+    """
+    Build the sparse fieldset query parameters, e.g. `fields[orders]=status,total`.
+
+    Args:
+        fields (Dict[str, str or Iterable[str]]): The fields to return, keyed by resource type.
+
+    Returns:
+        Dict[str, str]: The query parameters.
+    """
+    return {f'fields[{type}]': include_param(names) for type, names in fields.items()}
+
+
+def project_document(payload: Dict, fields: Dict[str, Union[str, Iterable[str]]]) -> Dict:
+    """
+    Drop the attributes and relationships not listed in `fields` from a decoded document.
+
+    This trims the decoded payload even if the API ignored the sparse
+    fieldset. Resources of types missing from `fields` are left untouched.
+
+    Args:
+        payload (Dict): The decoded JSON:API document.
+        fields (Dict[str, str or Iterable[str]]): The fields to keep, keyed by resource type.
+
+    Returns:
+        Dict: The same document, projected.
+    """
+    if not isinstance(payload, dict):
+        return payload
+
+    keep = {type: set(names.split(',') if isinstance(names, str) else names) for type, names in fields.items()}
+    data = payload.get('data')
+    resources = data if isinstance(data, list) else [data] if data is not None else []
+    for resource in itertools.chain(resources, payload.get('included') or []):
+        names = keep.get(resource.get('type'))
+        if names is None:
+            continue
+        if resource.get('attributes') is not None:
+            resource['attributes'] = {name: value for name, value in resource['attributes'].items() if name in names}
+        if resource.get('relationships') is not None:
+            resource['relationships'] = {name: value for name, value in resource['relationships'].items()
+                                         if name in names}
+    return payload
@@ -0,0 +1,95 @@
+from typing import Any, Dict, List, Optional
+
+
+class LemonSqueezyError(Exception):
+    """
+    Base class for all errors raised by this package.
+    """
+
+
+class TransportError(LemonSqueezyError):
+    """
+    The request could not be completed, e.g. because of a timeout or a broken connection.
+    """
+
+
+class APIError(LemonSqueezyError):
+    """
+    The API answered with an error status code.
+    """
+
+    def __init__(self, status_code: int, errors: Optional[List[Dict[str, Any]]] = None,
+                 url: Optional[str] = None):
+        """
+        Initialize a new instance of APIError.
+
+        Args:
+            status_code (int): The HTTP status code.
+            errors (List[Dict], optional): The JSON:API `errors` member of the response.
+            url (str, optional): The URL of the failed request.
+        """
+        self.status_code = status_code
+        self.errors = errors or []
+        self.url = url
+
+        details = '; '.join(error.get('detail') or error.get('title') or '' for error in self.errors)
+        message = f'{status_code} error for {url}' if url else f'{status_code} error'
+        super().__init__(f'{message}: {details}' if details else message)
+
+
+class AuthenticationError(APIError):
+    """
+    The API key is missing, invalid or not allowed to access the resource (401/403).
+    """
+
+
+class NotFoundError(APIError):
+    """
+    The requested resource does not exist (404).
+    """
+
+
+class ValidationError(APIError):
+    """
+    The request was rejected as invalid (400/422).
+    """
+
+
+class RateLimitError(APIError):
+    """
+    The rate limit was still exceeded after all retries (429).
+    """
+
+
+class ServerError(APIError):
+    """
+    The API failed to handle the request (5xx).
+    """
+
+
+def error_for_status(status_code: int, errors: Optional[List[Dict[str, Any]]] = None,
+                     url: Optional[str] = None) -> APIError:
+    """
+    Build the most specific APIError for a status code.
+
+    Args:
+        status_code (int): The HTTP status code.
+        errors (List[Dict], optional): The JSON:API `errors` member of the response.
+        url (str, optional): The URL of the failed request.
+
+    Returns:
+        APIError: The error to raise.
+    """
+    if status_code in (401, 403):
+        cls = AuthenticationError
+    elif status_code == 404:
+        cls = NotFoundError
+    elif status_code in (400, 422):
+        cls = ValidationError
+    elif status_code == 429:
+        cls = RateLimitError
+    elif status_code >= 500:
+        cls = ServerError
+    else:
+        cls = APIError
+    return cls(status_code, errors, url)
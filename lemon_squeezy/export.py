@@ -0,0 +1,332 @@
+import csv
+import json
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+from .codec import DEFAULT_CODEC, JSONCodec
+from .document import fields_params
+from .models import MODELS
+from .pagination import iter_pages, prefetch_pages
+from .pipeline import Pipeline
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pyarrow is only needed for Parquet exports
+    pyarrow = None
+
+# The list endpoint of every resource type that can be exported
+EXPORTS = {
+    'orders': '/v1/orders',
+    'subscriptions': '/v1/subscriptions',
+    'customers': '/v1/customers',
+    'products': '/v1/products',
+    'variants': '/v1/variants',
+}
+FORMATS = ('ndjson', 'csv', 'parquet')
+
+
+class ExportStats:
+    """
+    Progress and throughput of an export.
+    """
+
+    def __init__(self, records: int = 0, pages: int = 0):
+        """
+        Initialize a new instance of ExportStats.
+
+        Args:
+            records (int, optional): The number of records already written, e.g. before a resume.
+            pages (int, optional): The number of pages already written.
+        """
+        self.records = records
+        self.pages = pages
+        self.resumed_records = records
+        self.started_at = time.monotonic()
+        self.finished = False
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    @property
+    def records_per_second(self) -> float:
+        """
+        The number of records written per second by this run, excluding resumed ones.
+        """
+        elapsed = self.elapsed
+        return (self.records - self.resumed_records) / elapsed if elapsed > 0 else 0.0
+
+    def __repr__(self) -> str:
+        return (f'<ExportStats records={self.records} pages={self.pages} '
+                f'elapsed={self.elapsed:.1f}s rate={self.records_per_second:.0f}/s>')
+
+
+class NDJSONWriter:
+    """
+    Writes one raw resource object per line.
+    """
+
+    def __init__(self, path: str, columns: List[str], codec: JSONCodec = DEFAULT_CODEC):
+        self.path = path
+        self.codec = codec
+        self.file = open(path, 'ab')
+
+    def truncate(self, position: int) -> None:
+        self.file.truncate(position)
+        self.file.seek(position)
+
+    def write(self, resources: List[Dict]) -> None:
+        encode = self.codec.encode
+        self.file.write(b''.join(encode(resource) + b'\n' for resource in resources))
+
+    def flush(self) -> int:
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class CSVWriter:
+    """
+    Writes one row per resource: its ID followed by the given attribute columns.
+
+    Nested attributes (e.g. `urls`) are written as JSON.
+    """
+
+    def __init__(self, path: str, columns: List[str], codec: JSONCodec = DEFAULT_CODEC):
+        self.path = path
+        self.columns = columns
+        self.codec = codec
+        self.file = open(path, 'a', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+
+    def truncate(self, position: int) -> None:
+        self.file.truncate(position)
+        self.file.seek(position)
+        if position == 0:
+            self.writer.writerow(['id'] + self.columns)
+
+    def write(self, resources: List[Dict]) -> None:
+        self.writer.writerows(flatten(resource, self.columns, self.codec) for resource in resources)
+
+    def flush(self) -> int:
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class ParquetWriter:
+    """
+    Writes a directory of Parquet files, one per checkpoint, with one column per attribute.
+
+    The column types are inferred from the first batch and reused for every
+    later file; nested attributes are written as JSON strings.
+    """
+
+    def __init__(self, path: str, columns: List[str], codec: JSONCodec = DEFAULT_CODEC):
+        if pyarrow is None:
+            raise ImportError('Parquet exports require the pyarrow package')
+        self.path = path
+        self.columns = columns
+        self.codec = codec
+        self.schema = None
+        self.parts = 0
+        self.rows: List[List[Any]] = []
+        os.makedirs(path, exist_ok=True)
+
+    def _part_path(self, number: int) -> str:
+        return os.path.join(self.path, f'part-{number:05d}.parquet')
+
+    def truncate(self, position: int) -> None:
+        # Drop the files written after the checkpoint
+        number = position
+        while os.path.exists(self._part_path(number)):
+            os.remove(self._part_path(number))
+            number += 1
+        self.parts = position
+        if position:
+            self.schema = pyarrow.parquet.read_schema(self._part_path(0))
+
+    def write(self, resources: List[Dict]) -> None:
+        self.rows.extend(flatten(resource, self.columns, self.codec) for resource in resources)
+
+    def flush(self) -> int:
+        if self.rows:
+            names = ['id'] + self.columns
+            columns = list(zip(*self.rows))
+            if self.schema is None:
+                table = pyarrow.table(dict(zip(names, columns)))
+                # Columns that were empty in the first batch can't be typed, keep them as strings
+                self.schema = pyarrow.schema([
+                    pyarrow.field(field.name, pyarrow.string()) if pyarrow.types.is_null(field.type) else field
+                    for field in table.schema
+                ])
+            table = pyarrow.table(dict(zip(names, columns)), schema=self.schema)
+            pyarrow.parquet.write_table(table, self._part_path(self.parts))
+            self.parts += 1
+            self.rows = []
+        return self.parts
+
+    def close(self) -> None:
+        self.rows = []
+
+
+WRITERS = {
+    'ndjson': NDJSONWriter,
+    'csv': CSVWriter,
+    'parquet': ParquetWriter,
+}
+
+
+def flatten(resource: Dict, columns: List[str], codec: JSONCodec = DEFAULT_CODEC) -> List[Any]:
+    """
+    Turn a resource object into a row of its ID and attribute values.
+
+    Args:
+        resource (Dict): The raw resource object.
+        columns (List[str]): The attributes to include, in order.
+        codec (JSONCodec, optional): Encodes nested attributes as JSON strings.
+
+    Returns:
+        List[Any]: The row.
+    """
+    attributes = resource.get('attributes') or {}
+    row = [resource['id']]
+    for column in columns:
+        value = attributes.get(column)
+        if isinstance(value, (dict, list)):
+            value = codec.encode(value).decode('utf-8')
+        row.append(value)
+    return row
+
+
+def _split_link(link: str) -> Tuple[str, Dict[str, str]]:
+    # A `links.next` URL -> its path and query parameters, so pages can be requested by number
+    parts = urlsplit(link)
+    return f'{parts.scheme}://{parts.netloc}{parts.path}', dict(parse_qsl(parts.query))
+
+
+def _read_checkpoint(path: str) -> Optional[Dict]:
+    try:
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def _write_checkpoint(path: str, checkpoint: Dict) -> None:
+    # Written to a temporary file and renamed, so a crash never leaves a partial checkpoint
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as file:
+        json.dump(checkpoint, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+def export(pipeline: Pipeline, resource: str, output: str, format: str = 'ndjson',
+           filters: Optional[Dict[str, Any]] = None, columns: Optional[Iterable[str]] = None,
+           page_size: int = 100, concurrency: int = 1, checkpoint: Optional[str] = None,
+           checkpoint_every: int = 10, on_progress: Optional[Callable[[ExportStats], None]] = None) -> ExportStats:
+    """
+    Stream every resource of a type into a NDJSON, CSV or Parquet file with constant memory.
+
+    Pages are written as they arrive, so only the pages in flight and the
+    ones since the last checkpoint are held in memory. Every `checkpoint_every`
+    pages the output is synced to disk and the cursor of the next page is
+    saved to the checkpoint file; running the same export again with the same
+    checkpoint resumes after the last checkpointed page instead of starting
+    over.
+
+    Args:
+        pipeline (Pipeline): The pipeline to send requests through, e.g. `LemonSqueezy(...).pipeline`.
+        resource (str): The resource type to export, one of EXPORTS.
+        output (str): The output file, or directory for Parquet.
+        format (str, optional): 'ndjson' (raw resource objects), 'csv' or 'parquet' (one column per attribute).
+        filters (Dict[str, Any], optional): The list filters, e.g. {'store_id': 1}.
+        columns (Iterable[str], optional): The attributes to export; also requested as a sparse fieldset.
+            Defaults to every known attribute of the resource type.
+        page_size (int, optional): The number of resources per page.
+        concurrency (int, optional): The number of pages fetched concurrently.
+        checkpoint (str, optional): The checkpoint file; None disables resuming.
+        checkpoint_every (int, optional): The number of pages between checkpoints.
+        on_progress (Callable[[ExportStats], None], optional): Called after every checkpoint.
+
+    Returns:
+        ExportStats: The number of records written and the throughput.
+    """
+    if resource not in EXPORTS:
+        raise ValueError(f'Unknown resource {resource!r}, expected one of {", ".join(EXPORTS)}')
+    if format not in WRITERS:
+        raise ValueError(f'Unknown format {format!r}, expected one of {", ".join(FORMATS)}')
+
+    path = EXPORTS[resource]
+    params = {f'filter[{name}]': value for name, value in (filters or {}).items()}
+    if columns is not None:
+        columns = list(columns)
+        params.update(fields_params({resource: columns}))
+    else:
+        columns = list(MODELS[resource].fields) if resource in MODELS else []
+
+    state = _read_checkpoint(checkpoint) if checkpoint else None
+    if state is not None and (state.get('resource'), state.get('format'), state.get('output')) != \
+            (resource, format, output):
+        raise ValueError(f'Checkpoint {checkpoint} belongs to a different export')
+
+    stats = ExportStats(state['records'], state['pages']) if state else ExportStats()
+    if state is not None and state['next'] is None:
+        stats.finished = True
+        return stats
+
+    writer = WRITERS[format](output, columns, pipeline.codec)
+    try:
+        writer.truncate(state['position'] if state else 0)
+        if state:
+            path, params = _split_link(state['next'])
+            page_size = None
+
+        if concurrency > 1:
+            pages = prefetch_pages(pipeline, path, params, page_size, concurrency)
+        else:
+            pages = iter_pages(pipeline, path, params, page_size)
+
+        since_checkpoint = 0
+        for page in pages:
+            resources = page.get('data') or []
+            writer.write(resources)
+            stats.records += len(resources)
+            stats.pages += 1
+            next_link = (page.get('links') or {}).get('next')
+            since_checkpoint += 1
+            if since_checkpoint >= checkpoint_every or next_link is None:
+                _checkpoint(writer, checkpoint, resource, format, output, next_link, stats)
+                since_checkpoint = 0
+                if on_progress is not None:
+                    on_progress(stats)
+    finally:
+        writer.close()
+
+    stats.finished = True
+    return stats
+
+
+def _checkpoint(writer, checkpoint: Optional[str], resource: str, format: str, output: str,
+                next_link: Optional[str], stats: ExportStats) -> None:
+    position = writer.flush()
+    if checkpoint:
+        _write_checkpoint(checkpoint, {
+            'resource': resource,
+            'format': format,
+            'output': output,
+            'next': next_link,
+            'position': position,
+            'records': stats.records,
+            'pages': stats.pages,
+        })
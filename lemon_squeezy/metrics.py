@@ -0,0 +1,440 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, ContextManager, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from .pipeline import Request, Response
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # opentelemetry is only needed for opentelemetry_tracer
+    otel_trace = None
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Starts a span for a call: called with the span name and its attributes, returns a context manager
+Tracer = Callable[[str, Dict[str, Any]], ContextManager]
+
+
+def endpoint_label(method: str, path: str) -> str:
+    """
+    Build the label of the endpoint a request goes to, with the resource ID replaced by a placeholder.
+
+    Args:
+        method (str): The HTTP method.
+        path (str): The path or absolute URL of the request.
+
+    Returns:
+        str: The endpoint, e.g. 'GET /v1/orders/{id}'.
+    """
+    segments = urlsplit(path).path.strip('/').split('/')
+    if len(segments) > 2:
+        segments[2] = '{id}'
+    return f'{method} /{"/".join(segments)}'
+
+
+class Histogram:
+    """
+    Counts of observed values per bucket, with their sum, as in a Prometheus histogram.
+    """
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        # One count per bucket and one for values above the last bound, not cumulative
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile as the upper bound of the bucket it falls in.
+
+        Args:
+            q (float): The quantile, e.g. 0.99.
+
+        Returns:
+            float: The bucket bound, infinity if it is above the last one, or 0.0 without observations.
+        """
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            seen += count
+            if count and seen >= rank:
+                return bound
+        return 0.0
+
+
+class CallRecord:
+    """
+    The measurements of one API call, passed to the callbacks of Metrics.
+    """
+
+    __slots__ = ('endpoint', 'resource_id', 'status', 'duration', 'request_bytes', 'response_bytes', 'cache',
+                 'coalesced', 'error')
+
+    def __init__(self, endpoint: str, resource_id: Optional[str], status: str, duration: float,
+                 request_bytes: int, response_bytes: int, cache: Optional[str], coalesced: bool,
+                 error: Optional[BaseException]):
+        self.endpoint = endpoint
+        self.resource_id = resource_id
+        # The HTTP status code, or 'error' if no response was received
+        self.status = status
+        self.duration = duration
+        self.request_bytes = request_bytes
+        self.response_bytes = response_bytes
+        # 'hit', 'miss', 'stale' or 'revalidated' for calls seen by CacheMiddleware
+        self.cache = cache
+        self.coalesced = coalesced
+        self.error = error
+
+    def __repr__(self) -> str:
+        return f'<CallRecord {self.endpoint} {self.status} {self.duration * 1000:.1f}ms>'
+
+
+class Metrics:
+    """
+    Counters, latency histograms and in-flight gauges of the API calls, per endpoint.
+
+    Metrics are recorded by MetricsMiddleware and the retry hook of the
+    session, see `instrument`. They can be read with `render` in the
+    Prometheus text format, served with `make_server`, or consumed through
+    callbacks receiving a CallRecord per call. Setting `enabled` to False
+    turns recording off while the middleware stays installed.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, prefix: str = 'lemon_squeezy',
+                 callbacks: Optional[List[Callable[[CallRecord], Any]]] = None):
+        """
+        Initialize a new instance of Metrics.
+
+        Args:
+            buckets (Tuple[float, ...], optional): The upper bounds of the latency buckets in seconds.
+            prefix (str, optional): The prefix of the metric names.
+            callbacks (List[Callable[[CallRecord], Any]], optional): Called with the record of every call.
+        """
+        self.enabled = True
+        self.buckets = buckets
+        self.prefix = prefix
+        self.callbacks = list(callbacks or [])
+        self.requests: Dict[Tuple[str, str], int] = {}
+        self.latency: Dict[str, Histogram] = {}
+        self.request_bytes: Dict[str, int] = {}
+        self.response_bytes: Dict[str, int] = {}
+        self.retries: Dict[Tuple[str, str], int] = {}
+        self.cache: Dict[Tuple[str, str], int] = {}
+        self.coalesced: Dict[str, int] = {}
+        self.in_flight: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def started(self, endpoint: str) -> None:
+        with self._lock:
+            self.in_flight[endpoint] = self.in_flight.get(endpoint, 0) + 1
+
+    def record(self, record: CallRecord) -> None:
+        """
+        Record a finished call and pass it to the callbacks.
+
+        Callbacks run while the call returns, so an exception raised by one is
+        logged rather than replacing the call's response or error.
+
+        Args:
+            record (CallRecord): The measurements of the call.
+        """
+        endpoint = record.endpoint
+        with self._lock:
+            self.in_flight[endpoint] -= 1
+            key = (endpoint, record.status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            histogram = self.latency.get(endpoint)
+            if histogram is None:
+                histogram = self.latency[endpoint] = Histogram(self.buckets)
+            histogram.observe(record.duration)
+            self.request_bytes[endpoint] = self.request_bytes.get(endpoint, 0) + record.request_bytes
+            self.response_bytes[endpoint] = self.response_bytes.get(endpoint, 0) + record.response_bytes
+            if record.cache is not None:
+                key = (endpoint, record.cache)
+                self.cache[key] = self.cache.get(key, 0) + 1
+            if record.coalesced:
+                self.coalesced[endpoint] = self.coalesced.get(endpoint, 0) + 1
+        for callback in self.callbacks:
+            try:
+                callback(record)
+            except Exception:
+                logger.exception('Metrics callback %r failed', callback)
+
+    def record_retry(self, method: str, url: str, reason: str) -> None:
+        """
+        Count a retry; installed as the `on_retry` hook of the session.
+
+        Args:
+            method (str): The HTTP method.
+            url (str): The URL of the request.
+            reason (str): Why it is retried: 'connect', 'connection', 'rate_limited' or 'status'.
+        """
+        if not self.enabled:
+            return
+        key = (endpoint_label(method.upper(), url), reason)
+        with self._lock:
+            self.retries[key] = self.retries.get(key, 0) + 1
+
+    def reset(self) -> None:
+        """
+        Clear every metric except the in-flight gauges.
+        """
+        with self._lock:
+            for values in (self.requests, self.latency, self.request_bytes, self.response_bytes, self.retries,
+                           self.cache, self.coalesced):
+                values.clear()
+
+    def render(self) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics page.
+        """
+        lines: List[str] = []
+        prefix = self.prefix
+
+        def family(name: str, kind: str, help: str, samples: List[Tuple[str, Dict[str, str], Any]]) -> None:
+            lines.append(f'# HELP {prefix}_{name} {help}')
+            lines.append(f'# TYPE {prefix}_{name} {kind}')
+            for suffix, labels, value in samples:
+                lines.append(f'{prefix}_{name}{suffix}{_labels(labels)} {_number(value)}')
+
+        with self._lock:
+            family('requests_total', 'counter', 'API calls by endpoint and HTTP status.', [
+                ('', {'endpoint': endpoint, 'status': status}, count)
+                for (endpoint, status), count in sorted(self.requests.items())
+            ])
+            samples = []
+            for endpoint, histogram in sorted(self.latency.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (float('inf'),), histogram.counts):
+                    cumulative += count
+                    samples.append(('_bucket', {'endpoint': endpoint, 'le': _number(bound)}, cumulative))
+                samples.append(('_sum', {'endpoint': endpoint}, histogram.sum))
+                samples.append(('_count', {'endpoint': endpoint}, histogram.count))
+            family('request_duration_seconds', 'histogram', 'Latency of the API calls.', samples)
+            family('request_bytes_total', 'counter', 'Bytes of request bodies sent.', [
+                ('', {'endpoint': endpoint}, count) for endpoint, count in sorted(self.request_bytes.items())
+            ])
+            family('response_bytes_total', 'counter', 'Bytes of response bodies received.', [
+                ('', {'endpoint': endpoint}, count) for endpoint, count in sorted(self.response_bytes.items())
+            ])
+            family('retries_total', 'counter', 'Retried requests by reason.', [
+                ('', {'endpoint': endpoint, 'reason': reason}, count)
+                for (endpoint, reason), count in sorted(self.retries.items())
+            ])
+            family('cache_total', 'counter', 'Cache lookups by result.', [
+                ('', {'endpoint': endpoint, 'result': result}, count)
+                for (endpoint, result), count in sorted(self.cache.items())
+            ])
+            family('coalesced_total', 'counter', 'Calls answered by a concurrent identical request.', [
+                ('', {'endpoint': endpoint}, count) for endpoint, count in sorted(self.coalesced.items())
+            ])
+            family('in_flight', 'gauge', 'API calls in progress.', [
+                ('', {'endpoint': endpoint}, count) for endpoint, count in sorted(self.in_flight.items())
+            ])
+        return '\n'.join(lines) + '\n'
+
+    def make_server(self, host: str = '0.0.0.0', port: int = 9100) -> ThreadingHTTPServer:
+        """
+        Create an HTTP server answering every GET with the metrics page, for Prometheus to scrape.
+
+        Args:
+            host (str, optional): The address to listen on.
+            port (int, optional): The port to listen on.
+
+        Returns:
+            ThreadingHTTPServer: The server; call `serve_forever()` on it, e.g. in a daemon thread.
+        """
+        metrics = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return ThreadingHTTPServer((host, port), RequestHandler)
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value: Any) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class MetricsMiddleware:
+    """
+    Pipeline middleware measuring every call into a Metrics, optionally inside a trace span.
+
+    Install it as the outermost middleware, see `instrument`, so that calls
+    answered by the cache or by coalescing are measured too.
+    """
+
+    def __init__(self, metrics: Optional[Metrics] = None, tracer: Optional[Tracer] = None):
+        """
+        Initialize a new instance of MetricsMiddleware.
+
+        Args:
+            metrics (Metrics, optional): Where to record the calls, a new Metrics by default.
+            tracer (Tracer, optional): Starts a span per call, e.g. `opentelemetry_tracer()`.
+        """
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.tracer = tracer
+
+    def _start(self, request: Request) -> Tuple[str, Any]:
+        endpoint = endpoint_label(request.method, request.path)
+        self.metrics.started(endpoint)
+        span = None
+        if self.tracer is not None:
+            context = self.tracer(endpoint, {
+                'http.request.method': request.method,
+                'lemon_squeezy.resource': request.resource or '',
+                'lemon_squeezy.resource_id': request.resource_id or '',
+            })
+            span = (context, context.__enter__())
+        return endpoint, span
+
+    def _finish(self, request: Request, endpoint: str, span: Any, started_at: float, response: Optional[Response],
+                error: Optional[BaseException]) -> None:
+        duration = time.perf_counter() - started_at
+        status = str(response.status_code) if response is not None else 'error'
+        cache = request.context.get('cache')
+        self.metrics.record(CallRecord(
+            endpoint, request.resource_id, status, duration, request.context.get('request_bytes', 0),
+            len(response.content) if response is not None and response.content else 0, cache,
+            request.context.get('coalesced', False), error,
+        ))
+        if span is not None:
+            context, entered = span
+            if hasattr(entered, 'set_attribute'):
+                entered.set_attribute('http.response.status_code', status)
+                if cache is not None:
+                    entered.set_attribute('lemon_squeezy.cache', cache)
+            if error is None:
+                context.__exit__(None, None, None)
+            else:
+                context.__exit__(type(error), error, error.__traceback__)
+
+    def __call__(self, request: Request, call_next: Callable) -> Response:
+        if not self.metrics.enabled:
+            return call_next(request)
+        endpoint, span = self._start(request)
+        started_at = time.perf_counter()
+        response = error = None
+        try:
+            response = call_next(request)
+            return response
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._finish(request, endpoint, span, started_at, response, error)
+
+
+class AsyncMetricsMiddleware(MetricsMiddleware):
+    """
+    MetricsMiddleware for AsyncLemonSqueezy.
+    """
+
+    async def __call__(self, request: Request, call_next: Callable) -> Response:
+        if not self.metrics.enabled:
+            return await call_next(request)
+        endpoint, span = self._start(request)
+        started_at = time.perf_counter()
+        response = error = None
+        try:
+            response = await call_next(request)
+            return response
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._finish(request, endpoint, span, started_at, response, error)
+
+
+def instrument(client, metrics: Optional[Metrics] = None, tracer: Optional[Tracer] = None) -> Metrics:
+    """
+    Measure every call of a client: installs the metrics middleware outermost and counts the session's retries.
+
+    The retry hook is chained after any hook already installed, so clients
+    sharing a session, e.g. the tenants of a LemonSqueezyPool, each keep
+    counting; retries can't be told apart per client, so every Metrics on a
+    shared session counts the retries of all of them.
+
+    Args:
+        client (LemonSqueezy or AsyncLemonSqueezy): The client to instrument.
+        metrics (Metrics, optional): Where to record, e.g. one Metrics shared by several clients.
+        tracer (Tracer, optional): Starts a span per call, e.g. `opentelemetry_tracer()`.
+
+    Returns:
+        Metrics: The metrics the client records into.
+    """
+    metrics = metrics if metrics is not None else Metrics()
+    if hasattr(client.pipeline, 'client'):
+        client.pipeline.use(AsyncMetricsMiddleware(metrics, tracer), outermost=True)
+        client.on_retry = _chain(client.on_retry, metrics.record_retry)
+    else:
+        client.pipeline.use(MetricsMiddleware(metrics, tracer), outermost=True)
+        client.session.on_retry = _chain(client.session.on_retry, metrics.record_retry)
+    return metrics
+
+
+def _chain(previous: Optional[Callable[[str, str, str], None]],
+           hook: Callable[[str, str, str], None]) -> Callable[[str, str, str], None]:
+    # A retry hook calling the one already installed, then the new one
+    if previous is None or previous == hook:
+        return hook
+
+    def on_retry(method: str, url: str, reason: str) -> None:
+        previous(method, url, reason)
+        hook(method, url, reason)
+    return on_retry
+
+
+def opentelemetry_tracer(tracer=None) -> Tracer:
+    """
+    Build a Tracer starting OpenTelemetry client spans.
+
+    Args:
+        tracer (opentelemetry.trace.Tracer, optional): The tracer to use, the global one by default.
+
+    Returns:
+        Tracer: The tracer for MetricsMiddleware.
+    """
+    if otel_trace is None:
+        raise ImportError('opentelemetry_tracer requires the opentelemetry-api package')
+    tracer = tracer if tracer is not None else otel_trace.get_tracer('lemon_squeezy')
+    return lambda name, attributes: tracer.start_as_current_span(name, kind=otel_trace.SpanKind.CLIENT,
+                                                                 attributes=attributes)
@@ -0,0 +1,250 @@
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from .export import EXPORTS
+from .pagination import iter_changed_pages
+from .pipeline import Pipeline
+
+
+class Mirror:
+    """
+    Local SQLite mirror of the API, kept up to date from `updated_at`.
+
+    The first sync of a resource type loads every record. Later syncs ask for
+    records newest first (`sort=-updated_at`) and stop after the first page
+    that goes past the (`updated_at`, ID) high-water mark of the previous
+    sync, so only the changes are fetched. This assumes the API honours the
+    sort: records found out of order make the sync read every page, but a
+    sort that is ignored in a way that still looks ordered would hide older
+    records changed since. Run a full sync from time to time, which is also
+    the only way deletions are picked up.
+
+    Reads are served from indexed local tables, one connection per thread.
+    """
+
+    def __init__(self, pipeline: Pipeline, path: str):
+        """
+        Initialize a new instance of Mirror.
+
+        Args:
+            pipeline (Pipeline): The pipeline to send requests through, e.g. `LemonSqueezy(...).pipeline`.
+            path (str): The path of the database file.
+        """
+        self.pipeline = pipeline
+        self.path = path
+        self.codec = pipeline.codec
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS resources ('
+                ' type TEXT, id TEXT, store_id TEXT, updated_at TEXT, data BLOB, PRIMARY KEY (type, id))'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS resources_updated_at ON resources (type, updated_at)')
+            connection.execute('CREATE INDEX IF NOT EXISTS resources_store_id ON resources (type, store_id)')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS sync_state ('
+                ' type TEXT, scope TEXT, updated_at TEXT, id TEXT, synced_at REAL, PRIMARY KEY (type, scope))'
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread, since sqlite3 connections cannot be shared across threads
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30.0)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+        return connection
+
+    def high_water(self, resource: str, filters: Optional[Dict[str, Any]] = None) -> Optional[Tuple[str, str]]:
+        """
+        Return the high-water mark of the last sync.
+
+        Args:
+            resource (str): The resource type.
+            filters (Dict[str, Any], optional): The filters the sync was run with.
+
+        Returns:
+            Tuple[str, str]: The newest `updated_at` seen and the ID of that record, or None before the first sync.
+        """
+        row = self._connection().execute(
+            'SELECT updated_at, id FROM sync_state WHERE type = ? AND scope = ?', (resource, _scope(filters))
+        ).fetchone()
+        return tuple(row) if row is not None else None
+
+    def sync(self, resource: str, filters: Optional[Dict[str, Any]] = None, page_size: int = 100,
+             full: bool = False) -> int:
+        """
+        Fetch the records changed since the last sync into the mirror.
+
+        Args:
+            resource (str): The resource type, e.g. 'subscriptions'.
+            filters (Dict[str, Any], optional): The list filters, e.g. {'store_id': 1}. Each set of filters
+                keeps its own high-water mark.
+            page_size (int, optional): The number of records per page.
+            full (bool, optional): Load every record again, and drop local records the API no longer returns.
+
+        Returns:
+            int: The number of records written.
+        """
+        if resource not in EXPORTS:
+            raise ValueError(f'Unknown resource {resource!r}, expected one of {", ".join(EXPORTS)}')
+
+        scope = _scope(filters)
+        params = {f'filter[{name}]': value for name, value in (filters or {}).items()}
+        mark = None if full else self.high_water(resource, filters)
+
+        newest = mark
+        seen = set() if full else None
+        written = 0
+        pages = iter_changed_pages(self.pipeline, EXPORTS[resource], params, mark, page_size)
+        for page in pages:
+            rows = []
+            for record in page.get('data') or []:
+                attributes = record.get('attributes') or {}
+                key = (attributes.get('updated_at') or '', record['id'])
+                if newest is None or key > newest:
+                    newest = key
+                if seen is not None:
+                    seen.add(record['id'])
+                rows.append(self._row(resource, record))
+            self._upsert(rows)
+            written += len(rows)
+
+        with self._connection() as connection:
+            if seen is not None and not filters:
+                self._delete_missing(connection, resource, seen)
+            if newest is not None:
+                connection.execute(
+                    'INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?, ?)',
+                    (resource, scope, newest[0], newest[1], time.time())
+                )
+        return written
+
+    def sync_all(self, resources: Optional[Iterable[str]] = None, filters: Optional[Dict[str, Any]] = None,
+                 page_size: int = 100) -> Dict[str, int]:
+        """
+        Sync several resource types.
+
+        Args:
+            resources (Iterable[str], optional): The resource types, every exportable type by default.
+            filters (Dict[str, Any], optional): The list filters applied to every type.
+            page_size (int, optional): The number of records per page.
+
+        Returns:
+            Dict[str, int]: The number of records written per resource type.
+        """
+        return {resource: self.sync(resource, filters, page_size) for resource in (resources or EXPORTS)}
+
+    def put(self, *records: Dict) -> None:
+        """
+        Write records received outside of a sync, e.g. from webhooks, into the mirror.
+
+        A record older than the mirrored one is ignored. The high-water marks
+        are left alone, so the next sync still fetches everything it missed.
+
+        Args:
+            *records (Dict): The resource objects.
+        """
+        self._upsert([self._row(record['type'], record) for record in records])
+
+    def _row(self, resource: str, record: Dict) -> Tuple:
+        attributes = record.get('attributes') or {}
+        store_id = attributes.get('store_id')
+        return (resource, str(record['id']), str(store_id) if store_id is not None else None,
+                attributes.get('updated_at') or '', self.codec.encode(record))
+
+    def _upsert(self, rows: List[Tuple]) -> None:
+        with self._connection() as connection:
+            connection.executemany(
+                'INSERT INTO resources VALUES (?, ?, ?, ?, ?) ON CONFLICT (type, id) DO UPDATE SET'
+                ' store_id = excluded.store_id, updated_at = excluded.updated_at, data = excluded.data'
+                ' WHERE excluded.updated_at >= resources.updated_at', rows
+            )
+
+    def _delete_missing(self, connection: sqlite3.Connection, resource: str, seen: set) -> None:
+        ids = [row[0] for row in connection.execute('SELECT id FROM resources WHERE type = ?', (resource,))]
+        connection.executemany('DELETE FROM resources WHERE type = ? AND id = ?',
+                               [(resource, id) for id in ids if id not in seen])
+
+    def get(self, resource: str, id: Union[int, str]) -> Optional[Dict]:
+        """
+        Read a record from the mirror.
+
+        Args:
+            resource (str): The resource type.
+            id (int or str): The ID of the record.
+
+        Returns:
+            Dict: The resource object, or None if it is not mirrored.
+        """
+        row = self._connection().execute(
+            'SELECT data FROM resources WHERE type = ? AND id = ?', (resource, str(id))
+        ).fetchone()
+        return self.codec.decode(row[0]) if row is not None else None
+
+    def changed_since(self, resource: str, since: Union[str, datetime],
+                      store_id: Optional[Union[int, str]] = None) -> List[Dict]:
+        """
+        Read the records updated at or after a point in time, oldest first.
+
+        Args:
+            resource (str): The resource type.
+            since (str or datetime): The ISO 8601 timestamp, or a timezone-aware datetime.
+            store_id (int or str, optional): Only return records of this store.
+
+        Returns:
+            List[Dict]: The resource objects.
+        """
+        if isinstance(since, datetime):
+            since = _timestamp(since)
+        query = 'SELECT data FROM resources WHERE type = ? AND updated_at >= ?'
+        args = [resource, since]
+        if store_id is not None:
+            query += ' AND store_id = ?'
+            args.append(str(store_id))
+        rows = self._connection().execute(query + ' ORDER BY updated_at', args)
+        return [self.codec.decode(row[0]) for row in rows]
+
+    def iter(self, resource: str, store_id: Optional[Union[int, str]] = None) -> Iterator[Dict]:
+        """
+        Iterate over the mirrored records of a type.
+
+        Args:
+            resource (str): The resource type.
+            store_id (int or str, optional): Only return records of this store.
+
+        Yields:
+            Dict: Each resource object.
+        """
+        if store_id is None:
+            rows = self._connection().execute('SELECT data FROM resources WHERE type = ?', (resource,))
+        else:
+            rows = self._connection().execute('SELECT data FROM resources WHERE type = ? AND store_id = ?',
+                                              (resource, str(store_id)))
+        for row in rows:
+            yield self.codec.decode(row[0])
+
+    def count(self, resource: str) -> int:
+        """
+        Count the mirrored records of a type.
+
+        Args:
+            resource (str): The resource type.
+
+        Returns:
+            int: The number of records.
+        """
+        return self._connection().execute('SELECT COUNT(*) FROM resources WHERE type = ?', (resource,)).fetchone()[0]
+
+
+def _scope(filters: Optional[Dict[str, Any]]) -> str:
+    return '&'.join(f'{name}={value}' for name, value in sorted((filters or {}).items()))
+
+
+def _timestamp(value: datetime) -> str:
+    # The format used by the API, e.g. '2021-08-17T09:45:53.000000Z', which sorts as text
+    if value.utcoffset() is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
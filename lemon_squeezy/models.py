@@ -0,0 +1,319 @@
+import sys
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, Optional, Tuple, Type
+from .document import BaseResource, Document, IdentityMap
+
+_MISSING = object()
+_NO_DATA = object()
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parse an API timestamp such as '2021-08-17T09:45:53.000000Z'.
+
+    Args:
+        value (str, optional): The ISO 8601 timestamp.
+
+    Returns:
+        datetime: The timezone-aware datetime, or None if the value is empty.
+    """
+    if not value:
+        return None
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    return datetime.fromisoformat(value)
+
+
+def _compact_linkage(data: Any) -> Any:
+    if data is None:
+        return None
+    if isinstance(data, list):
+        return tuple((sys.intern(item['type']), item['id']) for item in data)
+    return sys.intern(data['type']), data['id']
+
+
+def _expand_linkage(data: Any) -> Any:
+    if data is None:
+        return None
+    if data and isinstance(data[0], tuple):
+        return [{'type': type, 'id': id} for type, id in data]
+    if not data:
+        return []
+    return {'type': data[0], 'id': data[1]}
+
+
+def _compact_links(links: Optional[Dict], type: str, id: str) -> Any:
+    # A plain {'self': '<prefix>/<id>'} is kept as its interned prefix, shared by every resource of the page
+    if not links or len(links) != 1:
+        return links
+    self_link = links.get('self')
+    if not isinstance(self_link, str) or not self_link.endswith(f'/{type}/{id}'):
+        return links
+    return sys.intern(self_link[:len(self_link) - len(id)])
+
+
+def _compact_relationships(relationships: Optional[Dict], links: Optional[Dict]) -> Any:
+    # Relationship links follow '<self>/<name>' and '<self>/relationships/<name>', so when they
+    # do, only the names and linkage are kept and the links are rebuilt on access.
+    if not relationships:
+        return relationships
+    self_link = (links or {}).get('self')
+    if not self_link:
+        return relationships
+
+    compact = []
+    for name, relationship in relationships.items():
+        expected = {'related': f'{self_link}/{name}', 'self': f'{self_link}/relationships/{name}'}
+        if not isinstance(relationship, dict) or relationship.get('links') != expected \
+                or not relationship.keys() <= {'links', 'data'}:
+            return relationships
+        linkage = _compact_linkage(relationship['data']) if 'data' in relationship else _NO_DATA
+        compact.append((sys.intern(name), linkage))
+    return tuple(compact)
+
+
+class Model(BaseResource):
+    """
+    Compact resource model.
+
+    Attributes are stored as a tuple in the order of the class's `fields`,
+    so the per-record dict and its key strings are not kept; unknown
+    attributes go to a small dict with interned keys. String values of the
+    low-cardinality `shared` fields (statuses, currencies, ...) are interned,
+    so records share one copy. Relationships are kept as names and linkage
+    only, a plain `links.self` as a prefix shared by the page, and `related`
+    is only created once used. Timestamps are parsed when read as
+    attributes. Dict-style access (`order['attributes']['total']`) still
+    returns the raw values.
+    """
+
+    __slots__ = ('type', 'id', 'meta', '_links', '_values', '_extra', '_relationships', '_related')
+
+    fields: Tuple[str, ...] = ()
+    shared: Tuple[str, ...] = ()
+    _index: Dict[str, int] = {}
+    _shared: FrozenSet[int] = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._index = {name: position for position, name in enumerate(cls.fields)}
+        cls._shared = frozenset(cls._index[name] for name in cls.shared)
+
+    def __init__(self, type: str, id: str, attributes: Optional[Dict] = None,
+                 relationships: Optional[Dict] = None, links: Optional[Dict] = None, meta: Optional[Dict] = None):
+        self.type = sys.intern(type)
+        self.id = id
+        self._related = None
+        self.update({'attributes': attributes, 'relationships': relationships, 'links': links, 'meta': meta})
+
+    def update(self, payload: Dict) -> None:
+        attributes = payload.get('attributes')
+        if attributes is None:
+            self._values = None
+            self._extra = None
+        else:
+            index = self._index
+            shared = self._shared
+            values = [_MISSING] * len(index)
+            extra = None
+            for name, value in attributes.items():
+                position = index.get(name)
+                if position is None:
+                    if extra is None:
+                        extra = {}
+                    extra[sys.intern(name)] = value
+                else:
+                    if position in shared and type(value) is str:
+                        value = sys.intern(value)
+                    values[position] = value
+            self._values = tuple(values)
+            self._extra = extra
+
+        links = payload.get('links')
+        self.meta = payload.get('meta')
+        self._relationships = _compact_relationships(payload.get('relationships'), links)
+        self._links = _compact_links(links, self.type, self.id)
+
+    @property
+    def loaded(self) -> bool:
+        return self._values is not None
+
+    @property
+    def attributes(self) -> Optional[Dict]:
+        """
+        The raw attributes, rebuilt as a dict.
+        """
+        if self._values is None:
+            return None
+        attributes = {name: value for name, value in zip(self.fields, self._values) if value is not _MISSING}
+        if self._extra:
+            attributes.update(self._extra)
+        return attributes
+
+    @property
+    def links(self) -> Optional[Dict]:
+        """
+        The raw links, rebuilt if they were compacted.
+        """
+        links = self._links
+        if isinstance(links, str):
+            return {'self': links + self.id}
+        return links
+
+    @property
+    def relationships(self) -> Optional[Dict]:
+        """
+        The raw relationships, with their links rebuilt if they were compacted.
+        """
+        relationships = self._relationships
+        if not isinstance(relationships, tuple):
+            return relationships
+        self_link = self.links['self']
+        expanded = {}
+        for name, linkage in relationships:
+            relationship = {'links': {'related': f'{self_link}/{name}', 'self': f'{self_link}/relationships/{name}'}}
+            if linkage is not _NO_DATA:
+                relationship['data'] = _expand_linkage(linkage)
+            expanded[name] = relationship
+        return expanded
+
+    def __getstate__(self) -> Tuple[Dict, Optional[Dict]]:
+        # The raw resource object, since the compact one holds sentinels that don't survive pickling
+        return self.to_dict(), self._related
+
+    def __setstate__(self, state: Tuple[Dict, Optional[Dict]]) -> None:
+        payload, self._related = state
+        self.type = sys.intern(payload['type'])
+        self.id = payload['id']
+        self.update(payload)
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for names that are not regular attributes, i.e. resource attributes. Private and
+        # special names never are, and may be looked up before the slots are set, e.g. by copy and pickle.
+        if name.startswith('_'):
+            raise AttributeError(f'{type(self).__name__!r} object has no attribute {name!r}')
+        position = type(self)._index.get(name)
+        if position is not None:
+            values = self._values
+            value = _MISSING if values is None else values[position]
+        elif self._extra is not None:
+            value = self._extra.get(name, _MISSING)
+        else:
+            value = _MISSING
+        if value is _MISSING:
+            raise AttributeError(f'{type(self).__name__} {self.id} has no attribute {name!r}')
+        if name.endswith('_at') and isinstance(value, str):
+            return parse_timestamp(value)
+        return value
+
+
+class Order(Model):
+    __slots__ = ()
+    fields = (
+        'store_id', 'customer_id', 'identifier', 'order_number', 'user_name', 'user_email', 'currency',
+        'currency_rate', 'subtotal', 'setup_fee', 'discount_total', 'tax', 'total', 'subtotal_usd',
+        'setup_fee_usd', 'discount_total_usd', 'tax_usd', 'total_usd', 'tax_name', 'tax_rate', 'tax_inclusive',
+        'status', 'status_formatted', 'refunded', 'refunded_at', 'subtotal_formatted', 'setup_fee_formatted',
+        'discount_total_formatted', 'tax_formatted', 'total_formatted', 'first_order_item', 'urls',
+        'created_at', 'updated_at', 'test_mode',
+    )
+    shared = (
+        'currency', 'currency_rate', 'tax_name', 'tax_rate', 'status', 'status_formatted', 'subtotal_formatted',
+        'setup_fee_formatted', 'discount_total_formatted', 'tax_formatted', 'total_formatted',
+    )
+
+
+class Subscription(Model):
+    __slots__ = ()
+    fields = (
+        'store_id', 'customer_id', 'order_id', 'order_item_id', 'product_id', 'variant_id', 'product_name',
+        'variant_name', 'user_name', 'user_email', 'status', 'status_formatted', 'card_brand', 'card_last_four',
+        'pause', 'cancelled', 'trial_ends_at', 'billing_anchor', 'first_subscription_item', 'urls', 'renews_at',
+        'ends_at', 'created_at', 'updated_at', 'test_mode',
+    )
+    shared = ('product_name', 'variant_name', 'status', 'status_formatted', 'card_brand')
+
+
+class Customer(Model):
+    __slots__ = ()
+    fields = (
+        'store_id', 'name', 'email', 'status', 'city', 'region', 'country', 'total_revenue_currency', 'mrr',
+        'status_formatted', 'country_formatted', 'total_revenue_currency_formatted', 'mrr_formatted', 'urls',
+        'created_at', 'updated_at', 'test_mode',
+    )
+    shared = ('status', 'city', 'region', 'country', 'status_formatted', 'country_formatted')
+
+
+class Product(Model):
+    __slots__ = ()
+    fields = (
+        'store_id', 'name', 'slug', 'description', 'status', 'status_formatted', 'thumb_url', 'large_thumb_url',
+        'price', 'price_formatted', 'from_price', 'to_price', 'pay_what_you_want', 'buy_now_url',
+        'created_at', 'updated_at', 'test_mode',
+    )
+    shared = ('status', 'status_formatted')
+
+
+class Variant(Model):
+    __slots__ = ()
+    fields = (
+        'product_id', 'name', 'slug', 'description', 'price', 'is_subscription', 'interval', 'interval_count',
+        'has_free_trial', 'trial_interval', 'trial_interval_count', 'pay_what_you_want', 'min_price',
+        'suggested_price', 'has_license_keys', 'license_activation_limit', 'is_license_limit_unlimited',
+        'license_length_value', 'license_length_unit', 'is_license_length_unlimited', 'sort', 'status',
+        'status_formatted', 'created_at', 'updated_at', 'test_mode',
+    )
+    shared = ('interval', 'trial_interval', 'license_length_unit', 'status', 'status_formatted')
+
+
+class Checkout(Model):
+    __slots__ = ()
+    fields = (
+        'store_id', 'variant_id', 'custom_price', 'product_options', 'checkout_options', 'checkout_data',
+        'preview', 'expires_at', 'created_at', 'updated_at', 'test_mode', 'url',
+    )
+
+
+class GenericModel(Model):
+    __slots__ = ()
+
+
+MODELS: Dict[str, Type[Model]] = {
+    'orders': Order,
+    'subscriptions': Subscription,
+    'customers': Customer,
+    'products': Product,
+    'variants': Variant,
+    'checkouts': Checkout,
+}
+
+
+def model_for(type: str, id: str) -> Model:
+    """
+    Build an empty model of the class registered for a resource type.
+
+    Args:
+        type (str): The resource type.
+        id (str): The resource ID.
+
+    Returns:
+        Model: The model, a GenericModel for unknown types.
+    """
+    return MODELS.get(type, GenericModel)(type, id)
+
+
+class ModelDocument(Document):
+    """
+    A Document whose `data` and `included` members are replaced by models.
+
+    The raw resource dicts are not kept, so only the compact models stay in
+    memory; they still support dict-style access.
+    """
+
+    def __init__(self, payload: Dict, identity_map: Optional[IdentityMap] = None):
+        super().__init__(payload, identity_map if identity_map is not None else IdentityMap(model_for))
+        if 'data' in self:
+            self['data'] = self.primary
+        if 'included' in self:
+            self['included'] = [self.identity_map.get(resource['type'], resource['id'])
+                                for resource in self['included']]
@@ -1,63 +1,74 @@
-import requests
-from typing import Dict, Optional
+from typing import Dict, Iterable, Iterator, Optional
+from .resource import Resource
 
-class Order:
+class Order(Resource):
     """
     Class for interacting with the 'order' part of the API.
     """
 
-    def __init__(self, session: requests.Session):
-        """
-        Initialize a new instance of Order.
-
-        Args:
-            session (requests.Session): The requests Session to use for making requests.
-        """
-        self.session = session
-
-    def get_order(self, order_id: int) -> Optional[Dict]:
+    def get_order(self, order_id: int, include: Optional[Iterable[str]] = None,
+                  fields: Optional[Dict[str, Iterable[str]]] = None) -> Dict:
         """
         Get the details of a specific order.
 
         Args:
             order_id (int): The ID of the order.
+            include (Iterable[str], optional): Related resources to include; the response is then
+                resolved into a Document.
+            fields (Dict[str, Iterable[str]], optional): The attributes and relationships to return per
+                resource type (`fields[type]`); anything else is also dropped after decoding.
 
         Returns:
             Dict: The JSON response from the API.
         """
-        url = f"{self.session.params['api_url']}/v1/orders/{order_id}"
-        try:
-            response = self.session.get(url)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f'Error getting order: {e}')
-            return None
-
-    def get_all_orders(self, store_id: Optional[int] = None, user_email: Optional[str] = None) -> Optional[Dict]:
+        return self._request('GET', f'/v1/orders/{order_id}', include=include, fields=fields)
+
+    def _filters(self, store_id: Optional[int], user_email: Optional[str]) -> Dict:
+        params = {}
+        if store_id:
+            params['filter[store_id]'] = store_id
+        if user_email:
+            params['filter[user_email]'] = user_email
+        return params
+
+    def get_all_orders(self, store_id: Optional[int] = None, user_email: Optional[str] = None,
+                       include: Optional[Iterable[str]] = None,
+                       fields: Optional[Dict[str, Iterable[str]]] = None) -> Dict:
         """
         Get the details of all orders, optionally filtered by store ID and user email.
 
         Args:
             store_id (int, optional): The ID of the store.
             user_email (str, optional): The email of the user.
+            include (Iterable[str], optional): Related resources to include; the response is then
+                resolved into a Document.
+            fields (Dict[str, Iterable[str]], optional): The attributes and relationships to return per
+                resource type (`fields[type]`); anything else is also dropped after decoding.
 
         Returns:
             Dict: The JSON response from the API.
         """
-        url = f"{self.session.params['api_url']}/v1/orders"
-        filters = []
-        if store_id:
-            filters.append(f'filter[store_id]={store_id}')
-        if user_email:
-            filters.append(f'filter[user_email]={user_email}')
-        if filters:
-            url += '?' + '&'.join(filters)
-
-        try:
-            response = self.session.get(url)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f'Error getting orders: {e}')
-            return None
+        return self._request('GET', '/v1/orders', self._filters(store_id, user_email), include=include, fields=fields)
+
+    def iter_orders(self, store_id: Optional[int] = None, user_email: Optional[str] = None,
+                    page_size: Optional[int] = None, concurrency: int = 1,
+                    include: Optional[Iterable[str]] = None,
+                    fields: Optional[Dict[str, Iterable[str]]] = None) -> Iterator[Dict]:
+        """
+        Iterate over all orders across every page, optionally filtered by store ID and user email.
+
+        Args:
+            store_id (int, optional): The ID of the store.
+            user_email (str, optional): The email of the user.
+            page_size (int, optional): The number of orders fetched per page.
+            concurrency (int, optional): The number of pages prefetched concurrently.
+            include (Iterable[str], optional): Related resources to include; resources are then
+                yielded as linked ResourceObjects.
+            fields (Dict[str, Iterable[str]], optional): The attributes and relationships to return per
+                resource type (`fields[type]`); anything else is also dropped after decoding.
+
+        Yields:
+            Dict: Each order resource object.
+        """
+        return self._iter('/v1/orders', self._filters(store_id, user_email), page_size, concurrency,
+                          include=include, fields=fields)
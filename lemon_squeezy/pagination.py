@@ -0,0 +1,279 @@
+import asyncio
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from .document import Document
+from .pipeline import Pipeline, Request
+
+
+def _first_page_params(params: Optional[Dict], page_size: Optional[int]) -> Dict:
+    params = dict(params or {})
+    if page_size:
+        params['page[size]'] = page_size
+    return params
+
+
+def _page_items(page: Dict) -> List[Any]:
+    if isinstance(page, Document):
+        return page.primary or []
+    return page.get('data') or []
+
+
+def _next_link(page: Dict) -> Optional[str]:
+    return (page.get('links') or {}).get('next')
+
+
+def _page_numbers(first: Dict, params: Dict) -> Optional[Iterator[int]]:
+    # The numbers of the pages after the first, or None if the API did not report the last page
+    meta = (first.get('meta') or {}).get('page') or {}
+    if 'lastPage' not in meta:
+        return None
+    if meta.get('perPage'):
+        params['page[size]'] = meta['perPage']
+    return iter(range(meta.get('currentPage', 1) + 1, meta['lastPage'] + 1))
+
+
+def iter_pages(pipeline: Pipeline, path: str, params: Optional[Dict] = None,
+               page_size: Optional[int] = None, parse: Optional[Callable[[Dict], Any]] = None) -> Iterator[Dict]:
+    """
+    Iterate over the pages of a JSON:API list endpoint, following `links.next`.
+
+    Only one page is held at a time, and the next page is not requested until
+    the caller asks for it.
+
+    Args:
+        pipeline (Pipeline): The pipeline to send requests through.
+        path (str): The path of the first page.
+        params (Dict, optional): The query parameters of the first page.
+        page_size (int, optional): The number of resources per page (`page[size]`).
+        parse (Callable, optional): Turns each decoded page into the value yielded for it.
+
+    Yields:
+        Dict: The JSON response for each page.
+
+    Raises:
+        LemonSqueezyError: If a page could not be fetched.
+    """
+    params = _first_page_params(params, page_size)
+
+    while path:
+        page = pipeline.request(Request('GET', path, params, parse=parse))
+        # The next link already carries the filters and page parameters
+        path = _next_link(page)
+        params = None
+        yield page
+
+
+def prefetch_pages(pipeline: Pipeline, path: str, params: Optional[Dict] = None,
+                   page_size: Optional[int] = None, concurrency: int = 8,
+                   parse: Optional[Callable[[Dict], Any]] = None) -> Iterator[Dict]:
+    """
+    Iterate over the pages of a JSON:API list endpoint, fetching them concurrently.
+
+    The first page is fetched on its own to learn `meta.page.lastPage`; the
+    remaining pages are then requested by number on a thread pool. Pages are
+    still yielded in order, and at most `concurrency` pages are in flight or
+    buffered at any time.
+
+    Args:
+        pipeline (Pipeline): The pipeline to send requests through.
+        path (str): The path of the first page.
+        params (Dict, optional): The query parameters of the first page.
+        page_size (int, optional): The number of resources per page (`page[size]`).
+        concurrency (int, optional): The maximum number of pages fetched at once.
+        parse (Callable, optional): Turns each decoded page into the value yielded for it.
+
+    Yields:
+        Dict: The JSON response for each page.
+
+    Raises:
+        LemonSqueezyError: If a page could not be fetched.
+    """
+    params = _first_page_params(params, page_size)
+
+    first = pipeline.request(Request('GET', path, params, parse=parse))
+    yield first
+
+    numbers = _page_numbers(first, params)
+    if numbers is None:
+        next_path = _next_link(first)
+        if next_path:
+            yield from iter_pages(pipeline, next_path, parse=parse)
+        return
+
+    def fetch(number: int) -> Dict:
+        return pipeline.request(Request('GET', path, dict(params, **{'page[number]': number}), parse=parse))
+
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    pending = deque(executor.submit(fetch, number) for number in itertools.islice(numbers, concurrency))
+    try:
+        while pending:
+            page = pending.popleft().result()
+            for number in itertools.islice(numbers, 1):
+                pending.append(executor.submit(fetch, number))
+            yield page
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def iter_resources(pipeline: Pipeline, path: str, params: Optional[Dict] = None,
+                   page_size: Optional[int] = None, concurrency: int = 1,
+                   parse: Optional[Callable[[Dict], Any]] = None) -> Iterator[Any]:
+    """
+    Iterate over the resources of a JSON:API list endpoint one at a time.
+
+    Args:
+        pipeline (Pipeline): The pipeline to send requests through.
+        path (str): The path of the first page.
+        params (Dict, optional): The query parameters of the first page.
+        page_size (int, optional): The number of resources per page (`page[size]`).
+        concurrency (int, optional): The number of pages prefetched concurrently; 1 fetches
+            pages one after another.
+        parse (Callable, optional): Turns each decoded page into a Document or dict whose data is yielded.
+
+    Yields:
+        Dict or ResourceObject: Each resource object from the `data` member of every page.
+
+    Raises:
+        LemonSqueezyError: If a page could not be fetched.
+    """
+    if concurrency > 1:
+        pages = prefetch_pages(pipeline, path, params, page_size, concurrency, parse)
+    else:
+        pages = iter_pages(pipeline, path, params, page_size, parse)
+
+    for page in pages:
+        yield from _page_items(page)
+
+
+def iter_changed_pages(pipeline: Pipeline, path: str, params: Optional[Dict] = None,
+                       since: Union[str, Tuple[str, str], None] = None,
+                       page_size: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Iterate over the pages of a JSON:API list endpoint, newest first, until `since` is reached.
+
+    Pages are requested with `sort=-updated_at`, and iteration stops after the
+    first page whose last resource is older than `since`, compared on
+    (`updated_at`, ID). Given only a timestamp, resources updated at exactly
+    `since` are fetched again, so none at the boundary is skipped.
+
+    This relies on the API honouring the sort. Resources found out of order
+    make every remaining page be fetched, but an order that only looks sorted
+    on the pages read can't be told apart, so callers that must not miss a
+    change should still scan every page from time to time.
+
+    Args:
+        pipeline (Pipeline): The pipeline to send requests through.
+        path (str): The path of the first page.
+        params (Dict, optional): The query parameters of the first page.
+        since (str or Tuple[str, str], optional): The `updated_at` timestamp already seen, or the
+            (`updated_at`, ID) of the newest resource seen; None fetches every page, unsorted.
+        page_size (int, optional): The number of resources per page (`page[size]`).
+
+    Yields:
+        Dict: The JSON response for each page.
+
+    Raises:
+        LemonSqueezyError: If a page could not be fetched.
+    """
+    if since is None:
+        yield from iter_pages(pipeline, path, params, page_size)
+        return
+
+    mark = (since, '') if isinstance(since, str) else tuple(since)
+    params = dict(params or {}, sort='-updated_at')
+    ordered = True
+    previous = None
+    for page in iter_pages(pipeline, path, params, page_size):
+        yield page
+        for resource in page.get('data') or []:
+            updated_at = (resource.get('attributes') or {}).get('updated_at') or ''
+            if previous is not None and updated_at > previous[0]:
+                ordered = False
+            previous = (updated_at, str(resource.get('id')))
+        # Resources are newest first, so once one is older than the mark the rest were already seen
+        if ordered and previous is not None and previous < mark:
+            return
+
+
+async def aiter_pages(pipeline: Pipeline, path: str, params: Optional[Dict] = None,
+                      page_size: Optional[int] = None, concurrency: int = 1,
+                      parse: Optional[Callable[[Dict], Any]] = None) -> AsyncIterator[Dict]:
+    """
+    Asynchronously iterate over the pages of a JSON:API list endpoint.
+
+    With a concurrency of 1 pages are fetched one after another by following
+    `links.next`. Otherwise the remaining pages are requested by number as
+    concurrent tasks once the first page reports `meta.page.lastPage`, while
+    still being yielded in page order.
+
+    Args:
+        pipeline (Pipeline): The async pipeline to send requests through.
+        path (str): The path of the first page.
+        params (Dict, optional): The query parameters of the first page.
+        page_size (int, optional): The number of resources per page (`page[size]`).
+        concurrency (int, optional): The maximum number of pages fetched at once.
+        parse (Callable, optional): Turns each decoded page into the value yielded for it.
+
+    Yields:
+        Dict: The JSON response for each page.
+
+    Raises:
+        LemonSqueezyError: If a page could not be fetched.
+    """
+    params = _first_page_params(params, page_size)
+
+    page = await pipeline.request(Request('GET', path, params, parse=parse))
+    yield page
+
+    numbers = _page_numbers(page, params) if concurrency > 1 else None
+    if numbers is None:
+        next_path = _next_link(page)
+        while next_path:
+            page = await pipeline.request(Request('GET', next_path, parse=parse))
+            next_path = _next_link(page)
+            yield page
+        return
+
+    def fetch(number: int) -> asyncio.Future:
+        request = Request('GET', path, dict(params, **{'page[number]': number}), parse=parse)
+        return asyncio.ensure_future(pipeline.request(request))
+
+    pending = deque(fetch(number) for number in itertools.islice(numbers, concurrency))
+    try:
+        while pending:
+            page = await pending.popleft()
+            for number in itertools.islice(numbers, 1):
+                pending.append(fetch(number))
+            yield page
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def aiter_resources(pipeline: Pipeline, path: str, params: Optional[Dict] = None,
+                          page_size: Optional[int] = None, concurrency: int = 1,
+                          parse: Optional[Callable[[Dict], Any]] = None) -> AsyncIterator[Any]:
+    """
+    Asynchronously iterate over the resources of a JSON:API list endpoint one at a time.
+
+    Args:
+        pipeline (Pipeline): The async pipeline to send requests through.
+        path (str): The path of the first page.
+        params (Dict, optional): The query parameters of the first page.
+        page_size (int, optional): The number of resources per page (`page[size]`).
+        concurrency (int, optional): The maximum number of pages fetched at once.
+        parse (Callable, optional): Turns each decoded page into a Document or dict whose data is yielded.
+
+    Yields:
+        Dict or ResourceObject: Each resource object from the `data` member of every page.
+
+    Raises:
+        LemonSqueezyError: If a page could not be fetched.
+    """
+    async for page in aiter_pages(pipeline, path, params, page_size, concurrency, parse):
+        for resource in _page_items(page):
+            yield resource
@@ -0,0 +1,312 @@
+import hashlib
+import requests
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Tuple, Union
+from urllib.parse import urlsplit
+from .codec import DEFAULT_CODEC, JSONCodec, get_codec
+from .exceptions import APIError, TransportError, error_for_status
+
+# A middleware is called as middleware(request, call_next) and returns a Response,
+# usually by calling call_next(request) and acting on the request or the response.
+Middleware = Callable[..., Any]
+
+_NOT_DECODED = object()
+
+
+def credential_scope(base_url: str, credential: Optional[str]) -> str:
+    """
+    Identify the API and credential requests are sent with, without revealing the credential.
+
+    Args:
+        base_url (str): The URL of the API.
+        credential (str, optional): The API key or Authorization header.
+
+    Returns:
+        str: The base URL and a hash of the credential.
+    """
+    digest = hashlib.sha256(credential.encode('utf-8')).hexdigest()[:32] if credential else '-'
+    return f'{base_url.rstrip("/")} {digest}'
+
+
+class Request:
+    """
+    A single API call travelling through the pipeline.
+    """
+
+    __slots__ = ('method', 'path', 'params', 'json', 'headers', 'parse', 'context')
+
+    def __init__(self, method: str, path: str, params: Optional[Dict] = None, json: Optional[Any] = None,
+                 headers: Optional[Dict[str, str]] = None, parse: Optional[Callable[[Any], Any]] = None):
+        """
+        Initialize a new instance of Request.
+
+        Args:
+            method (str): The HTTP method.
+            path (str): The path relative to the base URL, or an absolute URL such as a `links.next` link.
+            params (Dict, optional): The query parameters.
+            json (Any, optional): The JSON body, or its already encoded bytes.
+            headers (Dict[str, str], optional): Extra headers for this request.
+            parse (Callable, optional): Turns the decoded JSON into the value returned to the caller.
+        """
+        self.method = method.upper()
+        self.path = path
+        self.params = params or {}
+        self.json = json
+        self.headers = headers or {}
+        self.parse = parse
+        # Scratch space for middleware
+        self.context = {}
+
+    def _segments(self) -> list:
+        # '/v1/orders/1' -> ['v1', 'orders', '1']
+        return urlsplit(self.path).path.strip('/').split('/')
+
+    @property
+    def resource(self) -> Optional[str]:
+        """
+        The resource type addressed by the request, e.g. 'orders'.
+        """
+        segments = self._segments()
+        return segments[1] if len(segments) > 1 else None
+
+    @property
+    def resource_id(self) -> Optional[str]:
+        """
+        The ID of the single resource addressed by the request, if any.
+        """
+        segments = self._segments()
+        return segments[2] if len(segments) > 2 else None
+
+    @property
+    def key(self) -> Tuple:
+        """
+        A hashable key identifying the request, for caching and coalescing.
+        """
+        return self.method, self.path, tuple(sorted((name, str(value)) for name, value in self.params.items()))
+
+    def __repr__(self) -> str:
+        return f'<Request {self.method} {self.path}>'
+
+
+class Response:
+    """
+    The raw result of a request, decoded lazily.
+    """
+
+    __slots__ = ('status_code', 'headers', 'content', 'url', 'codec', '_data')
+
+    def __init__(self, status_code: int, headers: Mapping[str, str], content: bytes, url: Optional[str] = None,
+                 codec: Optional[JSONCodec] = None):
+        """
+        Initialize a new instance of Response.
+
+        Args:
+            status_code (int): The HTTP status code.
+            headers (Mapping[str, str]): The response headers.
+            content (bytes): The raw response body.
+            url (str, optional): The final URL of the request.
+            codec (JSONCodec, optional): The codec used to decode the body, the stdlib one by default.
+        """
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.url = url
+        self.codec = codec
+        self._data = _NOT_DECODED
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def data(self) -> Any:
+        """
+        The decoded JSON body, or None if the body is empty. Decoded once and shared.
+        """
+        return self.decode()
+
+    def decode(self, codec: Optional[JSONCodec] = None, resource: Optional[str] = None) -> Any:
+        """
+        Decode the body straight from bytes, once; later calls return the same value.
+
+        Args:
+            codec (JSONCodec, optional): The codec to use if the response has none.
+            resource (str, optional): The resource type of the request, for codecs that decode into types.
+
+        Returns:
+            Any: The decoded JSON body, or None if the body is empty.
+        """
+        if self._data is _NOT_DECODED:
+            codec = self.codec or codec or DEFAULT_CODEC
+            self._data = codec.decode(self.content, resource) if self.content else None
+        return self._data
+
+    def error(self) -> APIError:
+        """
+        Build the typed error for an unsuccessful response.
+
+        Returns:
+            APIError: The error matching the status code.
+        """
+        try:
+            errors = (self.data or {}).get('errors')
+        except (ValueError, AttributeError):
+            errors = None
+        return error_for_status(self.status_code, errors, self.url)
+
+    def __repr__(self) -> str:
+        return f'<Response [{self.status_code}]>'
+
+
+class Pipeline:
+    """
+    The request core shared by all resource classes.
+
+    Every call is described as a Request, passed through the middleware chain
+    in order and finally sent on the session. Middleware can short-circuit
+    (e.g. serve from a cache), retry, measure or rewrite requests in one place.
+    """
+
+    def __init__(self, session: requests.Session, base_url: str, middleware: Optional[Iterable[Middleware]] = None,
+                 codec: Union[str, JSONCodec, None] = None, scope: Optional[str] = None):
+        """
+        Initialize a new instance of Pipeline.
+
+        Args:
+            session (requests.Session): The requests Session to use for making requests.
+            base_url (str): The URL of the API.
+            middleware (Iterable[Middleware], optional): The middleware to run, outermost first.
+            codec (str or JSONCodec, optional): The JSON codec, see `get_codec`; the stdlib one by default.
+            scope (str, optional): Identifies the API and credential of the requests, see `credential_scope`;
+                defaults to the base URL and the session's Authorization header.
+        """
+        self.session = session
+        self.codec = get_codec(codec) if codec is not None else DEFAULT_CODEC
+        self.base_url = base_url.rstrip('/')
+        if scope is None:
+            headers = getattr(session, 'headers', None) or {}
+            scope = credential_scope(self.base_url, headers.get('Authorization'))
+        # Set on every request as request.context['scope'], so shared caches keep API keys apart
+        self.scope = scope
+        self.middleware = list(middleware or [])
+        self._handler = None
+
+    def use(self, middleware: Middleware, outermost: bool = False) -> None:
+        """
+        Append a middleware to the end of the chain, closest to the transport.
+
+        Args:
+            middleware (Middleware): The middleware to add.
+            outermost (bool, optional): Add it to the start of the chain instead, so it sees every call,
+                including those answered by other middleware.
+        """
+        if outermost:
+            self.middleware.insert(0, middleware)
+        else:
+            self.middleware.append(middleware)
+        self._handler = None
+
+    def url_for(self, request: Request) -> str:
+        """
+        Resolve the absolute URL of a request.
+
+        Args:
+            request (Request): The request.
+
+        Returns:
+            str: The absolute URL.
+        """
+        if '://' in request.path:
+            return request.path
+        return f'{self.base_url}{request.path}'
+
+    def send(self, request: Request) -> Response:
+        """
+        Run a request through the middleware chain.
+
+        Args:
+            request (Request): The request.
+
+        Returns:
+            Response: The response, whatever its status code.
+        """
+        handler = self._handler
+        if handler is None:
+            handler = self._handler = self._build_handler()
+        request.context['scope'] = self.scope
+        return handler(request)
+
+    def request(self, request: Request) -> Any:
+        """
+        Run a request through the middleware chain and decode the response.
+
+        Args:
+            request (Request): The request.
+
+        Returns:
+            Any: The decoded JSON response, passed through the request's parse function if it has one.
+
+        Raises:
+            APIError: If the API answered with an error status code.
+            TransportError: If the request could not be completed.
+        """
+        return self.result(request, self.send(request))
+
+    def result(self, request: Request, response: Response) -> Any:
+        """
+        Turn the response of a request into the value returned to the caller.
+
+        Args:
+            request (Request): The request.
+            response (Response): Its response.
+
+        Returns:
+            Any: The decoded JSON response, passed through the request's parse function if it has one.
+
+        Raises:
+            APIError: If the API answered with an error status code.
+        """
+        if response.status_code >= 400:
+            raise response.error()
+        data = response.decode(self.codec, request.resource)
+        if request.parse is not None:
+            return request.parse(data)
+        return data
+
+    def encode(self, request: Request) -> Optional[bytes]:
+        """
+        Encode the JSON body of a request with the pipeline's codec.
+
+        Bodies given as bytes are taken to be encoded already and sent as is.
+
+        Args:
+            request (Request): The request.
+
+        Returns:
+            bytes: The encoded body, or None if the request has no body.
+        """
+        if request.json is None or isinstance(request.json, bytes):
+            return request.json
+        return self.codec.encode(request.json)
+
+    def _build_handler(self) -> Callable:
+        handler = self._transport
+        for middleware in reversed(self.middleware):
+            handler = partial(middleware, call_next=handler)
+        return handler
+
+    def _transport(self, request: Request) -> Response:
+        body = self.encode(request)
+        if body is not None:
+            request.context['request_bytes'] = len(body)
+        try:
+            response = self.session.request(
+                request.method,
+                self.url_for(request),
+                params=request.params or None,
+                data=body,
+                headers=request.headers or None,
+            )
+        except requests.exceptions.RequestException as e:
+            raise TransportError(str(e)) from e
+        return Response(response.status_code, response.headers, response.content, response.url, self.codec)
@@ -0,0 +1,277 @@
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Hashable, Iterator, List, Optional, Tuple, Union
+import requests
+from . import LemonSqueezy
+from .codec import JSONCodec
+from .pipeline import Middleware, Request, Response
+from .rate_limit import DEFAULT_RATE_LIMIT, DEFAULT_RATE_PERIOD, TokenBucket
+from .retry import RetryPolicy
+from .session import DEFAULT_POOL_MAXSIZE, DEFAULT_TIMEOUT, LemonSqueezySession
+
+
+class FairScheduler:
+    """
+    Hands a fixed number of request slots to tenants by smooth weighted round-robin.
+
+    While slots are free, requests take one at once. Once they are all in
+    use, waiting requests queue per tenant and every freed slot goes to the
+    tenant with the most credit, so over time each tenant with waiting requests
+    gets slots in proportion to its weight, however many requests it queues.
+    """
+
+    def __init__(self, slots: int):
+        """
+        Initialize a new instance of FairScheduler.
+
+        Args:
+            slots (int): The number of requests in flight at once.
+        """
+        self.slots = slots
+        self.in_use = 0
+        self.weights: Dict[Hashable, int] = {}
+        self._credit: Dict[Hashable, int] = {}
+        self._waiting: Dict[Hashable, Deque[threading.Event]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, tenant: Hashable) -> None:
+        """
+        Take a slot, blocking until it is this tenant's turn.
+
+        Args:
+            tenant (Hashable): The tenant sending the request.
+        """
+        with self._lock:
+            if self.in_use < self.slots and not self._waiting:
+                self.in_use += 1
+                return
+            granted = threading.Event()
+            self._waiting.setdefault(tenant, deque()).append(granted)
+        granted.wait()
+
+    def release(self) -> None:
+        """
+        Give a slot back, handing it straight to the next waiting request if there is one.
+        """
+        with self._lock:
+            tenant = self._next()
+            if tenant is None:
+                self.in_use -= 1
+                return
+            waiting = self._waiting[tenant]
+            granted = waiting.popleft()
+            if not waiting:
+                del self._waiting[tenant]
+                del self._credit[tenant]
+        granted.set()
+
+    def _next(self) -> Optional[Hashable]:
+        # Every waiting tenant earns its weight, the richest is served and pays the total
+        best = None
+        total = 0
+        for tenant in self._waiting:
+            weight = self.weights.get(tenant, 1)
+            self._credit[tenant] = self._credit.get(tenant, 0) + weight
+            total += weight
+            if best is None or self._credit[tenant] > self._credit[best]:
+                best = tenant
+        if best is not None:
+            self._credit[best] -= total
+        return best
+
+    @contextmanager
+    def slot(self, tenant: Hashable) -> Iterator[None]:
+        """
+        Hold a slot for the duration of a with block.
+
+        Args:
+            tenant (Hashable): The tenant sending the request.
+        """
+        self.acquire(tenant)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def waiting(self) -> Dict[Hashable, int]:
+        """
+        Return the number of queued requests per tenant.
+        """
+        with self._lock:
+            return {tenant: len(waiting) for tenant, waiting in self._waiting.items()}
+
+
+class PooledSession(LemonSqueezySession):
+    """
+    LemonSqueezySession shared by every tenant of a LemonSqueezyPool.
+
+    Requests are told apart by their Authorization header: each is paced by
+    the token bucket of its API key and sent once the scheduler gives its
+    tenant a slot, over one connection pool for all tenants.
+    """
+
+    def __init__(self, scheduler: FairScheduler, **kwargs):
+        """
+        Initialize a new instance of PooledSession.
+
+        Args:
+            scheduler (FairScheduler): The scheduler sharing the in-flight requests between tenants.
+            **kwargs: The options of LemonSqueezySession, except the rate limiter.
+        """
+        super().__init__(None, **kwargs)
+        self.scheduler = scheduler
+        # The tenant name and token bucket per Authorization header
+        self.tenants: Dict[str, Tuple[str, Optional[TokenBucket]]] = {}
+
+    def _tenant(self, kwargs: dict) -> Tuple[Optional[str], Optional[TokenBucket]]:
+        authorization = (kwargs.get('headers') or {}).get('Authorization')
+        return self.tenants.get(authorization, (None, None))
+
+    def rate_limiter_for(self, kwargs: dict) -> Optional[TokenBucket]:
+        return self._tenant(kwargs)[1]
+
+    def _transmit(self, rate_limiter: Optional[TokenBucket], method, url, *args, **kwargs) -> requests.Response:
+        # The key's token was taken by the caller, so a throttled tenant doesn't hold a slot
+        with self.scheduler.slot(self._tenant(kwargs)[0]):
+            response = requests.Session.request(self, method, url, *args, **kwargs)
+        if rate_limiter is not None:
+            rate_limiter.sync(response.headers)
+        return response
+
+
+def _authorization(header: str) -> Middleware:
+    # Innermost middleware adding a tenant's API key to each request
+    def authorize(request: Request, call_next) -> Response:
+        request.headers['Authorization'] = header
+        return call_next(request)
+    return authorize
+
+
+class _TenantClient(LemonSqueezy):
+    # A LemonSqueezy client sending its requests over the pool's session
+
+    def __init__(self, session: PooledSession, api_url: str, api_key: str, **kwargs):
+        self._pooled_session = session
+        super().__init__(api_url, api_key, rate_limit=None, **kwargs)
+
+    def _create_session(self, api_key: str) -> requests.Session:
+        return self._pooled_session
+
+
+class LemonSqueezyPool:
+    """
+    Clients for many API keys sharing one session and connection pool.
+
+    Every tenant gets a regular LemonSqueezy client whose requests carry its
+    own bearer token and are paced by its own token bucket, since the API
+    limits requests per key. At most `max_in_flight` requests are sent at
+    once across all tenants; when more are ready, slots are handed out by
+    weighted round-robin, so a tenant with a large backlog can't starve the
+    others. The pool uses the sync client only.
+    """
+
+    def __init__(self, api_url: str, rate_limit: Optional[int] = DEFAULT_RATE_LIMIT,
+                 rate_period: float = DEFAULT_RATE_PERIOD, max_in_flight: Optional[int] = None,
+                 timeout: Optional[Union[float, Tuple[float, float]]] = DEFAULT_TIMEOUT,
+                 retry_policy: Optional[RetryPolicy] = None, pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 models: bool = False, codec: Union[str, JSONCodec, None] = 'auto'):
+        """
+        Initialize a new instance of LemonSqueezyPool.
+
+        Args:
+            api_url (str): The URL of the API.
+            rate_limit (int, optional): The number of requests allowed per rate period and API key, or None to
+                disable pacing.
+            rate_period (float, optional): The length of the rate period in seconds.
+            max_in_flight (int, optional): The number of requests sent at once across all tenants, defaults to
+                `pool_maxsize`.
+            timeout (float or Tuple[float, float], optional): The default (connect, read) timeout in seconds.
+            retry_policy (RetryPolicy, optional): The policy for retrying 5xx responses and connection errors.
+            pool_maxsize (int, optional): The maximum number of connections kept open to the API host.
+            models (bool, optional): Decode resources into compact models, see LemonSqueezy.
+            codec (str or JSONCodec, optional): The JSON codec, see LemonSqueezy.
+        """
+        self.api_url = api_url
+        self.rate_limit = rate_limit
+        self.rate_period = rate_period
+        self.models = models
+        self.codec = codec
+        self.scheduler = FairScheduler(max_in_flight or pool_maxsize)
+        self.session = PooledSession(self.scheduler, timeout=timeout, retry_policy=retry_policy,
+                                     pool_maxsize=pool_maxsize)
+        self.session.headers.update({
+            'Accept': 'application/vnd.api+json',
+            'Content-Type': 'application/vnd.api+json',
+        })
+        self._clients: Dict[str, LemonSqueezy] = {}
+        self._headers: Dict[str, str] = {}
+        self._lock = threading.RLock()
+
+    def add(self, name: str, api_key: str, weight: int = 1, rate_limit: Optional[int] = None,
+            middleware: Optional[List[Middleware]] = None) -> LemonSqueezy:
+        """
+        Add a tenant, or replace the one with the same name.
+
+        Args:
+            name (str): The name of the tenant, e.g. its store ID.
+            api_key (str): The API key of the tenant.
+            weight (int, optional): The tenant's share of the request slots relative to the other tenants.
+            rate_limit (int, optional): The number of requests allowed per rate period for this key, defaults
+                to the pool's.
+            middleware (List[Middleware], optional): Middleware to run on the tenant's requests only.
+
+        Returns:
+            LemonSqueezy: The tenant's client.
+        """
+        rate_limit = rate_limit if rate_limit is not None else self.rate_limit
+        rate_limiter = TokenBucket(rate_limit, self.rate_period) if rate_limit else None
+        header = f'Bearer {api_key}'
+        client = _TenantClient(self.session, self.api_url, api_key,
+                               middleware=list(middleware or []) + [_authorization(header)],
+                               models=self.models, codec=self.codec)
+        client.rate_limiter = rate_limiter
+        with self._lock:
+            self.remove(name)
+            self.session.tenants[header] = (name, rate_limiter)
+            self.scheduler.weights[name] = weight
+            self._clients[name] = client
+            self._headers[name] = header
+        return client
+
+    def remove(self, name: str) -> None:
+        """
+        Remove a tenant and its rate limit and weight.
+
+        Args:
+            name (str): The name of the tenant.
+        """
+        with self._lock:
+            if self._clients.pop(name, None) is None:
+                return
+            self.session.tenants.pop(self._headers.pop(name), None)
+            self.scheduler.weights.pop(name, None)
+
+    def __getitem__(self, name: str) -> LemonSqueezy:
+        return self._clients[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._clients
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._clients))
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def close(self) -> None:
+        """
+        Close the shared connection pool.
+        """
+        self.session.close()
+
+    def __enter__(self) -> 'LemonSqueezyPool':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -1,57 +1,68 @@
-import requests
-from typing import Dict, Optional
+from typing import Dict, Iterable, Iterator, Optional
+from .resource import Resource
 
-class Product:
+class Product(Resource):
     """
     Class for interacting with the 'product' part of the API.
     """
 
-    def __init__(self, session: requests.Session):
-        """
-        Initialize a new instance of Product.
-
-        Args:
-            session (requests.Session): The requests Session to use for making requests.
-        """
-        self.session = session
-
-    def get_product(self, product_id: int) -> Optional[Dict]:
+    def get_product(self, product_id: int, include: Optional[Iterable[str]] = None,
+                    fields: Optional[Dict[str, Iterable[str]]] = None) -> Dict:
         """
         Get the details of a specific product.
 
         Args:
             product_id (int): The ID of the product.
+            include (Iterable[str], optional): Related resources to include; the response is then
+                resolved into a Document.
+            fields (Dict[str, Iterable[str]], optional): The attributes and relationships to return per
+                resource type (`fields[type]`); anything else is also dropped after decoding.
 
         Returns:
             Dict: The JSON response from the API.
         """
-        url = f"{self.session.params['api_url']}/v1/products/{product_id}"
-        try:
-            response = self.session.get(url)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f'Error getting product: {e}')
-            return None
-
-    def get_all_products(self, store_id: Optional[int] = None) -> Optional[Dict]:
+        return self._request('GET', f'/v1/products/{product_id}', include=include, fields=fields)
+
+    def _filters(self, store_id: Optional[int]) -> Dict:
+        params = {}
+        if store_id:
+            params['filter[store_id]'] = store_id
+        return params
+
+    def get_all_products(self, store_id: Optional[int] = None, include: Optional[Iterable[str]] = None,
+                         fields: Optional[Dict[str, Iterable[str]]] = None) -> Dict:
         """
         Get the details of all products, optionally filtered by store ID.
 
         Args:
             store_id (int, optional): The ID of the store.
+            include (Iterable[str], optional): Related resources to include; the response is then
+                resolved into a Document.
+            fields (Dict[str, Iterable[str]], optional): The attributes and relationships to return per
+                resource type (`fields[type]`); anything else is also dropped after decoding.
 
         Returns:
             Dict: The JSON response from the API.
         """
-        url = f"{self.session.params['api_url']}/v1/products"
-        if store_id:
-            url += f'?filter[store_id]={store_id}'
-
-        try:
-            response = self.session.get(url)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f'Error getting products: {e}')
-            return None
+        return self._request('GET', '/v1/products', self._filters(store_id), include=include, fields=fields)
+
+    def iter_products(self, store_id: Optional[int] = None, page_size: Optional[int] = None,
+                      concurrency: int = 1, include: Optional[Iterable[str]] = None,
+                      fields: Optional[Dict[str, Iterable[str]]] = None) -> Iterator[Dict]:
+        """
+        Iterate over all products across every page, optionally filtered by store ID.
+
+        Args:
+            store_id (int, optional): The ID of the store.
+            page_size (int, optional): The number of products fetched per page.
+            concurrency (int, optional): The number of pages prefetched concurrently.
+            include (Iterable[str], optional): Related resources to include; resources are then
+                yielded as linked ResourceObjects.
+            fields (Dict[str, Iterable[str]], optional): The attributes and relationships to return per
+                resource type (`fields[type]`); anything else is also dropped after decoding.
+
+        Yields:
+            Dict: Each product resource object.
+        """
+        return self._iter('/v1/products', self._filters(store_id), page_size, concurrency,
+                          include=include, fields=fields)
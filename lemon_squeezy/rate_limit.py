@@ -0,0 +1,134 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Mapping, Optional
+
+# The API allows 300 requests per minute per API key
+DEFAULT_RATE_LIMIT = 300
+DEFAULT_RATE_PERIOD = 60.0
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket used to pace requests below the API rate limit.
+
+    Callers reserve a token before every request and wait for the returned
+    delay, so requests beyond the limit are queued instead of rejected. The
+    bucket can also be paused (after a 429) and synced with the rate limit
+    headers returned by the API.
+    """
+
+    def __init__(self, rate: int = DEFAULT_RATE_LIMIT, period: float = DEFAULT_RATE_PERIOD,
+                 capacity: Optional[int] = None):
+        """
+        Initialize a new instance of TokenBucket.
+
+        Args:
+            rate (int, optional): The number of requests allowed per period.
+            period (float, optional): The length of the period in seconds.
+            capacity (int, optional): The maximum burst size, defaults to `rate`.
+        """
+        self.rate = rate / period
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reserve(self) -> float:
+        """
+        Take a token, borrowing against the future if the bucket is empty.
+
+        Returns:
+            float: The number of seconds the caller has to wait before sending its request.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(delay, self.paused_until - now)
+
+    def acquire(self) -> None:
+        """
+        Take a token, blocking until the request is allowed to be sent.
+        """
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    def try_acquire(self) -> bool:
+        """
+        Take a token only if one is available right away, e.g. for an optional hedged request.
+
+        Returns:
+            bool: Whether a token was taken.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self.tokens < 1 or self.paused_until > now:
+                return False
+            self.tokens -= 1
+            return True
+
+    def pause(self, seconds: float) -> None:
+        """
+        Hold back every request for the given number of seconds, e.g. after a 429.
+
+        Args:
+            seconds (float): How long to pause.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens = min(self.tokens, 0.0)
+            self.paused_until = max(self.paused_until, now + seconds)
+
+    def sync(self, headers: Mapping[str, str]) -> None:
+        """
+        Lower the available tokens to what the API reports as remaining.
+
+        This keeps several workers sharing one API key from overshooting the
+        limit that each of them only partially observes.
+
+        Args:
+            headers (Mapping[str, str]): The response headers.
+        """
+        remaining = headers.get('X-Ratelimit-Remaining')
+        if remaining is None:
+            return
+        try:
+            remaining = float(remaining)
+        except ValueError:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, remaining)
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """
+    Parse the Retry-After header, given either in seconds or as an HTTP date.
+
+    Args:
+        headers (Mapping[str, str]): The response headers.
+
+    Returns:
+        float: The number of seconds to wait, or None if the header is missing or invalid.
+    """
+    value = headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
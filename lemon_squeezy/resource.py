@@ -0,0 +1,61 @@
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+from .document import Document, fields_params, include_param, project_document
+from .models import ModelDocument
+from .pagination import iter_resources
+from .pipeline import Pipeline, Request
+
+
+class Resource:
+    """
+    Base class for the resource classes, sending every call through the shared pipeline.
+    """
+
+    def __init__(self, pipeline: Pipeline, models: bool = False):
+        """
+        Initialize a new instance of the resource.
+
+        Args:
+            pipeline (Pipeline): The request pipeline shared by all resources.
+            models (bool, optional): Whether responses are decoded into compact models.
+        """
+        self.pipeline = pipeline
+        self.models = models
+
+    def _query(self, params: Optional[Dict], include: Optional[Iterable[str]],
+               fields: Optional[Dict[str, Iterable[str]]]) -> Tuple[Dict, Optional[Callable]]:
+        # Add the JSON:API query options to the filters, and pick how the response is parsed
+        params = dict(params or {})
+        steps = []
+        if fields:
+            params.update(fields_params(fields))
+            steps.append(partial(project_document, fields=fields))
+        if include:
+            params['include'] = include_param(include)
+        if self.models:
+            steps.append(ModelDocument)
+        elif include:
+            steps.append(Document)
+
+        if not steps:
+            return params, None
+        if len(steps) == 1:
+            return params, steps[0]
+        return params, partial(_chain, steps)
+
+    def _request(self, method: str, path: str, params: Optional[Dict] = None, json: Optional[Any] = None,
+                 include: Optional[Iterable[str]] = None, fields: Optional[Dict[str, Iterable[str]]] = None) -> Any:
+        params, parse = self._query(params, include, fields)
+        return self.pipeline.request(Request(method, path, params, json, parse=parse))
+
+    def _iter(self, path: str, params: Optional[Dict] = None, page_size: Optional[int] = None,
+              concurrency: int = 1, include: Optional[Iterable[str]] = None,
+              fields: Optional[Dict[str, Iterable[str]]] = None) -> Iterator[Dict]:
+        params, parse = self._query(params, include, fields)
+        return iter_resources(self.pipeline, path, params, page_size, concurrency, parse)
+
+
+def _chain(steps, value):
+    for step in steps:
+        value = step(value)
+    return value
@@ -0,0 +1,73 @@
+import random
+from typing import FrozenSet, Iterable
+
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+RETRY_STATUSES = frozenset({500, 502, 503, 504})
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter for transient failures.
+
+    Only idempotent methods are retried after server errors or broken
+    connections, since a POST or PATCH may already have been applied.
+    Failures to connect are retried for every method because the request
+    never reached the server.
+    """
+
+    def __init__(self, max_retries: int = 3, backoff_base: float = 0.25, backoff_max: float = 10.0,
+                 retry_statuses: Iterable[int] = RETRY_STATUSES, methods: Iterable[str] = IDEMPOTENT_METHODS):
+        """
+        Initialize a new instance of RetryPolicy.
+
+        Args:
+            max_retries (int, optional): The maximum number of retries per request.
+            backoff_base (float, optional): The backoff in seconds before the first retry.
+            backoff_max (float, optional): The upper bound of the backoff in seconds.
+            retry_statuses (Iterable[int], optional): The HTTP status codes that are retried.
+            methods (Iterable[str], optional): The HTTP methods that are safe to retry.
+        """
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_statuses: FrozenSet[int] = frozenset(retry_statuses)
+        self.methods: FrozenSet[str] = frozenset(method.upper() for method in methods)
+
+    def can_retry(self, method: str, attempt: int) -> bool:
+        """
+        Check whether a request may be sent again after a transient failure.
+
+        Args:
+            method (str): The HTTP method.
+            attempt (int): The number of retries already made.
+
+        Returns:
+            bool: True if the request can be retried.
+        """
+        return attempt < self.max_retries and method.upper() in self.methods
+
+    def should_retry_status(self, method: str, status: int, attempt: int) -> bool:
+        """
+        Check whether a response status should be retried.
+
+        Args:
+            method (str): The HTTP method.
+            status (int): The HTTP status code.
+            attempt (int): The number of retries already made.
+
+        Returns:
+            bool: True if the request should be retried.
+        """
+        return status in self.retry_statuses and self.can_retry(method, attempt)
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Compute a jittered delay before the next retry.
+
+        Args:
+            attempt (int): The number of retries already made.
+
+        Returns:
+            float: The number of seconds to wait.
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
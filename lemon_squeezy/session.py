@@ -0,0 +1,206 @@
+import time
+import requests
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError, wait
+from requests.adapters import HTTPAdapter
+from typing import Callable, Optional, Tuple, Union
+from .rate_limit import TokenBucket, parse_retry_after
+from .retry import RetryPolicy
+
+DEFAULT_TIMEOUT = (3.05, 30.0)
+DEFAULT_POOL_MAXSIZE = 32
+
+
+class LemonSqueezySession(requests.Session):
+    """
+    requests Session that paces every request through a shared rate limiter.
+
+    All resource classes share one session, so they also share its token
+    bucket. Requests over the limit wait for a token instead of failing, and
+    429 responses are retried after the delay given by `Retry-After`.
+
+    The session also applies default connect/read timeouts, retries transient
+    failures according to a RetryPolicy, keeps a connection pool sized for
+    concurrent use and can hedge slow GET requests with a second attempt.
+    """
+
+    def __init__(self, rate_limiter: Optional[TokenBucket] = None, max_rate_limit_retries: int = 5,
+                 default_retry_after: float = 1.0,
+                 timeout: Optional[Union[float, Tuple[float, float]]] = DEFAULT_TIMEOUT,
+                 retry_policy: Optional[RetryPolicy] = None, pool_connections: int = 10,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE, hedge_after: Optional[float] = None):
+        """
+        Initialize a new instance of LemonSqueezySession.
+
+        Args:
+            rate_limiter (TokenBucket, optional): The token bucket shared by all requests, or None to disable pacing.
+            max_rate_limit_retries (int, optional): How many times a 429 response is retried before it is returned.
+            default_retry_after (float, optional): The base delay in seconds when a 429 has no Retry-After header,
+                doubled on every retry.
+            timeout (float or Tuple[float, float], optional): The default (connect, read) timeout in seconds.
+            retry_policy (RetryPolicy, optional): The policy for retrying 5xx responses and connection errors.
+            pool_connections (int, optional): The number of per-host connection pools to keep.
+            pool_maxsize (int, optional): The maximum number of connections kept per host.
+            hedge_after (float, optional): Seconds after which a still pending GET is raced against a second
+                identical request; None disables hedging.
+        """
+        super().__init__()
+        self.rate_limiter = rate_limiter
+        self.max_rate_limit_retries = max_rate_limit_retries
+        self.default_retry_after = default_retry_after
+        self.timeout = timeout
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.hedge_after = hedge_after
+        # Called with the method, URL and reason ('connect', 'connection', 'rate_limited' or 'status') of
+        # every retry, e.g. by Metrics
+        self.on_retry: Optional[Callable[[str, str, str], None]] = None
+        self._hedge_executor = None
+
+        # Retries are handled here rather than by urllib3
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+        self.pool_maxsize = pool_maxsize
+
+    def request(self, method, url, *args, **kwargs) -> requests.Response:
+        """
+        Send a request once the rate limiter allows it, retrying 429 responses and transient failures.
+
+        Returns:
+            requests.Response: The response of the last attempt.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        rate_limiter = self.rate_limiter_for(kwargs)
+        rate_limited = 0
+        attempt = 0
+        while True:
+            try:
+                if self.hedge_after is not None and method.upper() == 'GET':
+                    response = self._send_hedged(method, url, *args, **kwargs)
+                else:
+                    response = self._send(method, url, *args, **kwargs)
+            except requests.exceptions.ConnectTimeout:
+                # The request never reached the server, so any method can be retried
+                if attempt >= self.retry_policy.max_retries:
+                    raise
+                time.sleep(self.retry_policy.backoff(attempt))
+                if self.on_retry is not None:
+                    self.on_retry(method, url, 'connect')
+                attempt += 1
+                continue
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if not self.retry_policy.can_retry(method, attempt):
+                    raise
+                time.sleep(self.retry_policy.backoff(attempt))
+                if self.on_retry is not None:
+                    self.on_retry(method, url, 'connection')
+                attempt += 1
+                continue
+
+            if response.status_code == 429 and rate_limited < self.max_rate_limit_retries:
+                retry_after = parse_retry_after(response.headers)
+                if retry_after is None:
+                    retry_after = self.default_retry_after * 2 ** rate_limited
+                if rate_limiter is not None:
+                    rate_limiter.pause(retry_after)
+                else:
+                    time.sleep(retry_after)
+                response.close()
+                if self.on_retry is not None:
+                    self.on_retry(method, url, 'rate_limited')
+                rate_limited += 1
+                continue
+
+            if self.retry_policy.should_retry_status(method, response.status_code, attempt):
+                retry_after = parse_retry_after(response.headers)
+                response.close()
+                time.sleep(retry_after if retry_after is not None else self.retry_policy.backoff(attempt))
+                if self.on_retry is not None:
+                    self.on_retry(method, url, 'status')
+                attempt += 1
+                continue
+
+            return response
+
+    def rate_limiter_for(self, kwargs: dict) -> Optional[TokenBucket]:
+        """
+        Return the token bucket pacing a request; override to pace requests per API key.
+
+        Args:
+            kwargs (dict): The keyword arguments of the request, e.g. its headers.
+
+        Returns:
+            TokenBucket: The bucket, or None if the request is not paced.
+        """
+        return self.rate_limiter
+
+    def _send(self, method, url, *args, **kwargs) -> requests.Response:
+        rate_limiter = self.rate_limiter_for(kwargs)
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        return self._transmit(rate_limiter, method, url, *args, **kwargs)
+
+    def _transmit(self, rate_limiter: Optional[TokenBucket], method, url, *args, **kwargs) -> requests.Response:
+        response = super().request(method, url, *args, **kwargs)
+        if rate_limiter is not None:
+            rate_limiter.sync(response.headers)
+        return response
+
+    def _send_hedged(self, method, url, *args, **kwargs) -> requests.Response:
+        """
+        Send a request and, if it is still pending after `hedge_after`, race it against a second one.
+
+        The token of the first request is taken before its timer starts, so
+        only time in flight counts towards `hedge_after`. The second request
+        is only sent if a token is available right away, so hedging never
+        adds traffic while the rate limit is exhausted. The first successful
+        response wins; the other one is closed once it completes.
+
+        Returns:
+            requests.Response: The winning response.
+        """
+        if self._hedge_executor is None:
+            self._hedge_executor = ThreadPoolExecutor(max_workers=self.pool_maxsize * 2)
+
+        rate_limiter = self.rate_limiter_for(kwargs)
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        primary = self._hedge_executor.submit(self._transmit, rate_limiter, method, url, *args, **kwargs)
+        try:
+            return primary.result(timeout=self.hedge_after)
+        except TimeoutError:
+            pass
+        if rate_limiter is not None and not rate_limiter.try_acquire():
+            return primary.result()
+
+        secondary = self._hedge_executor.submit(self._transmit, rate_limiter, method, url, *args, **kwargs)
+        pending = {primary, secondary}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = None
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                elif winner is None:
+                    winner = future.result()
+                else:
+                    future.result().close()
+            if winner is not None:
+                for future in pending:
+                    future.add_done_callback(_close_response)
+                return winner
+        raise error
+
+    def close(self) -> None:
+        """
+        Close the connection pools and the hedging threads.
+        """
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False)
+            self._hedge_executor = None
+        super().close()
+
+
+def _close_response(future) -> None:
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
@@ -1,40 +1,31 @@
-import requests
-from typing import Dict, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+from .bulk import BulkProgress, BulkReport, run_bulk
+from .resource import Resource
+from .retry import RetryPolicy
 
-class Subscription:
+class Subscription(Resource):
     """
     Class for interacting with the 'subscription' part of the API.
     """
 
-    def __init__(self, session: requests.Session):
-        """
-        Initialize a new instance of Subscription.
-
-        Args:
-            session (requests.Session): The requests Session to use for making requests.
-        """
-        self.session = session
-
-    def get_subscription(self, subscription_id: int) -> Optional[Dict]:
+    def get_subscription(self, subscription_id: int, include: Optional[Iterable[str]] = None,
+                         fields: Optional[Dict[str, Iterable[str]]] = None) -> Dict:
         """
         Get the details of a specific subscription.
 
         Args:
             subscription_id (int): The ID of the subscription.
+            include (Iterable[str], optional): Related resources to include; the response is then
+                resolved into a Document.
+            fields (Dict[str, Iterable[str]], optional): The attributes and relationships to return per
+                resource type (`fields[type]`); anything else is also dropped after decoding.
 
         Returns:
             Dict: The JSON response from the API.
         """
-        url = f"{self.session.params['api_url']}/v1/subscriptions/{subscription_id}"
-        try:
-            response = self.session.get(url)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f'Error getting subscription: {e}')
-            return None
-
-    def update_subscription(self, subscription_id: int, data: Dict) -> Optional[Dict]:
+        return self._request('GET', f'/v1/subscriptions/{subscription_id}', include=include, fields=fields)
+
+    def update_subscription(self, subscription_id: int, data: Dict) -> Dict:
         """
         Update a specific subscription.
 
@@ -45,16 +36,9 @@ class Subscription:
         Returns:
             Dict: The JSON response from the API.
         """
-        url = f"{self.session.params['api_url']}/v1/subscriptions/{subscription_id}"
-        try:
-            response = self.session.patch(url, json=data)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f'Error updating subscription: {e}')
-            return None
-
-    def delete_subscription(self, subscription_id: int) -> Optional[Dict]:
+        return self._request('PATCH', f'/v1/subscriptions/{subscription_id}', json=data)
+
+    def delete_subscription(self, subscription_id: int) -> Dict:
         """
         Delete a specific subscription.
 
@@ -64,32 +48,53 @@ class Subscription:
         Returns:
             Dict: The JSON response from the API.
         """
-        url = f"{self.session.params['api_url']}/v1/subscriptions/{subscription_id}"
-        try:
-            response = self.session.delete(url)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f'Error deleting subscription: {e}')
-            return None
+        return self._request('DELETE', f'/v1/subscriptions/{subscription_id}')
 
-    def list_subscriptions(self, store_id: Optional[int] = None, order_id: Optional[int] = None, 
-                           order_item_id: Optional[int] = None, product_id: Optional[int] = None, 
-                           variant_id: Optional[int] = None) -> Optional[Dict]:
+    def _update_payload(self, subscription_id: Any, attributes: Dict) -> Dict:
+        return {'data': {'type': 'subscriptions', 'id': str(subscription_id), 'attributes': attributes}}
+
+    def bulk_update_subscriptions(self, updates: Dict[Any, Dict], concurrency: int = 8,
+                                  retry_policy: Optional[RetryPolicy] = None,
+                                  on_progress: Optional[Callable[[BulkProgress], None]] = None) -> BulkReport:
         """
-        List all subscriptions, optionally filtered by store ID, order ID, order item ID, product ID, and variant ID.
+        Update many subscriptions concurrently, e.g. for a price migration or a mass pause.
+
+        Requests share the client's rate limiter. Every update sets absolute
+        attribute values, so updates that failed with a retryable error are
+        retried, and `report.retryable` can safely be passed to another run.
 
         Args:
-            store_id (int, optional): The ID of the store.
-            order_id (int, optional): The ID of the order.
-            order_item_id (int, optional): The ID of the order item.
-            product_id (int, optional): The ID of the product.
-            variant_id (int, optional): The ID of the variant.
+            updates (Dict[Any, Dict]): The attributes to set, keyed by subscription ID,
+                e.g. {1: {'pause': {'mode': 'void'}}}.
+            concurrency (int, optional): The maximum number of requests in flight.
+            retry_policy (RetryPolicy, optional): How often to retry an update after a retryable error.
+            on_progress (Callable[[BulkProgress], None], optional): Called after every finished update.
 
         Returns:
-            Dict: The JSON response from the API.
+            BulkReport: The IDs that were updated and the failures.
+        """
+        return run_bulk(lambda id: self.update_subscription(id, self._update_payload(id, updates[id])),
+                        updates, concurrency, retry_policy, on_progress)
+
+    def bulk_cancel_subscriptions(self, subscription_ids: Iterable[Any], concurrency: int = 8,
+                                  retry_policy: Optional[RetryPolicy] = None,
+                                  on_progress: Optional[Callable[[BulkProgress], None]] = None) -> BulkReport:
+        """
+        Cancel many subscriptions concurrently.
+
+        Args:
+            subscription_ids (Iterable): The IDs of the subscriptions.
+            concurrency (int, optional): The maximum number of requests in flight.
+            retry_policy (RetryPolicy, optional): How often to retry a cancellation after a retryable error.
+            on_progress (Callable[[BulkProgress], None], optional): Called after every finished cancellation.
+
+        Returns:
+            BulkReport: The IDs that were cancelled and the failures.
         """
-        url = f"{self.session.params['api_url']}/v1/subscriptions"
+        return run_bulk(self.delete_subscription, subscription_ids, concurrency, retry_policy, on_progress)
+
+    def _filters(self, store_id: Optional[int], order_id: Optional[int], order_item_id: Optional[int],
+                 product_id: Optional[int], variant_id: Optional[int]) -> Dict:
         params = {}
         if store_id is not None:
             params['filter[store_id]'] = store_id
@@ -101,11 +106,55 @@ class Subscription:
             params['filter[product_id]'] = product_id
         if variant_id is not None:
             params['filter[variant_id]'] = variant_id
+        return params
+
+    def list_subscriptions(self, store_id: Optional[int] = None, order_id: Optional[int] = None, 
+                           order_item_id: Optional[int] = None, product_id: Optional[int] = None, 
+                           variant_id: Optional[int] = None, include: Optional[Iterable[str]] = None,
+                           fields: Optional[Dict[str, Iterable[str]]] = None) -> Dict:
+        """
+        List all subscriptions, optionally filtered by store ID, order ID, order item ID, product ID, and variant ID.
+
+        Args:
+            store_id (int, optional): The ID of the store.
+            order_id (int, optional): The ID of the order.
+            order_item_id (int, optional): The ID of the order item.
+            product_id (int, optional): The ID of the product.
+            variant_id (int, optional): The ID of the variant.
+            include (Iterable[str], optional): Related resources to include; the response is then
+                resolved into a Document.
+            fields (Dict[str, Iterable[str]], optional): The attributes and relationships to return per
+                resource type (`fields[type]`); anything else is also dropped after decoding.
 
-        try:
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f'Error listing subscriptions: {e}')
-            return None
+        Returns:
+            Dict: The JSON response from the API.
+        """
+        params = self._filters(store_id, order_id, order_item_id, product_id, variant_id)
+        return self._request('GET', '/v1/subscriptions', params, include=include, fields=fields)
+
+    def iter_subscriptions(self, store_id: Optional[int] = None, order_id: Optional[int] = None,
+                           order_item_id: Optional[int] = None, product_id: Optional[int] = None,
+                           variant_id: Optional[int] = None, page_size: Optional[int] = None,
+                           concurrency: int = 1, include: Optional[Iterable[str]] = None,
+                           fields: Optional[Dict[str, Iterable[str]]] = None) -> Iterator[Dict]:
+        """
+        Iterate over all subscriptions across every page, optionally filtered like list_subscriptions.
+
+        Args:
+            store_id (int, optional): The ID of the store.
+            order_id (int, optional): The ID of the order.
+            order_item_id (int, optional): The ID of the order item.
+            product_id (int, optional): The ID of the product.
+            variant_id (int, optional): The ID of the variant.
+            page_size (int, optional): The number of subscriptions fetched per page.
+            concurrency (int, optional): The number of pages prefetched concurrently.
+            include (Iterable[str], optional): Related resources to include; resources are then
+                yielded as linked ResourceObjects.
+            fields (Dict[str, Iterable[str]], optional): The attributes and relationships to return per
+                resource type (`fields[type]`); anything else is also dropped after decoding.
+
+        Yields:
+            Dict: Each subscription resource object.
+        """
+        params = self._filters(store_id, order_id, order_item_id, product_id, variant_id)
+        return self._iter('/v1/subscriptions', params, page_size, concurrency, include=include, fields=fields)
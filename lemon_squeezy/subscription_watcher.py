@@ -0,0 +1,302 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from .models import parse_timestamp
+from .pagination import iter_changed_pages, iter_pages
+from .pipeline import Pipeline
+
+ID = Union[int, str]
+Group = Tuple[Optional[ID], Optional[ID], Optional[ID]]
+
+# Attributes that change without the subscription changing, e.g. the signed URLs
+DEFAULT_IGNORED = ('updated_at', 'urls')
+
+
+class SubscriptionChange:
+    """
+    A change of a watched subscription's attributes.
+    """
+
+    __slots__ = ('id', 'previous', 'current', 'changes')
+
+    def __init__(self, id: str, previous: Dict, current: Dict, changes: Dict[str, Tuple[Any, Any]]):
+        self.id = id
+        self.previous = previous
+        self.current = current
+        # The old and new value of every changed attribute
+        self.changes = changes
+
+    def __repr__(self) -> str:
+        return f'<SubscriptionChange {self.id} {", ".join(self.changes)}>'
+
+
+class _Watched:
+    __slots__ = ('group', 'attributes', 'due', 'missing')
+
+    def __init__(self, group: Group):
+        self.group = group
+        self.attributes: Optional[Dict] = None
+        self.due = 0.0
+        # Not found by a complete scan of the group, e.g. a deleted or mistyped ID
+        self.missing = False
+
+
+class SubscriptionWatcher:
+    """
+    Tracks the state of many subscriptions with paginated list scans instead of one GET per subscription.
+
+    Watched subscriptions are grouped by their store, product and variant
+    filters, and a group is scanned with `list_subscriptions` pages when any of
+    its subscriptions is due. Once every subscription of a group has been seen,
+    scans ask for the newest changes first and stop at the newest `updated_at`
+    of the previous scan, so a quiet group costs one request. Each
+    subscription's next check depends on its state, see `interval`. Only
+    attribute changes are reported; the first sighting sets the baseline.
+    Subscriptions a complete scan of their group doesn't find are listed by
+    `missing` and no longer force full scans; they are picked up again if
+    a later scan returns them.
+    """
+
+    def __init__(self, pipeline: Pipeline, on_change: Optional[Callable[[SubscriptionChange], Any]] = None,
+                 page_size: int = 100, interval: float = 3600.0, near_interval: float = 300.0,
+                 past_due_interval: float = 60.0, ended_interval: float = 6 * 3600.0, near_window: float = 86400.0,
+                 ignored: Iterable[str] = DEFAULT_IGNORED):
+        """
+        Initialize a new instance of SubscriptionWatcher.
+
+        Args:
+            pipeline (Pipeline): The pipeline to send requests through, e.g. `LemonSqueezy(...).pipeline`.
+            on_change (Callable[[SubscriptionChange], Any], optional): Called for every change found.
+            page_size (int, optional): The number of subscriptions fetched per page.
+            interval (float, optional): Seconds between checks of a subscription with nothing coming up.
+            near_interval (float, optional): Seconds between checks while `renews_at`, `ends_at` or
+                `trial_ends_at` is within `near_window`.
+            past_due_interval (float, optional): Seconds between checks of a past due or unpaid subscription.
+            ended_interval (float, optional): Seconds between checks of an expired subscription.
+            near_window (float, optional): Seconds around a renewal or end in which checks are frequent.
+            ignored (Iterable[str], optional): Attributes whose changes are not reported.
+        """
+        self.pipeline = pipeline
+        self.on_change = on_change
+        self.page_size = page_size
+        self.intervals = {
+            'default': interval,
+            'near': near_interval,
+            'past_due': past_due_interval,
+            'ended': ended_interval,
+        }
+        self.near_window = near_window
+        self.ignored = frozenset(ignored)
+        self.requests = 0
+        self.last_error: Optional[Exception] = None
+        self._watched: Dict[str, _Watched] = {}
+        # The newest `updated_at` of the last scan of every group
+        self._high_water: Dict[Group, str] = {}
+        self._lock = threading.RLock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, *subscription_ids: ID, store_id: Optional[ID] = None, product_id: Optional[ID] = None,
+              variant_id: Optional[ID] = None) -> None:
+        """
+        Start watching subscriptions; they are checked on the next poll.
+
+        Args:
+            *subscription_ids (int or str): The IDs of the subscriptions.
+            store_id (int or str, optional): The store of the subscriptions.
+            product_id (int or str, optional): The product of the subscriptions.
+            variant_id (int or str, optional): The variant of the subscriptions.
+        """
+        group = (store_id, product_id, variant_id)
+        with self._lock:
+            for subscription_id in subscription_ids:
+                subscription_id = str(subscription_id)
+                watched = self._watched.get(subscription_id)
+                if watched is None or watched.group != group:
+                    self._watched[subscription_id] = _Watched(group)
+        self._wakeup.set()
+
+    def unwatch(self, *subscription_ids: ID) -> None:
+        """
+        Stop watching subscriptions.
+
+        Args:
+            *subscription_ids (int or str): The IDs of the subscriptions.
+        """
+        with self._lock:
+            for subscription_id in subscription_ids:
+                self._watched.pop(str(subscription_id), None)
+
+    def get(self, subscription_id: ID) -> Optional[Dict]:
+        """
+        Return the last seen attributes of a watched subscription.
+
+        Args:
+            subscription_id (int or str): The ID of the subscription.
+
+        Returns:
+            Dict: The attributes, or None if the subscription has not been seen yet.
+        """
+        watched = self._watched.get(str(subscription_id))
+        return watched.attributes if watched is not None else None
+
+    def missing(self) -> List[str]:
+        """
+        Return the IDs of the watched subscriptions a complete scan of their group did not find.
+        """
+        with self._lock:
+            return [id for id, watched in self._watched.items() if watched.missing]
+
+    def interval(self, attributes: Dict, now: float) -> float:
+        """
+        Return the seconds until a subscription is checked again; override to change the policy.
+
+        Args:
+            attributes (Dict): The attributes of the subscription.
+            now (float): The current time as a time.time() timestamp.
+
+        Returns:
+            float: The seconds until the next check.
+        """
+        status = attributes.get('status')
+        if status in ('past_due', 'unpaid'):
+            return self.intervals['past_due']
+        if status == 'expired':
+            return self.intervals['ended']
+        for name in ('renews_at', 'ends_at', 'trial_ends_at'):
+            moment = parse_timestamp(attributes.get(name))
+            if moment is not None and abs(moment.timestamp() - now) <= self.near_window:
+                return self.intervals['near']
+        return self.intervals['default']
+
+    def next_due(self) -> Optional[float]:
+        """
+        Return when the next subscription is due, as a time.time() timestamp, or None if nothing is watched.
+        """
+        with self._lock:
+            return min((watched.due for watched in self._watched.values()), default=None)
+
+    def poll(self, now: Optional[float] = None) -> List[SubscriptionChange]:
+        """
+        Scan every group with a due subscription and report the changes.
+
+        Args:
+            now (float, optional): The current time as a time.time() timestamp.
+
+        Returns:
+            List[SubscriptionChange]: The changes found, also passed to `on_change`.
+        """
+        now = time.time() if now is None else now
+        changes = []
+        with self._lock:
+            groups = {watched.group for watched in self._watched.values() if watched.due <= now}
+            for group in groups:
+                changes.extend(self._scan(group, now))
+        if self.on_change is not None:
+            for change in changes:
+                self.on_change(change)
+        return changes
+
+    def _scan(self, group: Group, now: float) -> List[SubscriptionChange]:
+        members = {id: watched for id, watched in self._watched.items() if watched.group == group}
+        params = {f'filter[{name}]': value for name, value in zip(('store_id', 'product_id', 'variant_id'), group)
+                  if value is not None}
+        high_water = self._high_water.get(group)
+        full = high_water is None or any(watched.attributes is None and not watched.missing
+                                         for watched in members.values())
+        if full:
+            # Every page until all members are found, since a new one may be anywhere. Newest first, so the
+            # high-water mark is right even if the scan stops early.
+            pages = iter_pages(self.pipeline, '/v1/subscriptions', dict(params, sort='-updated_at'), self.page_size)
+        else:
+            pages = iter_changed_pages(self.pipeline, '/v1/subscriptions', params, high_water, self.page_size)
+        missing = set(members)
+
+        changes = []
+        for page in pages:
+            self.requests += 1
+            for subscription in page.get('data') or []:
+                attributes = subscription.get('attributes') or {}
+                updated_at = attributes.get('updated_at') or ''
+                if high_water is None or updated_at > high_water:
+                    high_water = updated_at
+                watched = members.get(subscription['id'])
+                if watched is None:
+                    continue
+                missing.discard(subscription['id'])
+                watched.missing = False
+                change = self._diff(subscription['id'], watched.attributes, attributes)
+                if change is not None:
+                    changes.append(change)
+                watched.attributes = attributes
+            if full and not missing:
+                break
+
+        if full:
+            # Every page was scanned without finding these, so scanning them all again wouldn't either
+            for subscription_id in missing:
+                members[subscription_id].missing = True
+        if high_water is not None:
+            self._high_water[group] = high_water
+        # Members the scan did not return are unchanged since their last sighting
+        for watched in members.values():
+            watched.due = now + self.interval(watched.attributes or {}, now)
+        return changes
+
+    def _diff(self, id: str, previous: Optional[Dict], current: Dict) -> Optional[SubscriptionChange]:
+        if previous is None:
+            return None
+        changes = {
+            name: (previous.get(name), current.get(name))
+            for name in previous.keys() | current.keys()
+            if name not in self.ignored and previous.get(name) != current.get(name)
+        }
+        return SubscriptionChange(id, previous, current, changes) if changes else None
+
+    def start(self) -> 'SubscriptionWatcher':
+        """
+        Poll in a background thread whenever a subscription is due.
+
+        A failed poll is recorded in `last_error` and retried after `past_due_interval` seconds.
+
+        Returns:
+            SubscriptionWatcher: The watcher itself.
+        """
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='lemon-squeezy-subscription-watcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stop the background polling.
+        """
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.clear()
+            try:
+                self.poll()
+                self.last_error = None
+                due = self.next_due()
+                timeout = self.intervals['default'] if due is None else max(0.0, due - time.time())
+            except Exception as e:
+                self.last_error = e
+                timeout = self.intervals['past_due']
+            self._wakeup.wait(timeout)
+
+    def __enter__(self) -> 'SubscriptionWatcher':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def __len__(self) -> int:
+        return len(self._watched)
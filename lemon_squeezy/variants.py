@@ -1,57 +1,68 @@
-import requests
-from typing import Dict, Optional
+from typing import Dict, Iterable, Iterator, Optional
+from .resource import Resource
 
-class Variants:
+class Variants(Resource):
     """
     Class for interacting with the 'variants' part of the API.
     """
 
-    def __init__(self, session: requests.Session):
-        """
-        Initialize a new instance of Variants.
-
-        Args:
-            session (requests.Session): The requests Session to use for making requests.
-        """
-        self.session = session
-
-    def get_variant(self, variant_id: int) -> Optional[Dict]:
+    def get_variant(self, variant_id: int, include: Optional[Iterable[str]] = None,
+                    fields: Optional[Dict[str, Iterable[str]]] = None) -> Dict:
         """
         Get the details of a specific variant.
 
         Args:
             variant_id (int): The ID of the variant.
+            include (Iterable[str], optional): Related resources to include; the response is then
+                resolved into a Document.
+            fields (Dict[str, Iterable[str]], optional): The attributes and relationships to return per
+                resource type (`fields[type]`); anything else is also dropped after decoding.
 
         Returns:
             Dict: The JSON response from the API.
         """
-        url = f"{self.session.params['api_url']}/v1/variants/{variant_id}"
-        try:
-            response = self.session.get(url)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f'Error getting variant: {e}')
-            return None
-
-    def get_all_variants(self, product_id: Optional[int] = None) -> Optional[Dict]:
+        return self._request('GET', f'/v1/variants/{variant_id}', include=include, fields=fields)
+
+    def _filters(self, product_id: Optional[int]) -> Dict:
+        params = {}
+        if product_id:
+            params['filter[product_id]'] = product_id
+        return params
+
+    def get_all_variants(self, product_id: Optional[int] = None, include: Optional[Iterable[str]] = None,
+                         fields: Optional[Dict[str, Iterable[str]]] = None) -> Dict:
         """
         Get the details of all variants, optionally filtered by product ID.
 
         Args:
             product_id (int, optional): The ID of the product.
+            include (Iterable[str], optional): Related resources to include; the response is then
+                resolved into a Document.
+            fields (Dict[str, Iterable[str]], optional): The attributes and relationships to return per
+                resource type (`fields[type]`); anything else is also dropped after decoding.
 
         Returns:
             Dict: The JSON response from the API.
         """
-        url = f"{self.session.params['api_url']}/v1/variants"
-        if product_id:
-            url += f'?filter[product_id]={product_id}'
-
-        try:
-            response = self.session.get(url)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f'Error getting variants: {e}')
-            return None
+        return self._request('GET', '/v1/variants', self._filters(product_id), include=include, fields=fields)
+
+    def iter_variants(self, product_id: Optional[int] = None, page_size: Optional[int] = None,
+                      concurrency: int = 1, include: Optional[Iterable[str]] = None,
+                      fields: Optional[Dict[str, Iterable[str]]] = None) -> Iterator[Dict]:
+        """
+        Iterate over all variants across every page, optionally filtered by product ID.
+
+        Args:
+            product_id (int, optional): The ID of the product.
+            page_size (int, optional): The number of variants fetched per page.
+            concurrency (int, optional): The number of pages prefetched concurrently.
+            include (Iterable[str], optional): Related resources to include; resources are then
+                yielded as linked ResourceObjects.
+            fields (Dict[str, Iterable[str]], optional): The attributes and relationships to return per
+                resource type (`fields[type]`); anything else is also dropped after decoding.
+
+        Yields:
+            Dict: Each variant resource object.
+        """
+        return self._iter('/v1/variants', self._filters(product_id), page_size, concurrency,
+                          include=include, fields=fields)
@@ -0,0 +1,484 @@
+import asyncio
+import hashlib
+import hmac
+import queue
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Union
+from .codec import DEFAULT_CODEC, JSONCodec, get_codec
+from .models import Model, model_for
+
+SIGNATURE_HEADER = 'X-Signature'
+EVENT_NAME_HEADER = 'X-Event-Name'
+
+Handler = Callable[['WebhookEvent'], Any]
+
+
+def _key(secret: Union[str, bytes]) -> bytes:
+    return secret.encode('utf-8') if isinstance(secret, str) else secret
+
+
+def compute_signature(secret: Union[str, bytes], body: bytes) -> str:
+    """
+    Compute the signature of a webhook body.
+
+    Args:
+        secret (str or bytes): The signing secret of the webhook.
+        body (bytes): The raw request body.
+
+    Returns:
+        str: The hex encoded HMAC-SHA256 of the body.
+    """
+    return hmac.new(_key(secret), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(secret: Union[str, bytes], body: bytes, signature: Optional[str]) -> bool:
+    """
+    Check the `X-Signature` header of a webhook request in constant time.
+
+    Args:
+        secret (str or bytes): The signing secret of the webhook.
+        body (bytes): The raw request body.
+        signature (str, optional): The value of the `X-Signature` header.
+
+    Returns:
+        bool: True if the signature matches the body.
+    """
+    if not signature:
+        return False
+    return hmac.compare_digest(compute_signature(secret, body), signature.strip().lower())
+
+
+def sign_payload(secret: Union[str, bytes], event_name: str, data: Dict, custom_data: Optional[Dict] = None,
+                 event_id: Optional[str] = None, codec: JSONCodec = DEFAULT_CODEC) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Build a signed webhook request as the API would send it, e.g. for tests and load tests.
+
+    Args:
+        secret (str or bytes): The signing secret of the webhook.
+        event_name (str): The event name, e.g. 'subscription_updated'.
+        data (Dict): The resource object of the event.
+        custom_data (Dict, optional): The custom data passed to the checkout.
+        event_id (str, optional): A unique ID of the event, stored in `meta.event_id`.
+        codec (JSONCodec, optional): The codec to encode the body with.
+
+    Returns:
+        Tuple[bytes, Dict[str, str]]: The request body and its headers.
+    """
+    meta = {'event_name': event_name}
+    if custom_data is not None:
+        meta['custom_data'] = custom_data
+    if event_id is not None:
+        meta['event_id'] = event_id
+    body = codec.encode({'meta': meta, 'data': data})
+    return body, {
+        'Content-Type': 'application/json',
+        EVENT_NAME_HEADER: event_name,
+        SIGNATURE_HEADER: compute_signature(secret, body),
+    }
+
+
+class WebhookEvent:
+    """
+    A verified webhook event.
+    """
+
+    __slots__ = ('name', 'meta', 'data', 'key', '_resource')
+
+    def __init__(self, name: str, meta: Dict, data: Dict):
+        """
+        Initialize a new instance of WebhookEvent.
+
+        Args:
+            name (str): The event name, e.g. 'subscription_updated'.
+            meta (Dict): The `meta` member of the payload.
+            data (Dict): The resource object of the event.
+        """
+        self.name = name
+        self.meta = meta
+        self.data = data
+        self._resource = None
+        # Redeliveries carry the same body, so without an event ID the resource version identifies the event.
+        # `meta.webhook_id` names the configured webhook, not the delivery, so it can't be used here.
+        event_id = meta.get('event_id')
+        if event_id:
+            self.key = (name, event_id)
+        else:
+            attributes = data.get('attributes') or {}
+            self.key = (name, data.get('type'), data.get('id'), attributes.get('updated_at'))
+
+    @property
+    def resource(self) -> Model:
+        """
+        The resource of the event as a model, e.g. a Subscription.
+        """
+        if self._resource is None:
+            self._resource = model_for(self.data['type'], self.data['id'])
+            self._resource.update(self.data)
+        return self._resource
+
+    @property
+    def custom_data(self) -> Optional[Dict]:
+        return self.meta.get('custom_data')
+
+    @property
+    def test_mode(self) -> bool:
+        return bool(self.meta.get('test_mode'))
+
+    def __repr__(self) -> str:
+        return f'<WebhookEvent {self.name} {self.data.get("type")}:{self.data.get("id")}>'
+
+
+class RecentKeys:
+    """
+    Thread-safe bounded LRU set, remembering the most recent event keys.
+    """
+
+    def __init__(self, max_size: int = 100000):
+        """
+        Initialize a new instance of RecentKeys.
+
+        Args:
+            max_size (int, optional): The number of keys remembered.
+        """
+        self.max_size = max_size
+        self._keys: 'OrderedDict[Any, None]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, key: Any) -> bool:
+        """
+        Remember a key.
+
+        Args:
+            key (Any): The key.
+
+        Returns:
+            bool: True if the key is new, False if it was seen recently.
+        """
+        with self._lock:
+            if key in self._keys:
+                self._keys.move_to_end(key)
+                return False
+            self._keys[key] = None
+            if len(self._keys) > self.max_size:
+                self._keys.popitem(last=False)
+            return True
+
+    def discard(self, key: Any) -> None:
+        with self._lock:
+            self._keys.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class WebhookReceiver:
+    """
+    Receives webhook requests: verifies them, drops redeliveries and hands events to a worker pool.
+
+    `receive` returns the HTTP status to answer with: 401 for a bad
+    signature, 400 for an unreadable body, 200 once the event is queued (or
+    was already received), and 503 when the queue stays full for
+    `enqueue_timeout` seconds, so the API delivers the event again later.
+    Workers first pass every event to `apply` (e.g. to update a Mirror or
+    invalidate a cache) and then to the handlers registered for its name.
+    """
+
+    def __init__(self, secret: Union[str, bytes], apply: Optional[Handler] = None, workers: int = 4,
+                 queue_size: int = 10000, enqueue_timeout: float = 1.0, dedupe_size: int = 100000,
+                 codec: Union[str, JSONCodec, None] = 'auto'):
+        """
+        Initialize a new instance of WebhookReceiver.
+
+        Args:
+            secret (str or bytes): The signing secret of the webhook.
+            apply (Callable[[WebhookEvent], Any], optional): Called with every event before its handlers.
+            workers (int, optional): The number of worker threads.
+            queue_size (int, optional): The maximum number of queued events.
+            enqueue_timeout (float, optional): Seconds to wait for room in a full queue before answering 503.
+            dedupe_size (int, optional): The number of recent event keys remembered to drop redeliveries.
+            codec (str or JSONCodec, optional): The JSON codec, see `get_codec`.
+        """
+        self.secret = _key(secret)
+        self.apply = apply
+        self.workers = workers
+        self.enqueue_timeout = enqueue_timeout
+        self.codec = get_codec(codec)
+        self.recent = RecentKeys(dedupe_size)
+        self.handlers: Dict[Optional[str], List[Handler]] = {}
+        self.errors: 'queue.Queue[Tuple[WebhookEvent, Exception]]' = queue.Queue(maxsize=1000)
+        self.queue: queue.Queue = self._create_queue(queue_size)
+        self._threads: List[threading.Thread] = []
+
+    def _create_queue(self, queue_size: int):
+        return queue.Queue(maxsize=queue_size)
+
+    def on(self, event_name: Optional[str] = None) -> Callable[[Handler], Handler]:
+        """
+        Register a handler for an event name, or for every event if no name is given.
+
+        Args:
+            event_name (str, optional): The event name, e.g. 'subscription_updated'.
+
+        Returns:
+            Callable: A decorator registering the handler.
+        """
+        def register(handler: Handler) -> Handler:
+            self.handlers.setdefault(event_name, []).append(handler)
+            return handler
+        return register
+
+    def parse(self, body: bytes, headers: Mapping[str, str]) -> Union[WebhookEvent, int]:
+        """
+        Verify and decode a webhook request.
+
+        Args:
+            body (bytes): The raw request body.
+            headers (Mapping[str, str]): The request headers.
+
+        Returns:
+            WebhookEvent or int: The event, or the HTTP status to answer with if the request is invalid.
+        """
+        if not verify_signature(self.secret, body, headers.get(SIGNATURE_HEADER)):
+            return 401
+        try:
+            payload = self.codec.decode(body)
+            meta = payload.get('meta') or {}
+            name = meta.get('event_name') or headers.get(EVENT_NAME_HEADER)
+            data = payload['data']
+        except (ValueError, TypeError, KeyError, AttributeError):
+            return 400
+        return WebhookEvent(name, meta, data)
+
+    def receive(self, body: bytes, headers: Mapping[str, str]) -> int:
+        """
+        Verify a webhook request and queue its event.
+
+        Args:
+            body (bytes): The raw request body.
+            headers (Mapping[str, str]): The request headers.
+
+        Returns:
+            int: The HTTP status to answer with.
+        """
+        event = self.parse(body, headers)
+        if isinstance(event, int):
+            return event
+        if not self.recent.add(event.key):
+            return 200
+        try:
+            self.queue.put(event, timeout=self.enqueue_timeout)
+        except queue.Full:
+            # Forget the event so its redelivery is accepted
+            self.recent.discard(event.key)
+            return 503
+        return 200
+
+    def dispatch(self, event: WebhookEvent) -> None:
+        """
+        Apply an event and run its handlers in the calling thread.
+
+        Args:
+            event (WebhookEvent): The event.
+        """
+        if self.apply is not None:
+            self.apply(event)
+        for handler in self.handlers.get(event.name, ()):
+            handler(event)
+        for handler in self.handlers.get(None, ()):
+            handler(event)
+
+    def _record_error(self, event: WebhookEvent, error: Exception) -> None:
+        try:
+            self.errors.put_nowait((event, error))
+        except queue.Full:
+            pass
+
+    def _work(self) -> None:
+        while True:
+            event = self.queue.get()
+            try:
+                if event is None:
+                    return
+                self.dispatch(event)
+            except Exception as e:
+                self._record_error(event, e)
+            finally:
+                self.queue.task_done()
+
+    def start(self) -> 'WebhookReceiver':
+        """
+        Start the worker threads.
+
+        Returns:
+            WebhookReceiver: The receiver itself.
+        """
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f'lemon-squeezy-webhooks-{len(self._threads)}',
+                                      daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self) -> None:
+        """
+        Process the queued events and stop the worker threads.
+        """
+        for _ in self._threads:
+            self.queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def __enter__(self) -> 'WebhookReceiver':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def wsgi_app(self, environ: Dict, start_response: Callable) -> List[bytes]:
+        """
+        WSGI application receiving webhooks, to mount in an existing web server.
+        """
+        length = int(environ.get('CONTENT_LENGTH') or 0)
+        body = environ['wsgi.input'].read(length) if length else b''
+        headers = {SIGNATURE_HEADER: environ.get('HTTP_X_SIGNATURE'),
+                   EVENT_NAME_HEADER: environ.get('HTTP_X_EVENT_NAME')}
+        status = self.receive(body, headers)
+        start_response(f'{status} {_REASONS[status]}', [('Content-Type', 'text/plain'), ('Content-Length', '0')])
+        return [b'']
+
+    def make_server(self, host: str = '0.0.0.0', port: int = 8000) -> ThreadingHTTPServer:
+        """
+        Create a standalone HTTP server receiving webhooks on any path.
+
+        Args:
+            host (str, optional): The address to listen on.
+            port (int, optional): The port to listen on.
+
+        Returns:
+            ThreadingHTTPServer: The server; call `serve_forever()` on it.
+        """
+        receiver = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                status = receiver.receive(self.rfile.read(length), self.headers)
+                self.send_response(status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        return ThreadingHTTPServer((host, port), RequestHandler)
+
+
+class AsyncWebhookReceiver(WebhookReceiver):
+    """
+    WebhookReceiver for asyncio applications, with worker tasks and coroutine handlers.
+
+    `receive` is a coroutine that waits up to `enqueue_timeout` for room in
+    the asyncio queue. `apply` and the handlers may be coroutine functions.
+    """
+
+    def _create_queue(self, queue_size: int):
+        return asyncio.Queue(maxsize=queue_size)
+
+    async def receive(self, body: bytes, headers: Mapping[str, str]) -> int:
+        event = self.parse(body, headers)
+        if isinstance(event, int):
+            return event
+        if not self.recent.add(event.key):
+            return 200
+        try:
+            await asyncio.wait_for(self.queue.put(event), self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            self.recent.discard(event.key)
+            return 503
+        return 200
+
+    async def dispatch(self, event: WebhookEvent) -> None:
+        handlers = [self.apply] if self.apply is not None else []
+        handlers += self.handlers.get(event.name, []) + self.handlers.get(None, [])
+        for handler in handlers:
+            result = handler(event)
+            if asyncio.iscoroutine(result):
+                await result
+
+    async def _work(self) -> None:
+        while True:
+            event = await self.queue.get()
+            try:
+                await self.dispatch(event)
+            except Exception as e:
+                self._record_error(event, e)
+            finally:
+                self.queue.task_done()
+
+    def start(self) -> 'AsyncWebhookReceiver':
+        """
+        Start the worker tasks; must be called from a running event loop.
+
+        Returns:
+            AsyncWebhookReceiver: The receiver itself.
+        """
+        while len(self._threads) < self.workers:
+            self._threads.append(asyncio.ensure_future(self._work()))
+        return self
+
+    async def stop(self) -> None:
+        """
+        Process the queued events and cancel the worker tasks.
+        """
+        await self.queue.join()
+        for task in self._threads:
+            task.cancel()
+        self._threads = []
+
+    def __enter__(self):
+        raise TypeError('AsyncWebhookReceiver must be used with "async with", not "with"')
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    async def __aenter__(self) -> 'AsyncWebhookReceiver':
+        return self.start()
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+
+def mirror_applier(mirror) -> Handler:
+    """
+    Build an `apply` hook writing the resource of every event into a Mirror.
+
+    Args:
+        mirror (Mirror): The local mirror.
+
+    Returns:
+        Callable[[WebhookEvent], None]: The hook.
+    """
+    def apply(event: WebhookEvent) -> None:
+        mirror.put(event.data)
+    return apply
+
+
+def cache_invalidator(cache) -> Handler:
+    """
+    Build an `apply` hook dropping the cached responses of every event's resource.
+
+    Args:
+        cache (CacheMiddleware): The response cache middleware.
+
+    Returns:
+        Callable[[WebhookEvent], None]: The hook.
+    """
+    def apply(event: WebhookEvent) -> None:
+        cache.invalidate(event.data['type'], event.data['id'])
+    return apply
+
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 401: 'Unauthorized', 503: 'Service Unavailable'}
@@ -0,0 +1,16 @@
+import pytest
+from benchmarks.mock_server import Dataset, MockServer
+from lemon_squeezy import LemonSqueezy
+
+
+@pytest.fixture
+def server():
+    with MockServer(Dataset({'customers': 300, 'orders': 100, 'subscriptions': 250})) as server:
+        yield server
+
+
+@pytest.fixture
+def client(server):
+    client = LemonSqueezy(server.url, 'test', rate_limit=None)
+    yield client
+    client.session.close()
@@ -0,0 +1,131 @@
+from collections import Counter
+import pytest
+
+numpy = pytest.importorskip('numpy')
+
+from lemon_squeezy import analytics
+from lemon_squeezy.analytics import OrderColumns, SubscriptionColumns, monthly_prices
+
+ORDERS = [
+    # id, status, currency, variant, total, total_usd, refunded_amount, refunded_amount_usd, created_at
+    (1, 'paid', 'USD', 1, 1000, 1000, 0, 0, '2024-01-05T10:00:00.000000Z'),
+    (2, 'refunded', 'EUR', 1, 2000, 2200, 2000, 2200, '2024-01-20T10:00:00.000000Z'),
+    (3, 'pending', 'USD', 1, 500, 500, 0, 0, '2024-01-21T10:00:00.000000Z'),
+    (4, 'partial_refund', 'USD', 2, 3000, 3000, 1000, 1000, '2024-03-01T10:00:00.000000Z'),
+]
+
+SUBSCRIPTIONS = [
+    # id, variant, created_at, trial_ends_at, ends_at
+    (1, 1, '2024-01-10T00:00:00.000000Z', None, None),
+    # Counts from the end of its trial in February
+    (2, 2, '2024-01-20T00:00:00.000000Z', '2024-02-05T00:00:00.000000Z', '2024-04-15T00:00:00.000000Z'),
+    # Ends in the month it started, so it is never running at the end of a month
+    (3, 1, '2024-02-01T00:00:00.000000Z', None, '2024-02-20T00:00:00.000000Z'),
+    (4, 3, '2024-03-03T00:00:00.000000Z', None, None),
+]
+
+VARIANTS = [
+    {'id': '1', 'attributes': {'is_subscription': True, 'interval': 'month', 'interval_count': 1, 'price': 1000}},
+    {'id': '2', 'attributes': {'is_subscription': True, 'interval': 'year', 'interval_count': 1, 'price': 12000}},
+    {'id': '3', 'attributes': {'is_subscription': False, 'price': 5000}},
+    {'id': '4', 'attributes': {'is_subscription': True, 'interval': 'week', 'interval_count': 2, 'price': 120}},
+]
+
+
+def _orders():
+    return [{'type': 'orders', 'id': str(id), 'attributes': {
+        'status': status, 'currency': currency, 'first_order_item': {'variant_id': variant, 'product_id': 1},
+        'total': total, 'total_usd': total_usd, 'refunded_amount': refunded, 'refunded_amount_usd': refunded_usd,
+        'created_at': created_at, 'customer_id': id,
+    }} for id, status, currency, variant, total, total_usd, refunded, refunded_usd, created_at in ORDERS]
+
+
+def _subscriptions():
+    return [{'type': 'subscriptions', 'id': str(id), 'attributes': {
+        'status': 'active', 'variant_id': variant, 'product_id': 1, 'customer_id': id, 'created_at': created_at,
+        'trial_ends_at': trial_ends_at, 'ends_at': ends_at, 'renews_at': None,
+    }} for id, variant, created_at, trial_ends_at, ends_at in SUBSCRIPTIONS]
+
+
+def _lists(frame):
+    return {name: column.tolist() for name, column in frame.items()}
+
+
+def test_monthly_prices():
+    prices = monthly_prices(VARIANTS)
+    assert prices == {'1': 1000.0, '2': 1000.0, '4': pytest.approx(120 * 52 / 12 / 2)}
+
+
+def test_revenue_by_month():
+    orders = OrderColumns.from_resources(_orders())
+    frame = orders.revenue_by_month()
+    assert frame['month'].astype(str).tolist() == ['2024-01', '2024-03']
+    assert _lists({name: frame[name] for name in ('count', 'gross', 'refunded', 'net')}) == \
+        {'count': [2, 1], 'gross': [3200, 3000], 'refunded': [2200, 1000], 'net': [1000, 2000]}
+    assert orders.revenue_by_month(usd=False)['gross'].tolist() == [3000, 3000]
+
+
+def test_revenue_by_variant_and_currency():
+    frame = OrderColumns.from_resources(_orders()).revenue_by_variant_currency()
+    rows = list(zip(*(frame[name].tolist() for name in ('variant', 'currency', 'count', 'gross', 'net'))))
+    assert rows == [(1, 'USD', 1, 1000, 1000), (1, 'EUR', 1, 2000, 0), (2, 'USD', 1, 3000, 2000)]
+
+
+def test_mrr_by_month():
+    subscriptions = SubscriptionColumns.from_resources(_subscriptions())
+    frame = subscriptions.mrr_by_month(monthly_prices(VARIANTS), until='2024-05')
+    assert frame['month'].astype(str).tolist() == ['2024-01', '2024-02', '2024-03', '2024-04', '2024-05']
+    assert frame['active'].tolist() == [1, 2, 3, 2, 2]
+    assert frame['mrr'].tolist() == [1000, 2000, 2000, 1000, 1000]
+
+
+def test_churn_by_month():
+    frame = SubscriptionColumns.from_resources(_subscriptions()).churn_by_month(until='2024-05')
+    assert frame['active'].tolist() == [0, 1, 2, 3, 2]
+    assert frame['churned'].tolist() == [0, 0, 0, 1, 0]
+    assert numpy.isnan(frame['rate'][0])
+    assert frame['rate'][1:].tolist() == [0, 0, pytest.approx(1 / 3), 0]
+
+
+def test_cohort_retention():
+    frame = SubscriptionColumns.from_resources(_subscriptions()).cohort_retention(max_age=2, until='2024-05')
+    assert frame['size'].tolist() == [1, 2, 1, 0, 0]
+    retention = frame['retention']
+    assert retention[:3].tolist() == [[1.0, 1.0, 1.0], [0.5, 0.5, 0.0], [1.0, 1.0, 1.0]]
+    # No cohort, or ages past `until`
+    assert numpy.isnan(retention[3:]).all()
+
+
+def test_chunks_give_the_same_columns(monkeypatch):
+    whole = OrderColumns.from_resources(_orders())
+    monkeypatch.setattr(analytics, 'CHUNK_SIZE', 3)
+    chunked = OrderColumns.from_resources(_orders())
+    assert chunked.total.tolist() == whole.total.tolist()
+    assert chunked.status.values().tolist() == whole.status.values().tolist()
+    assert chunked.created_at.tolist() == whole.created_at.tolist()
+
+
+def test_tables_are_loaded_from_the_api(server, client):
+    sent = []
+
+    def record(request, call_next):
+        sent.append(request.params.get('fields[orders]'))
+        return call_next(request)
+
+    client.pipeline.use(record)
+    orders = OrderColumns.load(client.pipeline, store_id=1, page_size=30)
+    assert len(orders) == 100
+    assert set(sent) == {','.join(OrderColumns.fields)}
+
+    paid = [order for order in server.dataset.resources['orders'] if order['status'] in analytics.PAID_STATUSES]
+    frame = orders.revenue_by_month()
+    assert frame['count'].sum() == len(paid)
+    assert frame['gross'].sum() == sum(order['total_usd'] for order in paid)
+    statuses = Counter(order['status'] for order in server.dataset.resources['orders'])
+    assert Counter(orders.status.values().tolist()) == statuses
+
+
+def test_numpy_is_required(monkeypatch):
+    monkeypatch.setattr(analytics, 'numpy', None)
+    with pytest.raises(ImportError, match='numpy'):
+        OrderColumns.from_resources([])
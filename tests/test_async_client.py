@@ -0,0 +1,68 @@
+import asyncio
+import pytest
+from lemon_squeezy.async_client import AsyncLemonSqueezy
+from lemon_squeezy.exceptions import NotFoundError
+
+
+def _run(server, main, **kwargs):
+    async def run():
+        async with AsyncLemonSqueezy(server.url, 'test', rate_limit=None, **kwargs) as client:
+            return await main(client)
+    return asyncio.run(run())
+
+
+def test_calls_return_the_same_documents_as_the_sync_client(server, client):
+    async def main(client):
+        return await client.order.get_order(1), await client.subscription.list_subscriptions(store_id=1)
+
+    order, subscriptions = _run(server, main)
+    assert order == client.order.get_order(1)
+    assert subscriptions == client.subscription.list_subscriptions(store_id=1)
+
+
+def test_concurrent_calls_share_one_connection_pool(server):
+    created = []
+
+    async def main(client):
+        create_session = client._create_session
+        client._create_session = lambda: created.append(create_session()) or created[-1]
+        orders = await asyncio.gather(*(client.order.get_order(id) for id in range(1, 51)))
+        return orders, client.session.connector.limit
+
+    orders, limit = _run(server, main, limit=8)
+    assert [order['data']['id'] for order in orders] == [str(id) for id in range(1, 51)]
+    assert len(created) == 1 and limit == 8
+    assert created[0].closed
+
+
+@pytest.mark.parametrize('concurrency', [1, 4])
+def test_iterators_yield_every_resource_in_order(server, concurrency):
+    async def main(client):
+        return [order['id'] async for order in client.order.iter_orders(page_size=7, concurrency=concurrency)]
+
+    assert _run(server, main) == [str(id) for id in range(1, 101)]
+
+
+def test_async_middleware_sees_every_call(server):
+    seen = []
+
+    async def record(request, call_next):
+        response = await call_next(request)
+        seen.append((request.method, request.path, response.status_code))
+        return response
+
+    async def main(client):
+        await client.product.get_product(1)
+        with pytest.raises(NotFoundError):
+            await client.product.get_product(999)
+
+    _run(server, main, middleware=[record])
+    assert seen == [('GET', '/v1/products/1', 200), ('GET', '/v1/products/999', 404)]
+
+
+def test_models_and_includes(server):
+    async def main(client):
+        return await client.order.get_order(1, include=['customer'])
+
+    order = _run(server, main, models=True).primary
+    assert order.related['customer'].id == str(order.customer_id)
@@ -0,0 +1,152 @@
+import json
+import time
+import requests
+from benchmarks import run
+from benchmarks.mock_server import DEFAULT_PAGE_SIZE, Dataset
+from lemon_squeezy import RetryPolicy
+
+
+def _get(server, target):
+    status, body = server.respond('GET', target, b'')
+    return status, json.loads(body)
+
+
+def test_datasets_are_deterministic():
+    first, second = Dataset({'orders': 30}), Dataset({'orders': 30})
+    assert first.resources == second.resources
+    assert Dataset({'orders': 30}, seed=1).resources['orders'] != first.resources['orders']
+    assert len(first.resources['orders']) == 30 and first.counts['products'] == 20
+    assert first.add('customers', {'name': 'New'})['id'] == 401
+    assert first.get('customers', '401')['name'] == 'New' and first.get('customers', '402') is None
+
+
+def test_lists_are_paginated(server):
+    status, document = _get(server, '/v1/orders?page[size]=30&page[number]=4')
+    assert status == 200
+    assert [resource['id'] for resource in document['data']] == [str(id) for id in range(91, 101)]
+    assert document['meta']['page'] == {'currentPage': 4, 'from': 91, 'lastPage': 4, 'perPage': 30, 'to': 100,
+                                        'total': 100}
+    assert 'next' not in document['links'] and 'page%5Bnumber%5D=3' in document['links']['prev']
+
+    _, document = _get(server, '/v1/orders')
+    assert len(document['data']) == DEFAULT_PAGE_SIZE
+    assert document['links']['next'].startswith(f'{server.url}/v1/orders?')
+    assert _get(server, '/v1/orders?page[size]=1000')[1]['meta']['page']['perPage'] == 100
+
+
+def test_lists_are_filtered_and_sorted(server):
+    _, document = _get(server, '/v1/subscriptions?filter[product_id]=3&filter[status]=active&page[size]=100')
+    expected = [subscription['id'] for subscription in server.dataset.resources['subscriptions']
+                if subscription['product_id'] == 3 and subscription['status'] == 'active']
+    assert [int(resource['id']) for resource in document['data']] == expected
+
+    _, document = _get(server, '/v1/customers?sort=-updated_at&page[size]=100')
+    updated = [resource['attributes']['updated_at'] for resource in document['data']]
+    assert updated == sorted(updated, reverse=True)
+    assert updated[0] == max(customer['updated_at'] for customer in server.dataset.resources['customers'])
+
+
+def test_relationships_are_included(server):
+    _, document = _get(server, '/v1/orders/5?include=customer')
+    customer_id = str(server.dataset.get('orders', '5')['customer_id'])
+    assert document['data']['relationships']['customer']['data'] == {'type': 'customers', 'id': customer_id}
+    assert [(resource['type'], resource['id']) for resource in document['included']] == [('customers', customer_id)]
+
+    # Unknown relationships are ignored
+    _, document = _get(server, '/v1/orders/5?include=store')
+    assert 'included' not in document and 'data' not in document['data']['relationships']['customer']
+
+
+def test_fields_limit_attributes_and_relationships(server):
+    _, document = _get(server, '/v1/subscriptions/1?fields[subscriptions]=status,customer')
+    assert list(document['data']['attributes']) == ['status']
+    assert list(document['data']['relationships']) == ['customer']
+
+
+def test_unknown_paths_and_methods(server):
+    assert server.respond('GET', '/v1/stores', b'')[0] == 404
+    assert server.respond('GET', '/v1/orders/9999', b'')[0] == 404
+    assert server.respond('PATCH', '/v1/subscriptions/1', b'{}')[0] == 405
+
+
+def test_checkouts_are_created(server):
+    before = _get(server, '/v1/checkouts')[1]['meta']['page']['total']
+    body = {'data': {'type': 'checkouts', 'attributes': {'checkout_data': {'email': 'a@example.com'}},
+                     'relationships': {'variant': {'data': {'type': 'variants', 'id': '7'}}}}}
+    status, created = server.respond('POST', '/v1/checkouts', json.dumps(body).encode())
+    checkout = json.loads(created)['data']
+    assert status == 201 and checkout['id'] == str(before + 1)
+    assert checkout['attributes']['variant_id'] == 7
+    assert checkout['attributes']['checkout_data'] == {'email': 'a@example.com'}
+    # The lists answered before the checkout was created are not reused
+    assert _get(server, '/v1/checkouts')[1]['meta']['page']['total'] == before + 1
+
+
+def test_updates_replace_reused_responses(server):
+    assert _get(server, '/v1/customers/7')[1]['data']['attributes']['name'] == 'Customer 7'
+    server.update('customers', '7', {'name': 'Renamed'})
+    assert _get(server, '/v1/customers/7')[1]['data']['attributes']['name'] == 'Renamed'
+    added = server.add('customers', {'name': 'New'})
+    assert _get(server, '/v1/customers?page[size]=1')[1]['meta']['page']['total'] == added['id'] == 301
+
+
+def test_faults_are_injected(server):
+    server.rate_limited = 1.0
+    server.retry_after = 2.5
+    response = requests.get(f'{server.url}/v1/products/1')
+    assert response.status_code == 429 and response.headers['Retry-After'] == '2.5'
+
+    server.rate_limited, server.errors = 0.0, 1.0
+    assert requests.get(f'{server.url}/v1/products/1').status_code == 503
+
+    server.errors, server.latency = 0.0, 0.2
+    started = time.monotonic()
+    assert requests.get(f'{server.url}/v1/products/1').status_code == 200
+    assert time.monotonic() - started >= 0.2
+    assert server.requests == 3 and server.statuses == {429: 1, 503: 1, 200: 1}
+
+    server.reset_stats()
+    assert server.requests == 0 and not server.statuses
+
+
+def test_measure_counts_requests_and_records(server, client):
+    scenario = run.Scenario('iter_orders', lambda ls: list(ls.order.iter_orders(page_size=30)), iterations=3)
+    result = run.measure(client, server, scenario, warmup=1, memory_iterations=2)
+    assert (result['calls'], result['records'], result['requests'], result['failed_calls']) == (3, 300, 12, 0)
+    assert result['latency_p50_ms'] <= result['latency_p99_ms']
+    assert result['cpu_per_page_ms'] > 0 and result['memory_per_record_bytes'] is not None
+
+
+def test_failed_calls_are_counted(server, client):
+    server.errors = 1.0
+    client.session.retry_policy = RetryPolicy(max_retries=0)
+    result = run.measure(client, server, run.Scenario('get_order', lambda ls: ls.order.get_order(1)), iterations=4,
+                         warmup=0, memory_iterations=1)
+    assert (result['failed_calls'], result['failed_requests'], result['records']) == (4, 4, 0)
+    assert result['cpu_per_page_ms'] is None and result['memory_per_record_bytes'] is None
+
+
+def test_compare_lists_regressions():
+    baseline = {'results': {'get_order': {'requests_per_second': 1000.0, 'latency_p50_ms': 1.0},
+                            'removed': {'requests_per_second': 1.0}}}
+    current = {'results': {'get_order': {'requests_per_second': 850.0, 'latency_p50_ms': 1.05},
+                           'added': {'requests_per_second': 1.0}}}
+    assert run.compare(baseline, current) == ['get_order requests_per_second: 1000.000 -> 850.000 (-15.0%)']
+    assert run.compare(baseline, current, threshold=0.2) == []
+
+
+def test_main_writes_and_compares_results(tmp_path):
+    output = tmp_path / 'results.json'
+    options = ['--only', 'get_product', 'get_variant', '--iterations', '5', '--warmup', '1',
+               '--memory-iterations', '1', '--scale', '0.05']
+    assert run.main(options + ['--output', str(output), '--label', 'baseline']) == 0
+    report = json.loads(output.read_text())
+    assert sorted(report['results']) == ['get_product', 'get_variant']
+    assert report['label'] == 'baseline' and report['config']['scale'] == 0.05
+    assert report['results']['get_product']['requests'] == 5
+
+    # Every metric is reported as far worse than the baseline
+    for result in report['results'].values():
+        result.update(requests_per_second=1e12, latency_p50_ms=1e-12)
+    output.write_text(json.dumps(report))
+    assert run.main(options + ['--compare', str(output)]) == 1
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import threading
+import time
+import pytest
+from lemon_squeezy import RetryPolicy
+from lemon_squeezy.bulk import arun_bulk, run_bulk
+from lemon_squeezy.exceptions import NotFoundError, ServerError, TransportError, ValidationError
+from lemon_squeezy.pipeline import Response
+
+NO_BACKOFF = RetryPolicy(max_retries=2, backoff_base=0)
+
+
+class SubscriptionsAPI:
+    # Stands in for the subscription endpoints, failing the given IDs with a status a number of times
+
+    def __init__(self, failures=None, latency=0.0):
+        self.failures = dict(failures or {})
+        self.latency = latency
+        self.calls = []
+        self.in_flight = 0
+        self.most_in_flight = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, request, call_next):
+        id = request.resource_id
+        with self._lock:
+            self.calls.append((request.method, id, request.json))
+            self.in_flight += 1
+            self.most_in_flight = max(self.most_in_flight, self.in_flight)
+            status, times = self.failures.get(id, (None, 0))
+            if times:
+                self.failures[id] = (status, times - 1)
+        try:
+            time.sleep(self.latency)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        if times:
+            return Response(status, {}, json.dumps({'errors': [{'detail': f'failed {id}'}]}).encode())
+        if request.method == 'DELETE':
+            return Response(204, {}, b'')
+        return Response(200, {}, json.dumps({'data': {'type': 'subscriptions', 'id': id}}).encode())
+
+
+@pytest.fixture
+def api(client):
+    api = SubscriptionsAPI(latency=0.01)
+    client.pipeline.use(api)
+    return api
+
+
+def test_every_update_is_sent(client, api):
+    updates = {id: {'pause': {'mode': 'void'}} for id in range(1, 21)}
+    progress = []
+    report = client.subscription.bulk_update_subscriptions(updates, concurrency=4, on_progress=progress.append)
+
+    assert report.ok and sorted(report.succeeded) == list(range(1, 21))
+    assert sorted(call[1] for call in api.calls) == sorted(str(id) for id in range(1, 21))
+    assert api.calls[0][0] == 'PATCH'
+    assert api.calls[0][2] == {'data': {'type': 'subscriptions', 'id': api.calls[0][1],
+                                        'attributes': {'pause': {'mode': 'void'}}}}
+    assert [event.done for event in progress] == list(range(1, 21))
+    assert progress[-1].succeeded == 20 and progress[-1].total == 20
+    assert 1 < api.most_in_flight <= 4
+
+
+def test_every_cancellation_is_sent(client, api):
+    report = client.subscription.bulk_cancel_subscriptions(['1', '2', '3'])
+    assert sorted(report.succeeded) == ['1', '2', '3']
+    assert {call[0] for call in api.calls} == {'DELETE'}
+
+
+def test_retryable_failures_are_retried(client):
+    api = SubscriptionsAPI({'2': (503, 2), '3': (429, 1), '4': (503, 5)})
+    client.pipeline.use(api)
+    report = client.subscription.bulk_cancel_subscriptions(['1', '2', '3', '4'], retry_policy=NO_BACKOFF)
+
+    assert sorted(report.succeeded) == ['1', '2', '3']
+    assert [(failure.key, type(failure.error)) for failure in report.failed] == [('4', ServerError)]
+    assert report.retryable == ['4']
+    assert [call[1] for call in api.calls].count('4') == 3
+
+
+def test_other_failures_are_reported_without_retrying(client):
+    api = SubscriptionsAPI({'1': (404, 5), '2': (422, 5)})
+    client.pipeline.use(api)
+    report = client.subscription.bulk_cancel_subscriptions(['1', '2', '3'], retry_policy=NO_BACKOFF)
+
+    assert report.succeeded == ['3']
+    assert {failure.key: type(failure.error) for failure in report.failed} == \
+        {'1': NotFoundError, '2': ValidationError}
+    assert report.retryable == []
+    assert len(api.calls) == 3
+
+
+def test_unexpected_exceptions_are_raised():
+    def operation(key):
+        raise RuntimeError(key)
+
+    with pytest.raises(RuntimeError):
+        run_bulk(operation, [1, 2])
+
+
+def test_results_are_collected():
+    report = run_bulk(lambda key: key * 2, [1, 2, 3], collect_results=True)
+    assert report.results == {1: 2, 2: 4, 3: 6}
+    assert run_bulk(lambda key: key, [1]).results is None
+
+
+def test_async_bulk_runs():
+    attempts = {}
+    in_flight = []
+    running = 0
+
+    async def operation(key):
+        nonlocal running
+        attempts[key] = attempts.get(key, 0) + 1
+        running += 1
+        in_flight.append(running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if key == 2 and attempts[key] == 1:
+            raise TransportError('dropped')
+        if key == 3:
+            raise NotFoundError(404)
+        return key
+
+    progress = []
+    report = asyncio.run(arun_bulk(operation, range(1, 11), concurrency=3, retry_policy=NO_BACKOFF,
+                                   on_progress=progress.append, collect_results=True))
+    assert sorted(report.succeeded) == [1, 2, 4, 5, 6, 7, 8, 9, 10]
+    assert [failure.key for failure in report.failed] == [3] and report.retryable == []
+    assert attempts[2] == 2 and attempts[3] == 1
+    assert report.results[10] == 10
+    assert len(progress) == 10 and max(in_flight) == 3
@@ -0,0 +1,154 @@
+import time
+import pytest
+from lemon_squeezy import LemonSqueezy
+from lemon_squeezy.cache import CacheEntry, CacheMiddleware, MemoryCache, SQLiteCache
+from lemon_squeezy.pipeline import Request, Response, credential_scope
+from lemon_squeezy.pool import LemonSqueezyPool
+
+
+def _fetches(server, client, product_id=1):
+    requests = server.requests
+    client.product.get_product(product_id)
+    return server.requests - requests
+
+
+def test_clients_with_different_keys_do_not_share_entries(server):
+    backend = MemoryCache()
+    first = LemonSqueezy(server.url, 'key-1', rate_limit=None, middleware=[CacheMiddleware(backend)])
+    second = LemonSqueezy(server.url, 'key-2', rate_limit=None, middleware=[CacheMiddleware(backend)])
+    again = LemonSqueezy(server.url, 'key-1', rate_limit=None, middleware=[CacheMiddleware(backend)])
+
+    assert _fetches(server, first) == 1
+    assert _fetches(server, second) == 1
+    assert _fetches(server, again) == 0
+    assert len(backend) == 2
+
+
+def test_pool_tenants_do_not_share_entries(server):
+    cache = CacheMiddleware(MemoryCache())
+    with LemonSqueezyPool(server.url, rate_limit=None) as pool:
+        first = pool.add('first', 'key-1', middleware=[cache])
+        second = pool.add('second', 'key-2', middleware=[cache])
+
+        assert _fetches(server, first) == 1
+        assert _fetches(server, first) == 0
+        assert _fetches(server, second) == 1
+
+
+def test_scope_covers_url_and_credential():
+    scope = credential_scope('https://api.lemonsqueezy.com/', 'key-1')
+    assert scope == credential_scope('https://api.lemonsqueezy.com', 'key-1')
+    assert scope != credential_scope('https://api.lemonsqueezy.com', 'key-2')
+    assert scope != credential_scope('https://staging.example.com', 'key-1')
+    assert 'key-1' not in scope
+
+
+class VersionedAPI:
+    # Stands in for the API behind the cache, answering with an ETag and honouring If-None-Match
+
+    def __init__(self):
+        self.version = 1
+        self.seen = []
+
+    def __call__(self, request, call_next):
+        etag = f'"v{self.version}"'
+        self.seen.append((request.method, request.headers.get('If-None-Match')))
+        if request.headers.get('If-None-Match') == etag:
+            return Response(304, {'ETag': etag}, b'')
+        body = f'{{"data": {{"type": "products", "id": "1", "version": {self.version}}}}}'.encode()
+        return Response(200, {'ETag': etag, 'Content-Type': 'application/vnd.api+json'}, body)
+
+
+def _entry(content=b'x', resource='products', resource_id='1'):
+    return CacheEntry(200, {'ETag': '"1"'}, content, None, resource, resource_id, time.time() + 60)
+
+
+def test_fresh_entries_are_served_without_a_request(server, client):
+    client.pipeline.use(CacheMiddleware())
+    assert _fetches(server, client) == 1
+    assert _fetches(server, client) == 0
+    assert _fetches(server, client, product_id=2) == 1
+
+
+def test_only_single_resources_of_types_with_a_ttl_are_cached(server, client):
+    client.pipeline.use(CacheMiddleware(ttls={'products': 60}))
+    for _ in range(2):
+        client.product.get_all_products()
+        client.order.get_order(1)
+    assert server.requests == 4
+
+
+def test_expired_entries_are_fetched_again(server, client):
+    client.pipeline.use(CacheMiddleware(ttls={'products': 0}))
+    assert _fetches(server, client) == 1
+    assert _fetches(server, client) == 1
+
+
+def test_expired_entries_are_revalidated_with_their_etag():
+    api = VersionedAPI()
+    client = LemonSqueezy('https://api.example.com', 'test', rate_limit=None,
+                          middleware=[CacheMiddleware(ttls={'products': 0}), api])
+    assert client.product.get_product(1)['data']['version'] == 1
+    # Unchanged: answered with a 304 and served from the cache
+    assert client.product.get_product(1)['data']['version'] == 1
+    api.version = 2
+    assert client.product.get_product(1)['data']['version'] == 2
+    assert api.seen == [('GET', None), ('GET', '"v1"'), ('GET', '"v1"')]
+
+
+def test_writes_invalidate_the_resource():
+    api = VersionedAPI()
+    cache = CacheMiddleware(ttls={'products': 60})
+    client = LemonSqueezy('https://api.example.com', 'test', rate_limit=None, middleware=[cache, api])
+    client.product.get_product(1)
+    api.version = 2
+    client.pipeline.send(Request('PATCH', '/v1/products/1', json={}))
+    assert client.product.get_product(1)['data']['version'] == 2
+    assert api.seen == [('GET', None), ('PATCH', None), ('GET', None)]
+
+
+def test_memory_cache_evicts_the_least_recently_used_entry():
+    cache = MemoryCache(max_entries=2)
+    cache.set('a', _entry())
+    cache.set('b', _entry())
+    cache.get('a')
+    cache.set('c', _entry())
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+
+
+def test_memory_cache_is_bounded_by_size():
+    cache = MemoryCache(max_bytes=10)
+    cache.set('a', _entry(b'x' * 6))
+    cache.set('b', _entry(b'x' * 6))
+    cache.set('big', _entry(b'x' * 11))
+    assert cache.get('a') is None and cache.get('big') is None
+    assert len(cache) == 1 and cache.size == 6
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryCache()
+    return SQLiteCache(str(tmp_path / 'cache.sqlite'))
+
+
+def test_backend_stores_and_drops_entries(backend):
+    backend.set('a', _entry(b'first', resource_id='1'))
+    backend.set('b', _entry(b'second', resource_id='2'))
+    backend.set('c', _entry(b'third', resource='variants'))
+    entry = backend.get('a')
+    assert (entry.content, entry.headers, entry.resource_id) == (b'first', {'ETag': '"1"'}, '1')
+
+    backend.delete_resource('products', '1')
+    assert backend.get('a') is None and len(backend) == 2
+    backend.delete_resource('products')
+    assert backend.get('b') is None and len(backend) == 1
+    backend.clear()
+    assert len(backend) == 0
+
+
+def test_sqlite_cache_is_shared_through_its_file(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    SQLiteCache(path).set('a', _entry(b'shared'))
+    assert SQLiteCache(path).get('a').content == b'shared'
@@ -0,0 +1,112 @@
+import time
+import pytest
+from lemon_squeezy import LemonSqueezy, RetryPolicy
+from lemon_squeezy.catalog import Catalog
+from lemon_squeezy.models import Product, Variant
+
+
+@pytest.fixture
+def requests_sent(server):
+    sent = []
+
+    def record(request, call_next):
+        sent.append((request.path, dict(request.params)))
+        return call_next(request)
+
+    client = LemonSqueezy(server.url, 'test', rate_limit=None, middleware=[record])
+    yield client, sent
+    client.session.close()
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+def _other_store(server):
+    # A product of another store of the same account, with one variant
+    product = server.add('products', dict(server.dataset.get('products', '1'), store_id=2, slug='other'))
+    server.add('variants', dict(server.dataset.get('variants', '1'), product_id=product['id'], price=123))
+    return product
+
+
+def test_lookups(server, client):
+    catalog = Catalog(client, store_id=1)
+    variants = server.dataset.resources['variants']
+
+    assert catalog.get_product(3)['attributes']['name'] == 'Product 3'
+    assert catalog.get_product_by_slug('product-3')['id'] == '3'
+    assert catalog.get_product('missing') is None
+    assert catalog.get_variant(7)['attributes']['product_id'] == 7
+    assert sorted(variant['id'] for variant in catalog.get_variants(3)) == \
+        sorted(str(variant['id']) for variant in variants if variant['product_id'] == 3)
+    assert {variant['id'] for variant in catalog.find_variants_by_price(500)} == \
+        {str(variant['id']) for variant in variants if variant['price'] == 500}
+    assert catalog.get_variants('missing') == ()
+
+
+def test_variants_are_only_fetched_for_the_stores_products(server, requests_sent):
+    client, sent = requests_sent
+    other = _other_store(server)
+    catalog = Catalog(client, store_id=1)
+
+    assert catalog.get_product(other['id']) is None
+    assert catalog.find_variants_by_price(123) == ()
+    variant_requests = [params for path, params in sent if path == '/v1/variants']
+    assert len(variant_requests) == len(catalog.index.products_by_id)
+    assert all(params.get('filter[product_id]') != str(other['id']) for params in variant_requests)
+
+
+def test_returned_variants_cannot_change_the_snapshot(client):
+    catalog = Catalog(client, store_id=1)
+    variants = catalog.get_variants(1)
+    with pytest.raises(AttributeError):
+        variants.append({})
+    assert catalog.get_variants(1) == variants
+
+
+def test_refresh_swaps_in_a_new_snapshot(server, client):
+    catalog = Catalog(client, store_id=1)
+    before = catalog.index
+    server.update('products', '1', {'slug': 'renamed'})
+    after = catalog.refresh()
+
+    assert after is catalog.index and after is not before
+    assert catalog.get_product_by_slug('renamed')['id'] == '1'
+    assert before.products_by_slug['product-1']['id'] == '1'
+
+
+def test_lookups_are_served_from_memory(server, client):
+    catalog = Catalog(client, store_id=1)
+    catalog.index
+    server.reset_stats()
+    for id in range(1, 21):
+        catalog.get_product(id)
+        catalog.get_variants(id)
+    catalog.find_variants_by_price(500)
+    assert server.requests == 0
+
+
+def test_background_refresh_keeps_the_last_snapshot_on_errors(server, client):
+    client.session.retry_policy = RetryPolicy(max_retries=0)
+    with Catalog(client, store_id=1, refresh_interval=0.05) as catalog:
+        server.update('products', '2', {'slug': 'renamed'})
+        _wait_for(lambda: catalog.get_product_by_slug('renamed') is not None)
+        server.errors = 1.0
+        _wait_for(lambda: catalog.last_error is not None)
+        assert catalog.get_product_by_slug('renamed')['id'] == '2'
+        server.errors = 0.0
+        _wait_for(lambda: catalog.last_error is None)
+    assert catalog._thread is None
+
+
+def test_models(server):
+    client = LemonSqueezy(server.url, 'test', rate_limit=None, models=True)
+    try:
+        catalog = Catalog(client, store_id=1)
+        assert type(catalog.get_product(1)) is Product
+        assert all(type(variant) is Variant for variant in catalog.get_variants(1))
+    finally:
+        client.session.close()
@@ -0,0 +1,145 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+import pytest
+from lemon_squeezy import checkout_template
+from lemon_squeezy.checkout_template import CheckoutPool, CheckoutTemplate
+from lemon_squeezy.codec import JSONCodec
+
+OPTIONS = {'embed': True, 'logo': False}
+
+
+@pytest.mark.parametrize('checkout_data', [None, {}, {'email': 'buyer@example.com', 'custom': {'ref': '1'}}])
+def test_body_is_the_payload_of_a_regular_checkout(client, checkout_data):
+    template = CheckoutTemplate(1, 2, custom_price=500, checkout_options=OPTIONS)
+    expected = client.checkout.build_checkout_payload(1, 2, custom_price=500, checkout_options=OPTIONS,
+                                                      checkout_data=checkout_data)
+    assert template.payload(checkout_data) == expected
+    codec = JSONCodec()
+    assert codec.decode(template.body(codec, checkout_data)) == expected
+
+
+def test_ttl_sets_the_expiry_of_every_checkout():
+    codec = JSONCodec()
+    template = CheckoutTemplate(1, 2, ttl=3600)
+    expires_at = codec.decode(template.body(codec))['data']['attributes']['expires_at']
+    expires = datetime.fromisoformat(expires_at.replace('Z', '+00:00'))
+    assert abs(expires - datetime.now(timezone.utc) - timedelta(hours=1)) < timedelta(minutes=1)
+
+
+def test_checkout_is_created_from_a_template(server, client):
+    template = CheckoutTemplate(1, 2, checkout_options=OPTIONS)
+    checkout = client.checkout.create_checkout_from_template(template, {'email': 'buyer@example.com'})
+    attributes = checkout['data']['attributes']
+    assert attributes['variant_id'] == 2
+    assert attributes['checkout_data']['email'] == 'buyer@example.com'
+    assert attributes['checkout_options'] == OPTIONS
+
+
+def test_pool_hands_out_ready_checkouts(server, client):
+    template = CheckoutTemplate(1, 2, ttl=3600)
+    pool = CheckoutPool(client.checkout, [template], size=3, min_ttl=60)
+    pool.refill()
+    assert len(pool) == 3
+
+    server.reset_stats()
+    urls = {pool.acquire(template)['data']['attributes']['url'] for _ in range(3)}
+    assert len(urls) == 3
+    assert server.requests == 0
+    pool.acquire(template)
+    assert server.requests == 1
+
+
+def test_pool_replaces_expiring_checkouts(server, client):
+    # Every checkout expires within min_ttl, so none is handed out
+    template = CheckoutTemplate(1, 2, ttl=30)
+    pool = CheckoutPool(client.checkout, [template], size=2, min_ttl=60)
+    pool.refill()
+    assert len(pool) == 2
+    server.reset_stats()
+    pool.acquire(template)
+    assert server.requests == 1
+    assert len(pool) == 0
+
+
+def test_background_refill(client):
+    template = CheckoutTemplate(1, 2)
+    with CheckoutPool(client.checkout, [template], size=2) as pool:
+        deadline = time.monotonic() + 5
+        while len(pool) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(pool) == 2
+        pool.acquire(template)
+        deadline = time.monotonic() + 5
+        while len(pool) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(pool) == 2
+    assert pool.last_error is None
+
+
+class _NoCheckouts:
+    # Stands in for the checkout resource once the ready checkouts run out
+
+    def create_checkout_from_template(self, template):
+        return None
+
+
+class _YieldingClock:
+    # Lets other threads run whenever the refill thread reads the time, i.e. while it checks a checkout's expiry
+
+    def __init__(self):
+        self.refill_thread = None
+
+    def time(self) -> float:
+        if threading.current_thread() is self.refill_thread:
+            time.sleep(0.0001)
+        return time.time()
+
+
+def test_refill_does_not_drop_checkouts_taken_meanwhile(monkeypatch):
+    clock = _YieldingClock()
+    monkeypatch.setattr(checkout_template, 'time', clock)
+    template = CheckoutTemplate(1, 2)
+    # size=0, so refill only drops expiring checkouts. Each is followed by two fresh ones: if acquire takes
+    # the expiring one and the first fresh one after refill saw it, refill must not pop the second.
+    pool = CheckoutPool(_NoCheckouts(), [template], size=0, min_ttl=60)
+    now = time.time()
+    fresh = [f'fresh-{index}' for index in range(1000)]
+    for first, second in zip(fresh[::2], fresh[1::2]):
+        pool._ready[template].extend([(now, 'expiring'), (now + 3600, first), (now + 3600, second)])
+
+    acquired = []
+    stop = threading.Event()
+
+    def refill():
+        while not stop.is_set():
+            pool.refill()
+
+    clock.refill_thread = threading.Thread(target=refill)
+    clock.refill_thread.start()
+    try:
+        while True:
+            checkout = pool.acquire(template)
+            if checkout is None:
+                break
+            acquired.append(checkout)
+            time.sleep(0.0001)
+    finally:
+        stop.set()
+        clock.refill_thread.join()
+    assert acquired == fresh
+
+
+def test_checkouts_are_created_in_batches(server, client):
+    server.latency = 0.01
+    template = CheckoutTemplate(1, 2, checkout_options=OPTIONS)
+    buyers = [{'email': f'buyer{index}@example.com'} for index in range(20)] + [None]
+    report = client.checkout.create_checkouts(template, buyers, concurrency=4)
+
+    assert report.ok and sorted(report.succeeded) == list(range(21))
+    assert server.requests == 21
+    for index, buyer in enumerate(buyers):
+        attributes = report.results[index]['data']['attributes']
+        assert attributes['checkout_data']['email'] == (buyer or {'email': ''})['email']
+        assert attributes['checkout_options'] == OPTIONS
+    assert len({result['data']['id'] for result in report.results.values()}) == 21
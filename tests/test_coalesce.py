@@ -0,0 +1,92 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from lemon_squeezy import LemonSqueezy, RetryPolicy
+from lemon_squeezy.async_client import AsyncLemonSqueezy
+from lemon_squeezy.coalesce import AsyncCoalesceMiddleware, CoalesceMiddleware
+from lemon_squeezy.exceptions import ServerError
+from lemon_squeezy.pipeline import Request
+from lemon_squeezy.pool import LemonSqueezyPool
+
+
+@pytest.fixture
+def coalesced(server):
+    client = LemonSqueezy(server.url, 'test', rate_limit=None, middleware=[CoalesceMiddleware()],
+                          retry_policy=RetryPolicy(max_retries=0))
+    yield client
+    client.session.close()
+
+
+def _fetch_concurrently(server, clients):
+    server.latency = 0.2
+    server.reset_stats()
+    with ThreadPoolExecutor(len(clients)) as executor:
+        list(executor.map(lambda client: client.product.get_product(1), clients))
+    return server.requests
+
+
+def test_identical_gets_share_one_request(server):
+    coalesce = CoalesceMiddleware()
+    with LemonSqueezyPool(server.url, rate_limit=None) as pool:
+        client = pool.add('first', 'key-1', middleware=[coalesce])
+        assert _fetch_concurrently(server, [client] * 4) == 1
+
+
+def test_pool_tenants_are_not_coalesced(server):
+    coalesce = CoalesceMiddleware()
+    with LemonSqueezyPool(server.url, rate_limit=None) as pool:
+        first = pool.add('first', 'key-1', middleware=[coalesce])
+        second = pool.add('second', 'key-2', middleware=[coalesce])
+        assert _fetch_concurrently(server, [first, second]) == 2
+
+
+def test_callers_share_the_response(server, coalesced):
+    server.latency = 0.2
+    with ThreadPoolExecutor(4) as executor:
+        products = list(executor.map(lambda _: coalesced.product.get_product(1), range(4)))
+    assert server.requests == 1
+    assert all(product is products[0] for product in products)
+
+
+def test_callers_share_the_error(server, coalesced):
+    server.errors = 1.0
+    server.latency = 0.2
+
+    def fetch(_):
+        with pytest.raises(ServerError):
+            coalesced.product.get_product(1)
+
+    with ThreadPoolExecutor(4) as executor:
+        list(executor.map(fetch, range(4)))
+    assert server.requests == 1
+
+
+def test_only_concurrent_identical_gets_are_coalesced(server, coalesced):
+    server.latency = 0.2
+    requests = [Request('GET', '/v1/products/1'), Request('GET', '/v1/products/2'),
+                Request('GET', '/v1/products/1', {'include': 'variants'}),
+                Request('POST', '/v1/checkouts', json={}), Request('POST', '/v1/checkouts', json={})]
+    with ThreadPoolExecutor(len(requests)) as executor:
+        list(executor.map(coalesced.pipeline.send, requests))
+    assert server.requests == 5
+    # Once the first call is answered, the next one is sent again
+    coalesced.product.get_product(1)
+    assert server.requests == 6
+
+
+def test_async_callers_share_one_request(server):
+    server.latency = 0.2
+
+    async def main():
+        async with AsyncLemonSqueezy(server.url, 'test', rate_limit=None,
+                                     middleware=[AsyncCoalesceMiddleware()]) as client:
+            first = asyncio.ensure_future(client.product.get_product(1))
+            others = [asyncio.ensure_future(client.product.get_product(1)) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            # Cancelling the caller that started the request leaves it running for the others
+            first.cancel()
+            return await asyncio.gather(*others)
+
+    products = asyncio.run(main())
+    assert server.requests == 1
+    assert [product['data']['id'] for product in products] == ['1'] * 3
@@ -0,0 +1,78 @@
+import pytest
+from lemon_squeezy import LemonSqueezy, codec
+from lemon_squeezy.codec import JSONCodec, MsgspecCodec, OrjsonCodec, get_codec
+
+VALUE = {'data': {'type': 'orders', 'id': '1', 'attributes': {'total': 999, 'user_name': 'Zoë', 'refunded': False,
+                                                              'tax_rate': 0.2, 'urls': None, 'items': [1, 2]}}}
+
+
+@pytest.fixture(params=['json', 'orjson', 'msgspec'])
+def named_codec(request):
+    if request.param != 'json':
+        pytest.importorskip(request.param)
+    return request.param
+
+
+def test_codecs_round_trip(named_codec):
+    instance = get_codec(named_codec)
+    assert instance.name == named_codec
+    encoded = instance.encode(VALUE)
+    assert isinstance(encoded, bytes)
+    assert instance.decode(encoded) == VALUE
+    assert JSONCodec().decode(encoded) == VALUE
+
+
+def test_clients_decode_the_same_documents(server, named_codec):
+    client = LemonSqueezy(server.url, 'test', rate_limit=None, codec=named_codec)
+    try:
+        assert client.pipeline.codec.name == named_codec
+        assert client.order.get_all_orders() == JSONCodec().decode(server.respond('GET', '/v1/orders', b'')[1])
+        checkout = client.checkout.create_checkout(1, 2, checkout_data={'name': 'Zoë'})
+        assert checkout['data']['attributes']['checkout_data']['name'] == 'Zoë'
+    finally:
+        client.session.close()
+
+
+def test_auto_picks_the_fastest_installed_codec(monkeypatch):
+    if codec.orjson is not None:
+        assert type(get_codec()) is OrjsonCodec
+    monkeypatch.setattr(codec, 'orjson', None)
+    monkeypatch.setattr(codec, 'msgspec', None)
+    assert type(get_codec('auto')) is JSONCodec
+    assert type(get_codec(None)) is JSONCodec
+
+
+def test_instances_are_used_as_is():
+    instance = JSONCodec()
+    assert get_codec(instance) is instance
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError, match='ujson'):
+        get_codec('ujson')
+
+
+@pytest.mark.parametrize('name, cls', [('orjson', OrjsonCodec), ('msgspec', MsgspecCodec)])
+def test_missing_packages(monkeypatch, name, cls):
+    monkeypatch.setattr(codec, name, None)
+    with pytest.raises(ImportError, match=name):
+        cls()
+
+
+def test_msgspec_decodes_into_types():
+    msgspec = pytest.importorskip('msgspec')
+
+    class Attributes(msgspec.Struct):
+        total: int
+
+    class Order(msgspec.Struct):
+        id: str
+        attributes: Attributes
+
+    class OrderDocument(msgspec.Struct):
+        data: Order
+
+    instance = MsgspecCodec(types={'orders': OrderDocument})
+    encoded = instance.encode(VALUE)
+    assert instance.decode(encoded, 'orders').data.attributes.total == 999
+    assert instance.decode(encoded, 'customers') == VALUE
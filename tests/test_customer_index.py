@@ -0,0 +1,113 @@
+import sys
+import threading
+from lemon_squeezy.customer_index import CustomerIndex, normalize_email
+
+
+def _changed(index: int) -> str:
+    return f'2030-01-01T00:{index // 60:02d}:{index % 60:02d}.000000Z'
+
+
+def test_resolving_a_miss_does_not_skip_earlier_changes(server, client):
+    index = CustomerIndex(client.pipeline)
+    index.load()
+    for id in range(1, 121):
+        server.update('customers', id, {'name': f'Changed {id}', 'updated_at': _changed(id)})
+    new = server.add('customers', dict(server.dataset.get('customers', '1'), email='new@example.com',
+                                       updated_at='2030-02-01T00:00:00.000000Z'))
+
+    assert index.resolve_customers(['new@example.com'])['new@example.com']['id'] == str(new['id'])
+    index.refresh()
+
+    names = {id: index.get(f'customer{id}@example.com')['attributes']['name'] for id in range(1, 121)}
+    assert [id for id, name in names.items() if name != f'Changed {id}'] == []
+    assert index.updated_at == '2030-02-01T00:00:00.000000Z'
+
+
+def test_changed_email_replaces_the_old_one(server, client):
+    index = CustomerIndex(client.pipeline)
+    index.load()
+    server.update('customers', 1, {'email': 'Changed@Example.com', 'updated_at': _changed(1)})
+    index.refresh()
+
+    assert index.resolve_customers(['customer1@example.com']) == {'customer1@example.com': None}
+    assert 'customer1@example.com' not in index
+    assert index.get('changed@example.com')['id'] == '1'
+    assert len(index) == 300
+
+
+def test_older_copy_does_not_replace_a_newer_one(server, client):
+    index = CustomerIndex(client.pipeline)
+    index.load()
+    customer = index.get('customer2@example.com')
+    older = dict(customer, attributes=dict(customer['attributes'], email='old@example.com', updated_at='2000-01-01'))
+    index.add(older)
+
+    assert index.get('customer2@example.com') is customer
+    assert 'old@example.com' not in index
+
+
+def test_concurrent_adds_keep_one_email_per_customer(client):
+    versions = [{'type': 'customers', 'id': '1',
+                 'attributes': {'email': f'v{version}@example.com', 'updated_at': f'{version:06d}'}}
+                for version in range(5000)]
+    interval = sys.getswitchinterval()
+    # Switch threads as often as possible, so unguarded updates interleave
+    sys.setswitchinterval(1e-6)
+    try:
+        for _ in range(5):
+            index = CustomerIndex(client.pipeline)
+            errors = []
+
+            def add(offset):
+                try:
+                    for customer in versions[offset::8]:
+                        index.add(customer)
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=add, args=(offset,)) for offset in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert errors == []
+            assert len(index) == 1
+            assert index.get('v4999@example.com') is versions[-1]
+    finally:
+        sys.setswitchinterval(interval)
+
+
+def test_normalize_email():
+    assert normalize_email('  Buyer@Example.COM ') == 'buyer@example.com'
+
+
+def test_hits_are_resolved_without_requests(server, client):
+    index = CustomerIndex(client.pipeline, page_size=50)
+    index.load()
+    server.reset_stats()
+    emails = [f' Customer{id}@EXAMPLE.com' for id in range(1, 51)]
+    resolved = index.resolve_customers(emails)
+    assert server.requests == 0
+    assert list(resolved) == emails
+    assert [customer['id'] for customer in resolved.values()] == [str(id) for id in range(1, 51)]
+
+
+def test_misses_are_requested_once_and_indexed(server, client):
+    index = CustomerIndex(client.pipeline)
+    index.resolve_customers([])
+    new = server.add('customers', dict(server.dataset.get('customers', '1'), email='new@example.com'))
+    server.reset_stats()
+
+    resolved = index.resolve_customers(['new@example.com', 'New@Example.com', 'nobody@example.com',
+                                        'customer1@example.com'])
+    assert server.requests == 2
+    assert resolved['new@example.com']['id'] == resolved['New@Example.com']['id'] == str(new['id'])
+    assert resolved['nobody@example.com'] is None
+    assert 'new@example.com' in index and len(index) == 301
+
+
+def test_store_filter(server, client):
+    index = CustomerIndex(client.pipeline, store_id=2)
+    index.load()
+    assert len(index) == 0
+    assert index.resolve_customers(['customer1@example.com']) == {'customer1@example.com': None}
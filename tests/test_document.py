@@ -0,0 +1,136 @@
+import copy
+from lemon_squeezy.document import (Document, IdentityMap, ResourceObject, fields_params, include_param,
+                                    project_document, resolve_document)
+
+PAYLOAD = {
+    'data': [
+        {'type': 'orders', 'id': '1', 'attributes': {'total': 100},
+         'relationships': {'customer': {'data': {'type': 'customers', 'id': '7'}},
+                           'order-items': {'data': [{'type': 'order-items', 'id': '10'},
+                                                    {'type': 'order-items', 'id': '11'}]},
+                           'subscriptions': {'links': {'related': '/v1/orders/1/subscriptions'}}}},
+        {'type': 'orders', 'id': '2', 'attributes': {'total': 200},
+         'relationships': {'customer': {'data': {'type': 'customers', 'id': '7'}},
+                           'discount': {'data': None}}},
+    ],
+    'included': [
+        {'type': 'customers', 'id': '7', 'attributes': {'email': 'buyer@example.com'}},
+        {'type': 'order-items', 'id': '10', 'attributes': {'quantity': 1}},
+    ],
+}
+
+
+def test_document_is_still_the_raw_payload():
+    document = resolve_document(PAYLOAD)
+    assert document == PAYLOAD
+    assert document['data'][0]['attributes']['total'] == 100
+
+
+def test_included_resources_are_resolved_once():
+    first, second = resolve_document(PAYLOAD).primary
+    customer = first.related['customer']
+    assert customer is second.related['customer']
+    assert customer.loaded and customer['attributes'] == {'email': 'buyer@example.com'}
+
+
+def test_linkage_shapes():
+    document = resolve_document(PAYLOAD)
+    first, second = document.primary
+    items = first.related['order-items']
+    assert [item.id for item in items] == ['10', '11']
+    # Linked but not included: known by type and ID only
+    assert items[0].loaded and not items[1].loaded
+    assert second.related['discount'] is None
+    # Relationships without linkage are left out
+    assert 'subscriptions' not in first.related
+
+
+def test_find():
+    document = resolve_document(PAYLOAD)
+    assert document.find('customers', 7).attributes['email'] == 'buyer@example.com'
+    assert document.find('customers', '8') is None
+
+
+def test_single_and_empty_documents():
+    document = resolve_document({'data': PAYLOAD['data'][0], 'included': PAYLOAD['included']})
+    assert document.primary.related['customer'].attributes['email'] == 'buyer@example.com'
+    assert resolve_document({'data': None}).primary is None
+    assert resolve_document({'data': []}).primary == []
+
+
+def test_documents_can_share_an_identity_map():
+    identity_map = IdentityMap()
+    first = Document({'data': PAYLOAD['data'][0]}, identity_map)
+    customer = first.primary.related['customer']
+    assert not customer.loaded
+    Document({'data': PAYLOAD['included'][0]}, identity_map)
+    assert customer.loaded and len(identity_map) == 4
+
+
+def test_include_param():
+    assert include_param(['customer', 'order-items']) == 'customer,order-items'
+    assert include_param('customer') == 'customer'
+
+
+def test_includes_are_requested_and_resolved(server, client):
+    orders = client.order.get_all_orders(include=['customer'])
+    assert type(orders) is Document
+    for order in orders.primary:
+        customer = order.related['customer']
+        assert isinstance(customer, ResourceObject)
+        assert customer.id == str(order.attributes['customer_id'])
+        assert customer.attributes == client.customer.get_customer(customer.id)['data']['attributes']
+
+
+def test_responses_without_include_are_left_raw(client):
+    assert type(client.order.get_order(1)) is dict
+
+
+def _ignore_fields(request, call_next):
+    # Answers as an API that doesn't support sparse fieldsets
+    request.params = {name: value for name, value in request.params.items() if not name.startswith('fields[')}
+    return call_next(request)
+
+
+def test_fields_params():
+    assert fields_params({'orders': ['status', 'total'], 'customers': 'email'}) == \
+        {'fields[orders]': 'status,total', 'fields[customers]': 'email'}
+
+
+def test_projection_keeps_only_the_listed_fields():
+    payload = project_document(copy.deepcopy(PAYLOAD), {'orders': ['customer'], 'customers': 'name'})
+    assert [order['attributes'] for order in payload['data']] == [{}, {}]
+    assert [list(order['relationships']) for order in payload['data']] == [['customer'], ['customer']]
+    assert payload['included'][0]['attributes'] == {}
+    # Types without a fieldset are left untouched
+    assert payload['included'][1] == PAYLOAD['included'][1]
+
+
+def test_projection_of_other_payloads():
+    assert project_document(None, {'orders': ['total']}) is None
+    assert project_document({'data': None}, {'orders': ['total']}) == {'data': None}
+    single = project_document({'data': copy.deepcopy(PAYLOAD['data'][1])}, {'orders': 'total'})
+    assert single['data']['attributes'] == {'total': 200}
+
+
+def test_fields_are_requested(server, client):
+    sent = []
+
+    def record(request, call_next):
+        sent.append(dict(request.params))
+        return call_next(request)
+
+    client.pipeline.use(record)
+    order = client.order.get_order(1, fields={'orders': ['status', 'total']})
+    assert sent == [{'fields[orders]': 'status,total'}]
+    assert set(order['data']['attributes']) == {'status', 'total'}
+
+
+def test_fields_are_projected_when_the_api_ignores_them(server, client):
+    client.pipeline.use(_ignore_fields)
+    orders = list(client.order.iter_orders(fields={'orders': ['total', 'customer'], 'customers': ['email']},
+                                           include=['customer'], page_size=30))
+    assert len(orders) == 100
+    assert all(set(order['attributes']) == {'total'} and set(order['relationships']) == {'customer'}
+               for order in orders)
+    assert all(set(order.related['customer'].attributes) == {'email'} for order in orders)
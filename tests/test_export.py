@@ -0,0 +1,102 @@
+import csv
+import json
+import pytest
+from lemon_squeezy.export import export
+
+
+class Crash(Exception):
+    pass
+
+
+def _crash_after(checkpoints):
+    def on_progress(stats):
+        if stats.pages >= checkpoints:
+            raise Crash()
+    return on_progress
+
+
+def _ndjson(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+@pytest.mark.parametrize('concurrency', [1, 4])
+def test_ndjson_holds_every_raw_resource(client, tmp_path, concurrency):
+    output = tmp_path / 'orders.ndjson'
+    stats = export(client.pipeline, 'orders', str(output), page_size=30, concurrency=concurrency)
+    assert _ndjson(output) == list(client.order.iter_orders(page_size=30))
+    assert (stats.records, stats.pages, stats.finished) == (100, 4, True)
+
+
+def test_csv_has_one_column_per_attribute(server, client, tmp_path):
+    output = tmp_path / 'subscriptions.csv'
+    export(client.pipeline, 'subscriptions', str(output), 'csv', filters={'product_id': 3},
+           columns=['status', 'urls'])
+    with open(output, newline='', encoding='utf-8') as file:
+        header, *rows = list(csv.reader(file))
+    assert header == ['id', 'status', 'urls']
+    expected = [subscription for subscription in server.dataset.resources['subscriptions']
+                if subscription['product_id'] == 3]
+    assert [row[:2] for row in rows] == [[str(subscription['id']), subscription['status']] for subscription in expected]
+    assert all(json.loads(row[2]) == subscription['urls'] for row, subscription in zip(rows, expected))
+
+
+def test_export_resumes_after_the_last_checkpoint(server, client, tmp_path):
+    output = tmp_path / 'orders.ndjson'
+    checkpoint = str(tmp_path / 'orders.checkpoint')
+    with pytest.raises(Crash):
+        export(client.pipeline, 'orders', str(output), page_size=30, checkpoint=checkpoint, checkpoint_every=1,
+               on_progress=_crash_after(2))
+    # Output written after the checkpoint is dropped on resume
+    with open(output, 'ab') as file:
+        file.write(b'{"partial"')
+
+    server.reset_stats()
+    stats = export(client.pipeline, 'orders', str(output), checkpoint=checkpoint, checkpoint_every=1)
+    assert server.requests == 2
+    assert (stats.records, stats.pages, stats.resumed_records) == (100, 4, 60)
+    assert _ndjson(output) == list(client.order.iter_orders(page_size=30))
+
+    server.reset_stats()
+    assert export(client.pipeline, 'orders', str(output), checkpoint=checkpoint).finished
+    assert server.requests == 0
+
+
+def test_csv_export_resumes_without_repeating_the_header(client, tmp_path):
+    output = tmp_path / 'customers.csv'
+    checkpoint = str(tmp_path / 'customers.checkpoint')
+    with pytest.raises(Crash):
+        export(client.pipeline, 'customers', str(output), 'csv', columns=['email'], page_size=50,
+               checkpoint=checkpoint, checkpoint_every=2, on_progress=_crash_after(2))
+    export(client.pipeline, 'customers', str(output), 'csv', columns=['email'], checkpoint=checkpoint)
+    with open(output, newline='', encoding='utf-8') as file:
+        header, *rows = list(csv.reader(file))
+    assert header == ['id', 'email']
+    assert [row[0] for row in rows] == [str(id) for id in range(1, 301)]
+
+
+def test_checkpoint_of_another_export_is_rejected(client, tmp_path):
+    checkpoint = str(tmp_path / 'export.checkpoint')
+    export(client.pipeline, 'products', str(tmp_path / 'products.ndjson'), checkpoint=checkpoint)
+    with pytest.raises(ValueError, match='different export'):
+        export(client.pipeline, 'variants', str(tmp_path / 'variants.ndjson'), checkpoint=checkpoint)
+
+
+@pytest.mark.parametrize('resource, format', [('checkouts', 'ndjson'), ('orders', 'xml')])
+def test_unknown_resource_or_format(client, tmp_path, resource, format):
+    with pytest.raises(ValueError, match='Unknown'):
+        export(client.pipeline, resource, str(tmp_path / 'export'), format)
+
+
+def test_parquet_export_resumes(client, tmp_path):
+    pyarrow = pytest.importorskip('pyarrow')
+    import pyarrow.parquet
+
+    output = tmp_path / 'orders'
+    checkpoint = str(tmp_path / 'orders.checkpoint')
+    with pytest.raises(Crash):
+        export(client.pipeline, 'orders', str(output), 'parquet', columns=['total', 'status'], page_size=30,
+               checkpoint=checkpoint, checkpoint_every=1, on_progress=_crash_after(2))
+    export(client.pipeline, 'orders', str(output), 'parquet', columns=['total', 'status'], checkpoint=checkpoint)
+    table = pyarrow.parquet.read_table(str(output))
+    assert table.column_names == ['id', 'total', 'status']
+    assert sorted(table.column('id').to_pylist(), key=int) == [str(id) for id in range(1, 101)]
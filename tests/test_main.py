@@ -0,0 +1,22 @@
+import json
+import pytest
+from lemon_squeezy.__main__ import main
+
+
+def test_export_command(server, tmp_path, capsys):
+    output = tmp_path / 'subscriptions.ndjson'
+    assert main(['export', 'subscriptions', str(output), '--api-url', server.url, '--api-key', 'test',
+                 '--filter', 'status=active', '--page-size', '50']) == 0
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    active = [attributes for attributes in server.dataset.resources['subscriptions']
+              if attributes['status'] == 'active']
+    assert len(records) == len(active)
+    assert '{} records'.format(len(active)) in capsys.readouterr().err
+
+
+@pytest.mark.parametrize('item', ['status', '=active'])
+def test_malformed_filter_is_a_usage_error(tmp_path, capsys, item):
+    with pytest.raises(SystemExit) as exit:
+        main(['export', 'orders', str(tmp_path / 'orders.ndjson'), '--api-key', 'test', '--filter', item])
+    assert exit.value.code == 2
+    assert 'expected NAME=VALUE' in capsys.readouterr().err
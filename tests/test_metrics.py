@@ -0,0 +1,252 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import pytest
+import requests
+from lemon_squeezy import LemonSqueezy, RetryPolicy
+from lemon_squeezy.async_client import AsyncLemonSqueezy
+from lemon_squeezy.cache import CacheMiddleware
+from lemon_squeezy.coalesce import CoalesceMiddleware
+from lemon_squeezy.exceptions import NotFoundError, ServerError, TransportError
+from lemon_squeezy.metrics import CallRecord, Histogram, Metrics, endpoint_label, instrument
+from lemon_squeezy.pool import LemonSqueezyPool
+
+NO_BACKOFF = RetryPolicy(max_retries=1, backoff_base=0)
+
+
+def _fail_with_503(server, client):
+    server.errors = 1.0
+    client.session.retry_policy = NO_BACKOFF
+    client.product.get_product(1)
+
+
+def test_failing_callback_does_not_replace_the_response(client, caplog):
+    def fail(record):
+        raise RuntimeError('callback failed')
+
+    seen = []
+    instrument(client, Metrics(callbacks=[fail, seen.append]))
+    with caplog.at_level(logging.ERROR, logger='lemon_squeezy.metrics'):
+        product = client.product.get_product(1)
+    assert product['data']['id'] == '1'
+    assert [record.status for record in seen] == ['200']
+    assert 'callback failed' in caplog.text
+
+
+def test_failing_callback_does_not_replace_the_error(server, client):
+    def fail(record):
+        raise RuntimeError('callback failed')
+
+    instrument(client, Metrics(callbacks=[fail]))
+    with pytest.raises(ServerError):
+        _fail_with_503(server, client)
+
+
+def test_retry_hook_is_chained(server, client):
+    counted = []
+    client.session.on_retry = lambda method, url, reason: counted.append(reason)
+    metrics = instrument(client)
+    with pytest.raises(ServerError):
+        _fail_with_503(server, client)
+    assert counted == ['status']
+    assert metrics.retries == {('GET /v1/products/{id}', 'status'): 1}
+
+
+def test_pooled_tenants_keep_counting_retries(server):
+    with LemonSqueezyPool(server.url, rate_limit=None, retry_policy=NO_BACKOFF) as pool:
+        first = instrument(pool.add('first', 'key-1'))
+        second = instrument(pool.add('second', 'key-2'))
+        server.errors = 1.0
+        with pytest.raises(ServerError):
+            pool['first'].product.get_product(1)
+    assert first.retries == {('GET /v1/products/{id}', 'status'): 1}
+    # Retries on a shared session can't be attributed to a tenant
+    assert second.retries == first.retries
+
+
+def test_shared_metrics_count_a_retry_once(server):
+    metrics = Metrics()
+    with LemonSqueezyPool(server.url, rate_limit=None, retry_policy=NO_BACKOFF) as pool:
+        instrument(pool.add('first', 'key-1'), metrics)
+        instrument(pool.add('second', 'key-2'), metrics)
+        server.errors = 1.0
+        with pytest.raises(ServerError):
+            pool['first'].product.get_product(1)
+    assert metrics.retries == {('GET /v1/products/{id}', 'status'): 1}
+
+
+def _samples(metrics):
+    # The value of every sample of the metrics page, by name and labels
+    samples = {}
+    for line in metrics.render().splitlines():
+        if not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = value
+    return samples
+
+
+def _record(endpoint, status='200', duration=0.01, cache=None, coalesced=False):
+    return CallRecord(endpoint, None, status, duration, 0, 0, cache, coalesced, None)
+
+
+@pytest.mark.parametrize('path, label', [
+    ('/v1/orders', 'GET /v1/orders'),
+    ('/v1/orders/12', 'GET /v1/orders/{id}'),
+    ('https://api.lemonsqueezy.com/v1/subscriptions/5/relationships/customer?page[size]=1',
+     'GET /v1/subscriptions/{id}/relationships/customer'),
+])
+def test_endpoint_label(path, label):
+    assert endpoint_label('GET', path) == label
+
+
+def test_histogram_quantiles():
+    histogram = Histogram((0.1, 0.5, 1.0))
+    assert histogram.quantile(0.5) == 0.0
+    for value in [0.05] * 7 + [0.1, 0.3, 2.0]:
+        histogram.observe(value)
+    # Bounds are inclusive, as the `le` label of Prometheus
+    assert histogram.counts == [8, 1, 0, 1]
+    assert (histogram.quantile(0.5), histogram.quantile(0.9), histogram.quantile(0.99)) == (0.1, 0.5, float('inf'))
+    assert histogram.count == 10 and histogram.sum == pytest.approx(2.75)
+
+
+def test_calls_are_rendered_per_endpoint_and_status(client):
+    metrics = instrument(client, Metrics(buckets=(0.5, 5.0)))
+    client.product.get_product(1)
+    client.product.get_product(2)
+    with pytest.raises(NotFoundError):
+        client.product.get_product(99999)
+    client.order.get_all_orders(store_id=1)
+
+    samples = _samples(metrics)
+    endpoint = 'endpoint="GET /v1/products/{id}"'
+    assert samples[f'lemon_squeezy_requests_total{{{endpoint},status="200"}}'] == '2'
+    assert samples[f'lemon_squeezy_requests_total{{{endpoint},status="404"}}'] == '1'
+    assert int(samples['lemon_squeezy_requests_total{endpoint="GET /v1/orders",status="200"}']) >= 1
+    assert samples[f'lemon_squeezy_request_duration_seconds_bucket{{{endpoint},le="0.5"}}'] == '3'
+    assert samples[f'lemon_squeezy_request_duration_seconds_bucket{{{endpoint},le="+Inf"}}'] == '3'
+    assert samples[f'lemon_squeezy_request_duration_seconds_count{{{endpoint}}}'] == '3'
+    assert int(samples[f'lemon_squeezy_response_bytes_total{{{endpoint}}}']) > 0
+    assert samples[f'lemon_squeezy_in_flight{{{endpoint}}}'] == '0'
+    assert '# TYPE lemon_squeezy_request_duration_seconds histogram' in metrics.render()
+
+
+def test_cache_and_coalescing_are_counted(server):
+    client = LemonSqueezy(server.url, 'test', rate_limit=None, middleware=[CacheMiddleware(), CoalesceMiddleware()])
+    metrics = instrument(client)
+    client.product.get_product(1)
+    client.product.get_product(1)
+    server.latency = 0.2
+    with ThreadPoolExecutor(4) as executor:
+        list(executor.map(lambda _: client.order.get_order(1), range(4)))
+    client.session.close()
+
+    assert metrics.cache[('GET /v1/products/{id}', 'miss')] == 1
+    assert metrics.cache[('GET /v1/products/{id}', 'hit')] == 1
+    assert metrics.coalesced == {'GET /v1/orders/{id}': 3}
+    assert _samples(metrics)['lemon_squeezy_coalesced_total{endpoint="GET /v1/orders/{id}"}'] == '3'
+
+
+def test_calls_without_a_response_are_recorded_as_errors(client):
+    def drop(request, call_next):
+        raise TransportError('dropped')
+
+    client.pipeline.use(drop)
+    records = []
+    metrics = instrument(client, Metrics(callbacks=[records.append]))
+    with pytest.raises(TransportError):
+        client.product.get_product(1)
+    assert [(record.status, record.resource_id, type(record.error)) for record in records] == \
+        [('error', '1', TransportError)]
+    assert metrics.requests == {('GET /v1/products/{id}', 'error'): 1}
+
+
+def test_disabled_metrics_and_reset(client):
+    metrics = instrument(client)
+    metrics.enabled = False
+    client.product.get_product(1)
+    assert metrics.requests == {} and metrics.in_flight == {}
+
+    metrics.enabled = True
+    client.product.get_product(1)
+    metrics.reset()
+    assert metrics.requests == {} and metrics.latency == {}
+    assert metrics.in_flight == {'GET /v1/products/{id}': 0}
+
+
+def test_label_values_are_escaped():
+    metrics = Metrics(prefix='api')
+    metrics.started('GET /v1/"quoted"\\path')
+    metrics.record(_record('GET /v1/"quoted"\\path'))
+    assert 'api_requests_total{endpoint="GET /v1/\\"quoted\\"\\\\path",status="200"} 1' in metrics.render()
+
+
+def test_calls_are_traced(client):
+    spans = []
+
+    class Span:
+        def __init__(self, name, attributes):
+            self.name = name
+            self.attributes = dict(attributes)
+            self.error = None
+
+        def set_attribute(self, name, value):
+            self.attributes[name] = value
+
+    @contextmanager
+    def tracer(name, attributes):
+        spans.append(Span(name, attributes))
+        try:
+            yield spans[-1]
+        except BaseException as e:
+            spans[-1].error = type(e)
+            raise
+
+    def drop_third(request, call_next):
+        if request.resource_id == '3':
+            raise TransportError('dropped')
+        return call_next(request)
+
+    client.pipeline.use(drop_third)
+    instrument(client, tracer=tracer)
+    client.product.get_product(1)
+    with pytest.raises(NotFoundError):
+        client.product.get_product(99999)
+    with pytest.raises(TransportError):
+        client.product.get_product(3)
+    assert [span.name for span in spans] == ['GET /v1/products/{id}'] * 3
+    assert spans[0].attributes == {'http.request.method': 'GET', 'lemon_squeezy.resource': 'products',
+                                   'lemon_squeezy.resource_id': '1', 'http.response.status_code': '200'}
+    assert [span.attributes['http.response.status_code'] for span in spans] == ['200', '404', 'error']
+    assert [span.error for span in spans] == [None, None, TransportError]
+
+
+def test_metrics_page_is_served(client):
+    metrics = instrument(client)
+    client.product.get_product(1)
+    server = metrics.make_server('127.0.0.1', 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        response = requests.get(f'http://127.0.0.1:{server.server_address[1]}/metrics')
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    assert response.text == metrics.render()
+
+
+def test_async_clients_are_instrumented(server):
+    server.errors = 1.0
+
+    async def main():
+        async with AsyncLemonSqueezy(server.url, 'test', rate_limit=None, retry_policy=NO_BACKOFF) as client:
+            metrics = instrument(client)
+            with pytest.raises(ServerError):
+                await client.product.get_product(1)
+            return metrics
+
+    metrics = asyncio.run(main())
+    assert metrics.requests == {('GET /v1/products/{id}', '503'): 1}
+    assert metrics.retries == {('GET /v1/products/{id}', 'status'): 1}
@@ -0,0 +1,82 @@
+from datetime import datetime, timezone
+import pytest
+from lemon_squeezy.mirror import Mirror
+
+LATER = '2030-01-01T00:00:00.000000Z'
+
+
+@pytest.fixture
+def mirror(client, tmp_path):
+    return Mirror(client.pipeline, str(tmp_path / 'mirror.sqlite'))
+
+
+def _customer(id, updated_at, **attributes):
+    return {'type': 'customers', 'id': str(id), 'attributes': dict(attributes, updated_at=updated_at, store_id=1)}
+
+
+def test_first_sync_loads_every_record(server, mirror):
+    assert mirror.sync('customers', page_size=50) == 300
+    assert mirror.count('customers') == 300
+    newest = max(server.dataset.resources['customers'], key=lambda customer: (customer['updated_at'], customer['id']))
+    assert mirror.high_water('customers') == (newest['updated_at'], str(newest['id']))
+    assert mirror.get('customers', 7)['attributes']['email'] == server.dataset.get('customers', '7')['email']
+
+
+def test_later_syncs_only_fetch_the_changes(server, mirror):
+    mirror.sync('customers', page_size=50)
+    for id in ('7', '8', '9'):
+        server.update('customers', id, {'updated_at': LATER, 'name': f'Renamed {id}'})
+    server.reset_stats()
+
+    assert mirror.sync('customers', page_size=10) >= 3
+    assert server.requests == 1
+    assert [mirror.get('customers', id)['attributes']['name'] for id in ('7', '8', '9')] == \
+        ['Renamed 7', 'Renamed 8', 'Renamed 9']
+    assert mirror.high_water('customers') == (LATER, '9')
+    assert mirror.count('customers') == 300
+
+
+def test_filters_keep_their_own_high_water_mark(server, mirror):
+    mirror.sync('subscriptions', filters={'product_id': 3})
+    assert mirror.high_water('subscriptions') is None
+    assert mirror.high_water('subscriptions', {'product_id': 3}) is not None
+    assert mirror.count('subscriptions') == sum(subscription['product_id'] == 3
+                                                for subscription in server.dataset.resources['subscriptions'])
+
+
+def test_full_sync_drops_records_the_api_no_longer_returns(mirror):
+    mirror.sync('customers', page_size=100)
+    mirror.put(_customer(9999, LATER))
+    assert mirror.count('customers') == 301
+    mirror.sync('customers', page_size=100)
+    assert mirror.get('customers', 9999) is not None
+    assert mirror.sync('customers', page_size=100, full=True) == 300
+    assert mirror.get('customers', 9999) is None
+
+
+def test_put_keeps_the_newest_version(mirror):
+    mirror.put(_customer(1, '2024-02-01T00:00:00.000000Z', name='new'))
+    mirror.put(_customer(1, '2024-01-01T00:00:00.000000Z', name='old'))
+    assert mirror.get('customers', 1)['attributes']['name'] == 'new'
+    assert mirror.high_water('customers') is None
+
+
+def test_reads(mirror):
+    mirror.put(_customer(1, '2024-03-01T00:00:00.000000Z'), _customer(2, '2024-01-01T00:00:00.000000Z'),
+               _customer(3, '2024-02-01T00:00:00.000000Z'),
+               {'type': 'customers', 'id': '4', 'attributes': {'store_id': 2, 'updated_at': LATER}})
+    since = datetime(2024, 2, 1, tzinfo=timezone.utc)
+    assert [customer['id'] for customer in mirror.changed_since('customers', since)] == ['3', '1', '4']
+    assert [customer['id'] for customer in mirror.changed_since('customers', since, store_id=1)] == ['3', '1']
+    assert sorted(customer['id'] for customer in mirror.iter('customers', store_id=1)) == ['1', '2', '3']
+    assert mirror.get('orders', 1) is None
+
+
+def test_sync_all(mirror):
+    synced = mirror.sync_all(['products', 'variants'])
+    assert synced == {'products': 20, 'variants': 60}
+
+
+def test_unknown_resource(mirror):
+    with pytest.raises(ValueError, match='Unknown resource'):
+        mirror.sync('checkouts')
@@ -0,0 +1,81 @@
+import copy
+import pickle
+from datetime import datetime, timedelta, timezone
+import pytest
+from lemon_squeezy import LemonSqueezy
+from lemon_squeezy.models import Customer, GenericModel, Order, model_for, parse_timestamp
+
+
+def _orders(server, models, **kwargs):
+    client = LemonSqueezy(server.url, 'test', rate_limit=None, models=models)
+    try:
+        return list(client.order.iter_orders(**kwargs))
+    finally:
+        client.session.close()
+
+
+def test_models_round_trip_the_raw_resources(server):
+    raw = _orders(server, models=False)
+    orders = _orders(server, models=True)
+    assert [order.to_dict() for order in orders] == raw
+    order = orders[0]
+    assert isinstance(order, Order)
+    assert order['attributes']['total'] == raw[0]['attributes']['total']
+    assert order['links'] == raw[0]['links']
+
+
+def test_related_is_only_created_once_used(server):
+    order = _orders(server, models=True)[0]
+    assert order._related is None
+    assert order.related == {}
+
+
+def test_included_resources_are_linked(server):
+    orders = _orders(server, models=True, include=['customer'])
+    customer = orders[0].related['customer']
+    assert isinstance(customer, Customer)
+    assert customer.loaded
+    assert customer.id == str(orders[0].customer_id)
+    assert customer.links == {'self': f'{server.url}/v1/customers/{customer.id}'}
+
+
+def test_models_can_be_copied_and_pickled(server):
+    orders = _orders(server, models=True, include=['customer'])
+    order = orders[0]
+    for copied in (copy.copy(order), copy.deepcopy(order), pickle.loads(pickle.dumps(order))):
+        assert type(copied) is Order
+        assert copied.to_dict() == order.to_dict()
+        assert copied.total == order.total
+        assert copied.related['customer'].email == order.related['customer'].email
+    assert copy.deepcopy(order).related['customer'] is not order.related['customer']
+
+
+def test_attributes_are_read_as_python_attributes():
+    order = Order('orders', '1', {'total': 999, 'status': 'paid', 'created_at': '2024-01-02T03:04:05.000000Z',
+                                  'refunded_at': None, 'new_field': 'kept'})
+    assert order.total == 999
+    assert order.created_at == datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    assert order.refunded_at is None
+    assert order.new_field == 'kept'
+    assert order['attributes']['created_at'] == '2024-01-02T03:04:05.000000Z'
+    with pytest.raises(AttributeError):
+        order.tax
+    with pytest.raises(AttributeError):
+        Order('orders', '2').total
+
+
+def test_shared_values_are_interned():
+    first = Order('orders', '1', {'status': ''.join(['pa', 'id'])})
+    second = Order('orders', '2', {'status': ''.join(['pa', 'id'])})
+    assert first.status is second.status
+
+
+def test_unknown_types_get_a_generic_model():
+    model = model_for('licenses', '5')
+    assert type(model) is GenericModel and not model.loaded
+    assert type(model_for('orders', '5')) is Order
+
+
+def test_parse_timestamp():
+    assert parse_timestamp('') is None
+    assert parse_timestamp('2021-08-17T09:45:53+02:00').utcoffset() == timedelta(hours=2)
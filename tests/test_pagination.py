@@ -0,0 +1,138 @@
+import json
+import threading
+import pytest
+from lemon_squeezy import LemonSqueezy
+from lemon_squeezy.models import Order
+from lemon_squeezy.pagination import iter_changed_pages, iter_pages, prefetch_pages
+from lemon_squeezy.pipeline import Response
+
+LATER = '2030-01-01T00:00:00.000000Z'
+
+
+def _changed(client, since, page_size=2):
+    pages = iter_changed_pages(client.pipeline, '/v1/customers', since=since, page_size=page_size)
+    return [customer['id'] for page in pages for customer in page['data']]
+
+
+def _ids(server, type, **filters):
+    return [str(attributes['id']) for attributes in server.dataset.resources[type]
+            if all(attributes.get(name) == value for name, value in filters.items())]
+
+
+def test_changes_at_the_high_water_timestamp_on_the_next_page_are_fetched(server, client):
+    for id in ('7', '8', '9'):
+        server.update('customers', id, {'updated_at': LATER})
+    # The first page ends at `since` and the third change is on the next one
+    assert {'7', '8', '9'} <= set(_changed(client, LATER))
+
+
+def test_iteration_stops_past_the_high_water_mark(server, client):
+    for id in ('7', '8', '9'):
+        server.update('customers', id, {'updated_at': LATER})
+    server.reset_stats()
+    assert _changed(client, (LATER, '9')) == ['9', '8']
+    assert server.requests == 1
+
+
+@pytest.mark.parametrize('type, iterate', [
+    ('orders', lambda client: client.order.iter_orders(page_size=7)),
+    ('customers', lambda client: client.customer.iter_customers(page_size=7)),
+    ('subscriptions', lambda client: client.subscription.iter_subscriptions(page_size=7)),
+    ('products', lambda client: client.product.iter_products(page_size=7)),
+    ('variants', lambda client: client.variants.iter_variants(page_size=7)),
+    ('checkouts', lambda client: client.checkout.iter_checkouts(page_size=7)),
+])
+def test_iterators_yield_every_resource_once_in_order(server, client, type, iterate):
+    assert [resource['id'] for resource in iterate(client)] == _ids(server, type)
+
+
+def test_filters_are_kept_on_every_page(server, client):
+    subscriptions = client.subscription.iter_subscriptions(product_id=3, page_size=2)
+    assert [subscription['id'] for subscription in subscriptions] == _ids(server, 'subscriptions', product_id=3)
+
+
+def test_pages_are_only_requested_when_needed(server, client):
+    orders = client.order.iter_orders(page_size=10)
+    assert server.requests == 0
+    first = [next(orders) for _ in range(10)]
+    assert server.requests == 1
+    next(orders)
+    assert server.requests == 2
+    assert [order['id'] for order in first] == _ids(server, 'orders')[:10]
+
+
+def test_empty_list(client):
+    assert list(client.subscription.iter_subscriptions(product_id=-1)) == []
+
+
+def test_pages_follow_the_next_links(server, client):
+    pages = list(iter_pages(client.pipeline, '/v1/orders', page_size=30))
+    assert [page['meta']['page']['currentPage'] for page in pages] == [1, 2, 3, 4]
+    assert 'next' not in pages[-1]['links']
+
+
+def test_models_are_yielded_when_enabled(server):
+    client = LemonSqueezy(server.url, 'test', rate_limit=None, models=True)
+    try:
+        orders = list(client.order.iter_orders(page_size=30))
+    finally:
+        client.session.close()
+    assert all(type(order) is Order for order in orders)
+    assert [order.id for order in orders] == _ids(server, 'orders')
+
+
+class InFlight:
+    # Middleware counting the requests in flight at once
+
+    def __init__(self):
+        self.current = 0
+        self.most = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, request, call_next):
+        with self._lock:
+            self.current += 1
+            self.most = max(self.most, self.current)
+        try:
+            return call_next(request)
+        finally:
+            with self._lock:
+                self.current -= 1
+
+
+def _strip_page_meta(request, call_next):
+    # Answers as an API that doesn't report the last page
+    response = call_next(request)
+    page = json.loads(response.content)
+    page.pop('meta', None)
+    return Response(response.status_code, response.headers, json.dumps(page).encode(), response.url, response.codec)
+
+
+def test_prefetched_pages_are_yielded_in_order(server, client):
+    # Random latency, so later pages often arrive first
+    server.jitter = 0.02
+    orders = client.order.iter_orders(page_size=5, concurrency=4)
+    assert [order['id'] for order in orders] == _ids(server, 'orders')
+
+
+def test_prefetch_keeps_at_most_concurrency_pages_in_flight(server, client):
+    server.latency = 0.01
+    in_flight = InFlight()
+    client.pipeline.use(in_flight)
+    pages = list(prefetch_pages(client.pipeline, '/v1/customers', page_size=10, concurrency=4))
+    assert len(pages) == 30
+    assert 1 < in_flight.most <= 4
+
+
+def test_stopping_early_stops_the_prefetch(server, client):
+    pages = prefetch_pages(client.pipeline, '/v1/customers', page_size=10, concurrency=4)
+    next(pages)
+    pages.close()
+    assert server.requests <= 1 + 4
+
+
+def test_prefetch_follows_next_links_without_a_last_page(server, client):
+    client.pipeline.use(_strip_page_meta)
+    pages = list(prefetch_pages(client.pipeline, '/v1/orders', page_size=30, concurrency=4))
+    assert [order['id'] for page in pages for order in page['data']] == _ids(server, 'orders')
+    assert server.requests == 4
@@ -0,0 +1,109 @@
+import socket
+import pytest
+import requests
+from lemon_squeezy import LemonSqueezy
+from lemon_squeezy.exceptions import (APIError, AuthenticationError, NotFoundError, RateLimitError, ServerError,
+                                      TransportError, ValidationError, error_for_status)
+from lemon_squeezy.pipeline import Pipeline, Request, Response, credential_scope
+
+
+def _recorder(name, seen):
+    def record(request, call_next):
+        seen.append(f'{name} in')
+        response = call_next(request)
+        seen.append(f'{name} out')
+        return response
+    return record
+
+
+def test_middleware_runs_outermost_first(client):
+    seen = []
+    client.pipeline.use(_recorder('a', seen))
+    client.pipeline.use(_recorder('b', seen))
+    client.pipeline.use(_recorder('c', seen), outermost=True)
+    client.product.get_product(1)
+    assert seen == ['c in', 'a in', 'b in', 'b out', 'a out', 'c out']
+
+
+def test_middleware_can_answer_without_sending(server, client):
+    seen = []
+
+    def answer(request, call_next):
+        return Response(200, {}, b'{"data": {"type": "products", "id": "1"}}')
+
+    client.pipeline.use(answer)
+    client.pipeline.use(_recorder('inner', seen))
+    client.pipeline.use(_recorder('outer', seen), outermost=True)
+    assert client.product.get_product(1) == {'data': {'type': 'products', 'id': '1'}}
+    assert seen == ['outer in', 'outer out']
+    assert server.requests == 0
+
+
+def test_middleware_sees_the_request(client):
+    seen = []
+
+    def record(request, call_next):
+        seen.append((request.method, request.resource, request.resource_id, request.context['scope']))
+        return call_next(request)
+
+    client.pipeline.use(record)
+    client.order.get_order(5)
+    client.order.get_all_orders()
+    scope = client.pipeline.scope
+    assert seen == [('GET', 'orders', '5', scope), ('GET', 'orders', None, scope)]
+
+
+def test_request_key_ignores_parameter_order():
+    first = Request('get', '/v1/orders', {'page[size]': 10, 'filter[store_id]': '1'})
+    second = Request('GET', '/v1/orders', {'filter[store_id]': 1, 'page[size]': '10'})
+    assert first.key == second.key
+    assert first.key != Request('GET', '/v1/orders', {'page[size]': 20}).key
+
+
+def test_url_for():
+    pipeline = Pipeline(requests.Session(), 'https://api.example.com/')
+    assert pipeline.url_for(Request('GET', '/v1/orders')) == 'https://api.example.com/v1/orders'
+    link = 'https://api.example.com/v1/orders?page%5Bnumber%5D=2'
+    assert pipeline.url_for(Request('GET', link)) == link
+
+
+def test_scope_keeps_credentials_apart_without_revealing_them():
+    scope = credential_scope('https://api.example.com/', 'Bearer secret')
+    assert 'secret' not in scope
+    assert scope.startswith('https://api.example.com ')
+    assert scope != credential_scope('https://api.example.com', 'Bearer other')
+    assert scope == Pipeline(requests.Session(), 'https://api.example.com', scope=scope).scope
+
+
+def test_parse_turns_the_data_into_the_result(client):
+    request = Request('GET', '/v1/products/1', parse=lambda data: data['data']['id'])
+    assert client.pipeline.request(request) == '1'
+
+
+@pytest.mark.parametrize('status, error', [
+    (401, AuthenticationError), (403, AuthenticationError), (404, NotFoundError), (400, ValidationError),
+    (422, ValidationError), (429, RateLimitError), (500, ServerError), (503, ServerError), (409, APIError),
+])
+def test_error_for_status(status, error):
+    assert type(error_for_status(status)) is error
+
+
+def test_error_responses_raise_typed_errors(server, client):
+    with pytest.raises(NotFoundError) as info:
+        client.product.get_product(999)
+    assert info.value.status_code == 404
+    assert info.value.url.endswith('/v1/products/999')
+    assert info.value.errors
+
+
+def test_failed_requests_raise_transport_errors():
+    with socket.socket() as listener:
+        listener.bind(('127.0.0.1', 0))
+        port = listener.getsockname()[1]
+    client = LemonSqueezy(f'http://127.0.0.1:{port}', 'test', rate_limit=None)
+    client.session.retry_policy.max_retries = 0
+    try:
+        with pytest.raises(TransportError):
+            client.product.get_product(1)
+    finally:
+        client.session.close()
@@ -0,0 +1,108 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from lemon_squeezy.pool import FairScheduler, LemonSqueezyPool
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.001)
+
+
+def _grant_order(scheduler, queued):
+    # Queues the requests in order while the only slot is taken, then frees it and records who gets it next
+    granted = []
+    scheduler.acquire('holder')
+    threads = []
+    for count, tenant in enumerate(queued, 1):
+        def request(tenant=tenant):
+            scheduler.acquire(tenant)
+            granted.append(tenant)
+            scheduler.release()
+
+        threads.append(threading.Thread(target=request))
+        threads[-1].start()
+        _wait_for(lambda: sum(scheduler.waiting().values()) == count)
+    scheduler.release()
+    for thread in threads:
+        thread.join()
+    return granted
+
+
+def test_free_slots_are_taken_at_once():
+    scheduler = FairScheduler(2)
+    scheduler.acquire('a')
+    scheduler.acquire('b')
+    assert scheduler.in_use == 2 and scheduler.waiting() == {}
+    scheduler.release()
+    scheduler.release()
+    assert scheduler.in_use == 0
+
+
+def test_backlog_does_not_starve_other_tenants():
+    granted = _grant_order(FairScheduler(1), ['a'] * 6 + ['b'] * 2)
+    assert granted == ['a', 'b', 'a', 'b', 'a', 'a', 'a', 'a']
+
+
+def test_slots_follow_the_weights():
+    scheduler = FairScheduler(1)
+    scheduler.weights['a'] = 2
+    granted = _grant_order(scheduler, ['a'] * 8 + ['b'] * 4)
+    assert granted[:9].count('a') == 6 and granted[:9].count('b') == 3
+    assert scheduler.waiting() == {} and scheduler.in_use == 0
+
+
+def test_requests_in_flight_are_bounded(server):
+    server.latency = 0.1
+    with LemonSqueezyPool(server.url, rate_limit=None, max_in_flight=3) as pool:
+        tenants = [pool.add('first', 'key-1'), pool.add('second', 'key-2')]
+        started = time.monotonic()
+        with ThreadPoolExecutor(12) as executor:
+            products = list(executor.map(lambda index: tenants[index % 2].product.get_product(index + 1), range(12)))
+        elapsed = time.monotonic() - started
+    assert [product['data']['id'] for product in products] == [str(index + 1) for index in range(12)]
+    assert elapsed >= 0.4
+
+
+def test_throttled_tenant_does_not_hold_a_slot(server):
+    with LemonSqueezyPool(server.url, rate_limit=None, rate_period=1.0, max_in_flight=1) as pool:
+        throttled = pool.add('throttled', 'key-1', rate_limit=1)
+        other = pool.add('other', 'key-2')
+        throttled.product.get_product(1)
+        with ThreadPoolExecutor(1) as executor:
+            # Waits about a second for its key's next token
+            waiting = executor.submit(throttled.product.get_product, 2)
+            time.sleep(0.1)
+            started = time.monotonic()
+            other.product.get_product(3)
+            assert time.monotonic() - started < 0.5
+            assert not waiting.done()
+            assert waiting.result()['data']['id'] == '2'
+
+
+def test_requests_are_paced_by_their_own_key(server):
+    with LemonSqueezyPool(server.url) as pool:
+        first = pool.add('first', 'key-1', weight=3)
+        second = pool.add('second', 'key-2', rate_limit=10)
+        bucket = pool.session.rate_limiter_for({'headers': {'Authorization': 'Bearer key-1'}})
+        assert bucket is first.rate_limiter
+        assert pool.session.rate_limiter_for({'headers': {'Authorization': 'Bearer key-2'}}) is second.rate_limiter
+        assert bucket is not second.rate_limiter and second.rate_limiter.capacity == 10
+        assert pool.scheduler.weights == {'first': 3, 'second': 1}
+        assert first.session is second.session is pool.session
+
+
+def test_tenants_can_be_replaced_and_removed(server):
+    with LemonSqueezyPool(server.url, rate_limit=None) as pool:
+        old = pool.add('tenant', 'key-1')
+        new = pool.add('tenant', 'key-2', weight=2)
+        assert pool['tenant'] is new and new is not old
+        assert list(pool) == ['tenant'] and len(pool) == 1
+        assert [name for name, _ in pool.session.tenants.values()] == ['tenant']
+        assert new.product.get_product(1)['data']['id'] == '1'
+
+        pool.remove('tenant')
+        pool.remove('missing')
+        assert 'tenant' not in pool and pool.session.tenants == {} and pool.scheduler.weights == {}
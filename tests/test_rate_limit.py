@@ -0,0 +1,99 @@
+import time
+from email.utils import formatdate
+import pytest
+from lemon_squeezy import LemonSqueezy
+from lemon_squeezy.exceptions import RateLimitError
+from lemon_squeezy.rate_limit import TokenBucket, parse_retry_after
+from lemon_squeezy.session import LemonSqueezySession
+
+
+def test_bucket_allows_a_burst_then_paces_requests():
+    bucket = TokenBucket(2, 1.0)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(0.5, abs=0.05)
+    assert bucket.reserve() == pytest.approx(1.0, abs=0.05)
+
+
+def test_acquire_waits_for_a_token():
+    bucket = TokenBucket(1, 0.2)
+    bucket.acquire()
+    started = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - started >= 0.15
+
+
+def test_pause_holds_back_every_request():
+    bucket = TokenBucket(100, 1.0)
+    bucket.pause(1.0)
+    assert not bucket.try_acquire()
+    assert bucket.reserve() == pytest.approx(1.0, abs=0.05)
+
+
+def test_sync_lowers_the_tokens_to_the_reported_remaining():
+    bucket = TokenBucket(100, 60.0)
+    bucket.sync({'X-Ratelimit-Remaining': 'many'})
+    bucket.sync({})
+    assert bucket.try_acquire()
+    bucket.sync({'X-Ratelimit-Remaining': '0'})
+    assert not bucket.try_acquire()
+
+
+@pytest.mark.parametrize('headers, expected', [
+    ({'Retry-After': '2'}, 2.0),
+    ({'Retry-After': '-1'}, 0.0),
+    ({'Retry-After': 'soon'}, None),
+    ({}, None),
+])
+def test_parse_retry_after(headers, expected):
+    assert parse_retry_after(headers) == expected
+
+
+def test_parse_retry_after_as_an_http_date():
+    headers = {'Retry-After': formatdate(time.time() + 30, usegmt=True)}
+    assert parse_retry_after(headers) == pytest.approx(30, abs=2)
+
+
+def test_429_is_retried_after_the_retry_after_delay(server):
+    server.rate_limited = 1.0
+    server.retry_after = 0.2
+    with LemonSqueezySession(TokenBucket(100, 1.0), max_rate_limit_retries=2) as session:
+        started = time.monotonic()
+        response = session.get(f'{server.url}/v1/products/1')
+        elapsed = time.monotonic() - started
+    assert response.status_code == 429
+    assert server.requests == 3
+    assert elapsed >= 0.4
+
+
+def test_429_pauses_the_shared_bucket(server):
+    server.rate_limited = 1.0
+    server.retry_after = 0.3
+    bucket = TokenBucket(100, 1.0)
+    held_back = []
+    with LemonSqueezySession(bucket, max_rate_limit_retries=1) as session:
+        # Other requests sent before the retry have to wait as well
+        session.on_retry = lambda method, url, reason: held_back.append(not bucket.try_acquire())
+        session.get(f'{server.url}/v1/products/1').close()
+    assert held_back == [True]
+
+
+def test_429_without_retry_after_backs_off_exponentially(server, monkeypatch):
+    server.rate_limited = 1.0
+    server.retry_after = ''
+    slept = []
+    monkeypatch.setattr(time, 'sleep', slept.append)
+    with LemonSqueezySession(max_rate_limit_retries=3, default_retry_after=0.5) as session:
+        session.get(f'{server.url}/v1/products/1').close()
+    assert slept == [0.5, 1.0, 2.0]
+
+
+def test_client_raises_once_the_429_retries_run_out(server):
+    server.rate_limited = 1.0
+    client = LemonSqueezy(server.url, 'test', rate_limit=None)
+    client.session.max_rate_limit_retries = 0
+    try:
+        with pytest.raises(RateLimitError):
+            client.product.get_product(1)
+    finally:
+        client.session.close()
@@ -0,0 +1,135 @@
+import socket
+import pytest
+import requests
+from lemon_squeezy.rate_limit import TokenBucket
+from lemon_squeezy.retry import RetryPolicy
+from lemon_squeezy.session import LemonSqueezySession
+
+NO_BACKOFF = RetryPolicy(max_retries=2, backoff_base=0)
+
+
+class CountingBucket(TokenBucket):
+    # Counts the tokens taken
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.taken = 0
+
+    def reserve(self) -> float:
+        self.taken += 1
+        return super().reserve()
+
+    def try_acquire(self) -> bool:
+        taken = super().try_acquire()
+        self.taken += taken
+        return taken
+
+
+def _get(server, session):
+    response = session.get(f'{server.url}/v1/products/1')
+    assert response.status_code == 200
+    response.close()
+
+
+def test_hedge_timer_does_not_include_the_wait_for_a_token(server):
+    # One token every 0.3s: the second request waits for it, but is answered at once
+    bucket = CountingBucket(1, 0.3)
+    with LemonSqueezySession(bucket, hedge_after=0.1) as session:
+        _get(server, session)
+        _get(server, session)
+    assert bucket.taken == 2
+    assert server.requests == 2
+
+
+def test_hedge_is_not_sent_without_a_token(server):
+    server.latency = 0.3
+    bucket = CountingBucket(1, 60.0)
+    with LemonSqueezySession(bucket, hedge_after=0.05) as session:
+        _get(server, session)
+    assert bucket.taken == 1
+    assert server.requests == 1
+
+
+def test_slow_request_is_hedged(server):
+    server.latency = 0.3
+    bucket = CountingBucket(10, 60.0)
+    with LemonSqueezySession(bucket, hedge_after=0.05) as session:
+        _get(server, session)
+    assert bucket.taken == 2
+    assert server.requests == 2
+
+
+def _closed_port_url():
+    with socket.socket() as listener:
+        listener.bind(('127.0.0.1', 0))
+        port = listener.getsockname()[1]
+    return f'http://127.0.0.1:{port}'
+
+
+def test_server_errors_are_retried_for_get(server):
+    server.errors = 1.0
+    with LemonSqueezySession(retry_policy=NO_BACKOFF) as session:
+        response = session.get(f'{server.url}/v1/products/1')
+    assert response.status_code == 503
+    assert server.requests == 3
+
+
+def test_server_errors_are_not_retried_for_post(server):
+    server.errors = 1.0
+    with LemonSqueezySession(retry_policy=NO_BACKOFF) as session:
+        response = session.post(f'{server.url}/v1/checkouts', data=b'{}')
+    assert response.status_code == 503
+    assert server.requests == 1
+
+
+class UnreachableSession(LemonSqueezySession):
+    # Fails to connect on the first attempt
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.attempts = 0
+
+    def _transmit(self, rate_limiter, method, url, *args, **kwargs):
+        self.attempts += 1
+        if self.attempts == 1:
+            raise requests.exceptions.ConnectTimeout()
+        return super()._transmit(rate_limiter, method, url, *args, **kwargs)
+
+
+@pytest.mark.parametrize('method', ['GET', 'POST'])
+def test_connect_timeouts_are_retried_for_every_method(server, method):
+    with UnreachableSession(retry_policy=NO_BACKOFF) as session:
+        response = session.request(method, f'{server.url}/v1/checkouts', data=b'{}')
+    assert response.status_code in (200, 201)
+    assert session.attempts == 2
+
+
+@pytest.mark.parametrize('method, retried', [('GET', 2), ('POST', 0)])
+def test_refused_connections_are_only_retried_for_idempotent_methods(method, retried):
+    retries = []
+    with LemonSqueezySession(retry_policy=NO_BACKOFF) as session:
+        session.on_retry = lambda method, url, reason: retries.append(reason)
+        with pytest.raises(requests.exceptions.ConnectionError):
+            session.request(method, _closed_port_url())
+    assert retries == ['connection'] * retried
+
+
+def test_default_timeout_is_applied(server):
+    server.latency = 0.5
+    with LemonSqueezySession(timeout=(1.0, 0.1), retry_policy=RetryPolicy(max_retries=0)) as session:
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            session.get(f'{server.url}/v1/products/1')
+
+
+def test_backoff_stays_within_its_bounds():
+    policy = RetryPolicy(backoff_base=0.25, backoff_max=1.0)
+    for attempt, bound in enumerate([0.25, 0.5, 1.0, 1.0, 1.0]):
+        assert all(0 <= policy.backoff(attempt) <= bound for _ in range(100))
+
+
+def test_retry_policy_methods_and_statuses():
+    policy = RetryPolicy(max_retries=1, methods=['get'], retry_statuses=[503])
+    assert policy.should_retry_status('GET', 503, 0)
+    assert not policy.should_retry_status('GET', 503, 1)
+    assert not policy.should_retry_status('GET', 500, 0)
+    assert not policy.should_retry_status('POST', 503, 0)
@@ -0,0 +1,126 @@
+import itertools
+import time
+from datetime import datetime, timezone
+from lemon_squeezy.subscription_watcher import SubscriptionWatcher
+
+# A clock a day further on every poll, so every watched subscription is due
+_days = itertools.count(1)
+
+
+def _poll(watcher):
+    requests = watcher.requests
+    changes = watcher.poll(time.time() + next(_days) * 86400)
+    return changes, watcher.requests - requests
+
+
+def test_quiet_poll_fetches_one_page(client):
+    watcher = SubscriptionWatcher(client.pipeline, page_size=25)
+    watcher.watch(1, 2, 3, store_id=1)
+    _, requests = _poll(watcher)
+    assert requests <= 10
+
+    assert _poll(watcher) == ([], 1)
+
+
+def test_missing_subscription_does_not_force_full_scans(server, client):
+    watcher = SubscriptionWatcher(client.pipeline, page_size=25)
+    watcher.watch(1, 2, 123456789, store_id=1)
+    _, requests = _poll(watcher)
+    assert requests == 10
+    assert watcher.missing() == ['123456789']
+
+    assert _poll(watcher) == ([], 1)
+
+    server.update('subscriptions', 2, {'status': 'past_due', 'updated_at': '2030-01-01T00:00:00.000000Z'})
+    changes, requests = _poll(watcher)
+    assert requests == 1
+    assert [(change.id, change.changes['status'][1]) for change in changes] == [('2', 'past_due')]
+
+
+def test_missing_subscription_is_found_once_it_appears(server, client):
+    watcher = SubscriptionWatcher(client.pipeline, page_size=25)
+    watcher.watch(251, store_id=1)
+    _poll(watcher)
+    assert watcher.missing() == ['251']
+
+    subscription = dict(server.dataset.get('subscriptions', '1'), updated_at='2030-01-01T00:00:00.000000Z')
+    assert server.add('subscriptions', subscription)['id'] == 251
+    _, requests = _poll(watcher)
+    assert requests == 1
+    assert watcher.missing() == []
+    assert watcher.get(251)['updated_at'] == '2030-01-01T00:00:00.000000Z'
+
+
+def _timestamp(moment):
+    return datetime.fromtimestamp(moment, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def test_interval_depends_on_the_state(client):
+    watcher = SubscriptionWatcher(client.pipeline)
+    now = time.time()
+    assert watcher.interval({'status': 'past_due'}, now) == 60
+    assert watcher.interval({'status': 'unpaid'}, now) == 60
+    assert watcher.interval({'status': 'expired'}, now) == 6 * 3600
+    assert watcher.interval({'status': 'active', 'renews_at': _timestamp(now + 3600)}, now) == 300
+    assert watcher.interval({'status': 'on_trial', 'trial_ends_at': _timestamp(now - 3600)}, now) == 300
+    assert watcher.interval({'status': 'active', 'renews_at': _timestamp(now + 30 * 86400)}, now) == 3600
+
+
+def test_only_due_groups_are_scanned(client):
+    watcher = SubscriptionWatcher(client.pipeline, page_size=25)
+    watcher.watch(1, store_id=1)
+    now = time.time()
+    watcher.poll(now)
+    assert watcher.next_due() == now + watcher.interval(watcher.get(1), now)
+    requests = watcher.requests
+    assert watcher.poll(now + 1) == []
+    assert watcher.requests == requests
+
+
+def test_changes_are_reported(server, client):
+    seen = []
+    watcher = SubscriptionWatcher(client.pipeline, on_change=seen.append, page_size=25)
+    watcher.watch(1, 2, store_id=1)
+    _poll(watcher)
+    server.update('subscriptions', 1, {'updated_at': '2030-01-01T00:00:00.000000Z', 'urls': {'new': 'url'}})
+    assert _poll(watcher)[0] == []
+
+    server.update('subscriptions', 2, {'updated_at': '2030-01-02T00:00:00.000000Z', 'status': 'cancelled',
+                                       'cancelled': True})
+    changes, _ = _poll(watcher)
+    assert seen == changes
+    assert [(change.id, sorted(change.changes)) for change in changes] == [('2', ['cancelled', 'status'])]
+    assert changes[0].changes['status'][1] == 'cancelled'
+
+
+def test_groups_scan_with_their_filters(server, client):
+    sent = []
+
+    def record(request, call_next):
+        sent.append(request.params.get('filter[product_id]'))
+        return call_next(request)
+
+    client.pipeline.use(record)
+    watcher = SubscriptionWatcher(client.pipeline, page_size=100)
+    product_3, product_4 = ([str(subscription['id']) for subscription in server.dataset.resources['subscriptions']
+                             if subscription['product_id'] == product_id] for product_id in (3, 4))
+    watcher.watch(*product_3, product_id=3)
+    # Watched with the wrong product, so its group never returns it
+    watcher.watch(product_3[0], *product_4, product_id=4)
+    _poll(watcher)
+    assert sorted(set(sent)) == [3, 4]
+    assert watcher.missing() == [product_3[0]]
+    assert all(watcher.get(id) is not None for id in product_3[1:] + product_4)
+
+    watcher.unwatch(*product_4)
+    assert len(watcher) == len(product_3)
+
+
+def test_background_polling(server, client):
+    with SubscriptionWatcher(client.pipeline, page_size=25) as watcher:
+        watcher.watch(1, 2, store_id=1)
+        deadline = time.monotonic() + 5
+        while watcher.get(2) is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert watcher.get(2)['status'] == server.dataset.get('subscriptions', '2')['status']
+    assert watcher.last_error is None and watcher._thread is None
@@ -0,0 +1,182 @@
+import asyncio
+import io
+import threading
+import pytest
+import requests
+from lemon_squeezy.cache import CacheMiddleware
+from lemon_squeezy.codec import DEFAULT_CODEC
+from lemon_squeezy.mirror import Mirror
+from lemon_squeezy.models import Order
+from lemon_squeezy.webhooks import (SIGNATURE_HEADER, AsyncWebhookReceiver, WebhookReceiver, cache_invalidator,
+                                    compute_signature, mirror_applier, sign_payload, verify_signature)
+
+SECRET = 'secret'
+
+
+def _subscription(id, updated_at='2024-01-01T00:00:00.000000Z'):
+    return {'type': 'subscriptions', 'id': str(id), 'attributes': {'status': 'active', 'updated_at': updated_at}}
+
+
+def _delivery(event_name, data, webhook_id='hook-1'):
+    # Signed like the API: the meta names the webhook but carries no per-delivery ID
+    body = DEFAULT_CODEC.encode({'meta': {'event_name': event_name, 'webhook_id': webhook_id}, 'data': data})
+    return body, {SIGNATURE_HEADER: compute_signature(SECRET, body)}
+
+
+def _received(receiver):
+    seen = []
+    receiver.on('subscription_updated')(lambda event: seen.append(event.data['id']))
+    return seen
+
+
+def test_events_of_one_webhook_for_different_resources_are_all_dispatched():
+    receiver = WebhookReceiver(SECRET, workers=1)
+    seen = _received(receiver)
+    with receiver:
+        assert receiver.receive(*_delivery('subscription_updated', _subscription(1))) == 200
+        assert receiver.receive(*_delivery('subscription_updated', _subscription(2))) == 200
+    assert sorted(seen) == ['1', '2']
+
+
+def test_redelivery_is_dropped():
+    receiver = WebhookReceiver(SECRET, workers=1)
+    seen = _received(receiver)
+    with receiver:
+        for _ in range(3):
+            assert receiver.receive(*_delivery('subscription_updated', _subscription(1))) == 200
+        updated = _subscription(1, '2024-01-02T00:00:00.000000Z')
+        assert receiver.receive(*_delivery('subscription_updated', updated)) == 200
+    assert seen == ['1', '1']
+
+
+def test_event_id_identifies_the_delivery():
+    receiver = WebhookReceiver(SECRET, workers=1)
+    seen = _received(receiver)
+    with receiver:
+        for event_id in ('a', 'b', 'a'):
+            body, headers = sign_payload(SECRET, 'subscription_updated', _subscription(1), event_id=event_id)
+            assert receiver.receive(body, headers) == 200
+    assert seen == ['1', '1']
+
+
+def test_bad_signature_is_rejected():
+    receiver = WebhookReceiver(SECRET, workers=1)
+    body, _ = _delivery('subscription_updated', _subscription(1))
+    assert receiver.receive(body, {SIGNATURE_HEADER: '0' * 64}) == 401
+
+
+def test_async_receiver_requires_async_with():
+    receiver = AsyncWebhookReceiver(SECRET, workers=1)
+    with pytest.raises(TypeError, match='async with'):
+        with receiver:
+            pass
+
+
+def test_async_receiver_dispatches():
+    async def main():
+        receiver = AsyncWebhookReceiver(SECRET, workers=1)
+        seen = _received(receiver)
+        async with receiver:
+            assert await receiver.receive(*_delivery('subscription_updated', _subscription(1))) == 200
+            assert await receiver.receive(*_delivery('subscription_updated', _subscription(2))) == 200
+        return seen
+
+    assert sorted(asyncio.run(main())) == ['1', '2']
+
+
+def test_signature_check():
+    body = b'{"data": {}}'
+    signature = compute_signature(SECRET, body)
+    assert verify_signature(SECRET, body, f' {signature.upper()} ')
+    assert not verify_signature(SECRET, body + b' ', signature)
+    assert not verify_signature(b'other', body, signature)
+    assert not verify_signature(SECRET, body, None)
+
+
+def test_unreadable_body_is_rejected():
+    receiver = WebhookReceiver(SECRET)
+    for body in (b'not json', b'{"meta": {}}', b'[]'):
+        assert receiver.receive(body, {SIGNATURE_HEADER: compute_signature(SECRET, body)}) == 400
+
+
+def test_full_queue_asks_for_a_redelivery():
+    receiver = WebhookReceiver(SECRET, queue_size=1, enqueue_timeout=0.01)
+    delivery = _delivery('subscription_updated', _subscription(2))
+    assert receiver.receive(*_delivery('subscription_updated', _subscription(1))) == 200
+    assert receiver.receive(*delivery) == 503
+    receiver.queue.get_nowait()
+    # The rejected event was forgotten, so its redelivery is queued
+    assert receiver.receive(*delivery) == 200
+
+
+def test_events_are_applied_before_their_handlers():
+    calls = []
+    receiver = WebhookReceiver(SECRET, apply=lambda event: calls.append(('apply', event.name)), workers=1)
+    receiver.on('subscription_updated')(lambda event: calls.append(('updated', event.resource.status)))
+    receiver.on()(lambda event: calls.append(('any', event.name)))
+    with receiver:
+        receiver.receive(*_delivery('subscription_updated', _subscription(1)))
+        receiver.receive(*_delivery('order_created', {'type': 'orders', 'id': '1', 'attributes': {}}))
+    assert calls == [('apply', 'subscription_updated'), ('updated', 'active'), ('any', 'subscription_updated'),
+                     ('apply', 'order_created'), ('any', 'order_created')]
+
+
+def test_handler_errors_are_recorded():
+    receiver = WebhookReceiver(SECRET, workers=1)
+    receiver.on('subscription_updated')(lambda event: 1 / 0)
+    with receiver:
+        receiver.receive(*_delivery('subscription_updated', _subscription(1)))
+        receiver.receive(*_delivery('subscription_updated', _subscription(2)))
+    errors = [receiver.errors.get_nowait() for _ in range(2)]
+    assert [(event.data['id'], type(error)) for event, error in errors] == \
+        [('1', ZeroDivisionError), ('2', ZeroDivisionError)]
+
+
+def test_event_of_sign_payload():
+    body, headers = sign_payload(SECRET, 'order_created', {'type': 'orders', 'id': '5', 'attributes': {'total': 1}},
+                                 custom_data={'ref': 'a'})
+    event = WebhookReceiver(SECRET).parse(body, headers)
+    assert (event.name, event.custom_data, event.test_mode) == ('order_created', {'ref': 'a'}, False)
+    assert type(event.resource) is Order and event.resource.total == 1
+
+
+def test_wsgi_app():
+    receiver = WebhookReceiver(SECRET)
+    body, headers = _delivery('subscription_updated', _subscription(1))
+    statuses = []
+    for signature in (headers[SIGNATURE_HEADER], 'bad'):
+        environ = {'CONTENT_LENGTH': str(len(body)), 'wsgi.input': io.BytesIO(body), 'HTTP_X_SIGNATURE': signature}
+        receiver.wsgi_app(environ, lambda status, headers: statuses.append(status))
+    assert statuses == ['200 OK', '401 Unauthorized']
+    assert receiver.queue.qsize() == 1
+
+
+def test_standalone_server():
+    receiver = WebhookReceiver(SECRET, workers=1)
+    seen = _received(receiver)
+    server = receiver.make_server('127.0.0.1', 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with receiver:
+            body, headers = _delivery('subscription_updated', _subscription(1))
+            response = requests.post(f'http://127.0.0.1:{server.server_port}/webhooks', data=body, headers=headers)
+            assert response.status_code == 200
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert seen == ['1']
+
+
+def test_events_update_the_mirror_and_the_cache(client, tmp_path):
+    mirror = Mirror(client.pipeline, str(tmp_path / 'mirror.sqlite'))
+    cache = CacheMiddleware(ttls={'subscriptions': 60})
+    client.pipeline.use(cache)
+    client.subscription.get_subscription(1)
+    assert len(cache.backend) == 1
+
+    appliers = [mirror_applier(mirror), cache_invalidator(cache)]
+    with WebhookReceiver(SECRET, apply=lambda event: [apply(event) for apply in appliers], workers=1) as receiver:
+        receiver.receive(*_delivery('subscription_updated', _subscription(1)))
+    assert mirror.get('subscriptions', 1)['attributes']['status'] == 'active'
+    assert len(cache.backend) == 0